@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import pytest
+import numpy as np
+
+pytest.importorskip("pytest_benchmark")
+
+from latexdocs import Document, Table, Text, Image, TikZFigure
+
+
+FAKE_LATEX = [sys.executable, os.path.join(os.path.dirname(__file__), 'fake_latex.py')]
+
+
+def make_document(nsec: int = 10, nsub: int = 5, nitem: int = 5) -> Document:
+    """
+    Returns a synthetic document with `nsec` sections, each having `nsub`
+    subsections with `nitem` text items and a small table.
+    """
+    doc = Document(title='Benchmark', author='latexdocs', date=True)
+    data = np.arange(16).reshape(4, 4)
+    for i in range(nsec):
+        doc['Section {}'.format(i)].append('Introduction of section {}.'.format(i))
+        for j in range(nsub):
+            sub = doc['Section {}'.format(i), 'Subsection {}'.format(j)]
+            for k in range(nitem):
+                sub.append(Text('Paragraph {} with some $math$ & symbols.'.format(k)))
+            sub.append(Table(data=data, columns=['A', 'B', 'C', 'D']))
+    return doc
+
+
+@pytest.fixture(params=[1, 10, 50], ids=lambda n: "{}sec".format(n))
+def document_size(request):
+    return request.param
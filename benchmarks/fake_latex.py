@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+A stand-in for a LaTeX compiler, used to test and benchmark the Python side
+of the compilation pipeline without a TeX installation. It writes a small
+pdf and a log file that looks like the output of pdflatex. The outputs go to
+the working directory, or to the one given with `-output-directory`, and
+are named after `-jobname`, like the real thing. In draft mode (`-draftmode`,
+`--draftmode` or `-no-pdf`), the pdf is not written.
+
+The aux file lists the labels of the document, and the log asks for a rerun
+if it has changed, like the real thing. A table of contents lists the number 
+of the pass and settles on the second pass, hence a document with a table 
+of contents needs three passes. When the file is the driver of a 
+:class:`latexdocs.TexWorkerPool`, the name of the body is read from the 
+terminal.
+"""
+import os
+import sys
+
+_log_ = """This is a fake pdfTeX.
+{warning}Here is how much of TeX's memory you used:
+ 3651 strings out of 478287
+ 55268 string characters out of 5849289
+{output}"""
+
+_output_ = "Output written on {name}.pdf (1 page, {nbytes} bytes).\n"
+
+_rerun_ = "LaTeX Warning: Label(s) may have changed. " \
+    "Rerun to get cross-references right.\n"
+
+_draft_flags_ = ('-draftmode', '--draftmode', '-no-pdf')
+
+
+def _read_(path: str) -> str:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except (OSError, IOError):
+        return None
+
+
+def main(argv: list):
+    options = dict(a.lstrip('-').split('=', 1) for a in argv
+                   if a.startswith('-') and '=' in a)
+    draft = any(a in _draft_flags_ for a in argv)
+    texpath = [a for a in argv if not a.startswith('-')][-1]
+    content = _read_(texpath)
+    if content is None:
+        texpath += '.tex'
+        content = _read_(texpath)
+    if r"\ltxdocsbody" in content:
+        # the driver of a worker pool waits for the name of the body
+        name = sys.stdin.readline().strip()
+        content += _read_(name + '.tex')
+    jobname = options.get('jobname', os.path.splitext(os.path.basename(texpath))[0])
+    outdir = options.get('output-directory', os.getcwd())
+    base = os.path.join(outdir, jobname)
+    labels = content.count('\\label')
+    previous = _read_(base + '.aux')
+    aux = '\\relax\n' + ''.join('\\newlabel{{{}}}\n'.format(i) for i in range(labels))
+    with open(base + '.aux', 'w', encoding='utf-8') as f:
+        f.write(aux)
+    if '\\tableofcontents' in content:
+        toc = _read_(base + '.toc')
+        # the page numbers in the table shift once it is typeset
+        npass = min(int(toc.strip()[-2]) + 1 if toc is not None else 1, 2)
+        with open(base + '.toc', 'w', encoding='utf-8') as f:
+            f.write('\\contentsline {{section}}{{Section}}{{{}}}\n'.format(npass))
+    output = ''
+    if not draft:
+        data = b'%PDF-1.5\n%fake\n' + content.encode('utf-8')[:64]
+        with open(base + '.pdf', 'wb') as f:
+            f.write(data)
+        output = _output_.format(name=base, nbytes=len(data))
+    warning = _rerun_ if labels > 0 and aux != previous else ''
+    with open(base + '.log', 'w', encoding='utf-8') as f:
+        f.write(_log_.format(warning=warning, output=output))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
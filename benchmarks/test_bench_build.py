@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from conftest import make_document
+
+
+def test_tree_construction(benchmark, document_size):
+    benchmark(make_document, nsec=document_size)
+
+
+def test_build(benchmark, document_size):
+    doc = make_document(nsec=document_size)
+    benchmark(doc.build)
+
+
+def test_build_and_dump(benchmark, document_size):
+    doc = make_document(nsec=document_size)
+    benchmark(lambda: doc.build().dumps())
@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+import os
+from conftest import make_document, FAKE_LATEX
+
+
+def test_generate_pdf(benchmark, tmpdir, document_size):
+    doc = make_document(nsec=document_size)
+    filepath = os.path.join(str(tmpdir), 'benchmark')
+    result = benchmark(doc.generate_pdf, filepath, compiler=FAKE_LATEX)
+    assert os.path.exists(result.pdf_path)
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+import inspect
+import pytest
+import numpy as np
+import pylatex as pltx
+from pylatex import Plot
+
+from latexdocs import Table, Image, TikZFigure, Equations, ArrayMath
+from pylatex.utils import escape_latex
+from latexdocs.utils import float_to_str_sig, escape_latex_many
+
+
+def _emit(item):
+    doc = pltx.Document()
+    item._append2doc_(doc)
+    return doc.dumps_content()
+
+
+@pytest.mark.parametrize("nrows", [100, 1000, 10000])
+def test_table_emission(benchmark, nrows):
+    data = np.random.default_rng(0).random((nrows, 6))
+
+    def emit():
+        return _emit(Table(data=data, columns=list('ABCDEF')))
+    benchmark(emit)
+
+
+def _strings(size):
+    words = np.array(['part_no', 'R&D', '50%', '$cost', 'x^2', 'a-b', '{id}', 'plain'])
+    return np.random.default_rng(0).choice(words, size=(size, 4))
+
+
+@pytest.mark.parametrize("nrows", [100, 10000])
+def test_string_table_emission(benchmark, nrows):
+    data = _strings(nrows)
+
+    def emit():
+        return _emit(Table(data=data, columns=list('ABCD')))
+    benchmark(emit)
+
+
+@pytest.mark.parametrize("size", [1000, 100000])
+def test_escape_per_cell(benchmark, size):
+    cells = _strings(size // 4).ravel().tolist()
+    benchmark(lambda: [escape_latex(c) for c in cells])
+
+
+@pytest.mark.parametrize("size", [1000, 100000])
+def test_escape_bulk(benchmark, size):
+    cells = _strings(size // 4).ravel().tolist()
+    benchmark(escape_latex_many, cells)
+
+
+@pytest.mark.parametrize("size", [10, 1000, 100000])
+def test_float_to_str_sig(benchmark, size):
+    values = np.random.default_rng(0).random(size)
+    benchmark(float_to_str_sig, values, sig=4)
+
+
+def test_float_to_str_sig_scalar(benchmark):
+    benchmark(float_to_str_sig, 3.141592653589793, sig=4)
+
+
+def test_image_emission(benchmark):
+    img = Image('image.png', position='h!', width='350px', caption='An image.')
+    benchmark(_emit, img)
+
+
+def test_tikz_emission(benchmark):
+    x = np.linspace(-5, 5, 500)
+    coordinates = list(zip(x, x**3))
+    fig = TikZFigure(plot_options='height=4cm, width=6cm, grid=major')
+    fig.append(Plot(name='model', func='-x^5 - 242'))
+    fig.append(Plot(name='estimate', coordinates=coordinates))
+    benchmark(_emit, fig)
+
+
+def test_code_highlighting(benchmark):
+    pytest.importorskip('pygments')
+    from latexdocs.listing import highlight
+    source = inspect.getsource(inspect)
+    benchmark(highlight, source, 'python')
+
+
+def test_code_emission_cached(benchmark):
+    pytest.importorskip('pygments')
+    from latexdocs.listing import CodeListing
+    listing = CodeListing(inspect.getsource(inspect))
+    listing.highlighted()
+    benchmark(_emit, listing)
+
+
+@pytest.mark.parametrize("size", [1000, 50000])
+def test_equations_emission(benchmark, size):
+    lhs = ['x_{{{}}}'.format(i) for i in range(size)]
+    rhs = [r'\frac{{{}}}{{2}} + y'.format(i % 100) for i in range(size)]
+    benchmark(_emit, Equations(lhs, rhs, dfrac=True, per_group=100))
+
+
+def test_float_to_str_sig_matrix(benchmark):
+    data = np.random.default_rng(0).standard_normal((1000, 1000))
+    benchmark(float_to_str_sig, data, sig=4)
+
+
+def test_array_math_emission(benchmark):
+    data = np.random.default_rng(0).standard_normal((1000, 1000))
+    benchmark(_emit, ArrayMath(data, lhs='K', sig=3))
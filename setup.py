@@ -67,6 +67,10 @@ setup(
     python_requires='>=3.7, <3.11',                             
     package_dir={'':'src'},     
     install_requires=required,
+    extras_require={'yaml': ['pyyaml'], 'code': ['pygments']},
+    entry_points={
+        'console_scripts': ['latexdocs=latexdocs.cli:main'],
+    },
 	zip_safe=False,
 )
 
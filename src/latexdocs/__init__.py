@@ -2,6 +2,13 @@
 from .document import *
 from .items import *
 from .table import *
+from .lazy import Lazy
+from .profiling import BuildProfiler
+from .compiler import CompileHook, CompileResult
+from .pool import TexWorkerPool
+from .template import Template, Placeholder
+from .cache import FragmentCache
+from .listing import CodeListing
 
 __version__ = "v0.0.2"
 
@@ -1,14 +1,44 @@
 # -*- coding: utf-8 -*-
+import threading
 from linkeddeepdict import LinkedDeepDict
 from abc import abstractmethod
 
+from .utils import issequence
+
+
+def _rebuild_(cls):
+    obj = cls.__new__(cls)
+    obj._mutex = threading.RLock()
+    LinkedDeepDict.__init__(obj)
+    return obj
+
 
 class TexBase(LinkedDeepDict):
     """
-    Base class for all document items.
+    Base class for all document items. 
+    
+    Creating sections and appending content is thread-safe. Every node has 
+    its own lock, hence threads populating different sections don't wait 
+    for each other, only the creation of the sections is serialized with 
+    respect to their parent.
+    
+    Example
+    -------
+    >>> from concurrent.futures import ThreadPoolExecutor
+    >>> from latexdocs import Document
+    >>> doc = Document(title='Title', author='Author', date=True)
+    >>> def work(name):
+    >>>     doc['Results', name].append('Results of {}.'.format(name))
+    >>> with ThreadPoolExecutor(4) as executor:
+    >>>     list(executor.map(work, ['A', 'B', 'C', 'D']))
+    
     """
     
+    # attributes that are not serialized
+    _transient_ = ('parent', '_root', '_mutex')
+    
     def __init__(self, *args, content=None, **kwargs):
+        self._mutex = threading.RLock()
         super().__init__(*args, **kwargs)
         self._content = content if content is not None else []
         
@@ -35,7 +65,9 @@ class TexBase(LinkedDeepDict):
     
     def append(self, *args):
         """
-        Appends new content to the current section or item. 
+        Appends new content to the current section or item. Multiple items 
+        are appended in one step, without content from other threads 
+        appearing between them.
         
         Example
         -------
@@ -44,10 +76,46 @@ class TexBase(LinkedDeepDict):
         >>> doc['Section 1'].append('Some regular text')
         
         """
-        if len(args) > 0:
-            args = list(map(self._adopt_child_, args))
-        for a in args:
-            return self._content.append(a)
+        args = list(map(self._adopt_child_, args))
+        with self._mutex:
+            self._content.extend(args)
+    
+    def _child_(self, key):
+        # returns a child, creating it if it doesn't exist yet
+        with self._mutex:
+            if dict.__contains__(self, key):
+                return dict.__getitem__(self, key)
+            return super().__missing__(key)
+    
+    def __missing__(self, key):
+        if issequence(key):
+            child = self._child_(key[0])
+            return child if len(key) == 1 else child[key[1:]]
+        return self._child_(key)
+    
+    def __setitem__(self, key, value):
+        with self._mutex:
+            return super().__setitem__(key, value)
+    
+    def __delitem__(self, key):
+        with self._mutex:
+            return super().__delitem__(key)
+    
+    def __reduce__(self):
+        # links to the parent are restored when the object is attached
+        state = {k: v for k, v in self.__dict__.items() 
+                 if k not in self._transient_}
+        return _rebuild_, (self.__class__,), state, None, iter(dict.items(self))
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._mutex = threading.RLock()
+        # the children were attached before the state was restored 
+        for v in dict.values(self):
+            if isinstance(v, LinkedDeepDict):
+                v._root = None
+        for c in self._content:
+            self._adopt_child_(c)
     
     @abstractmethod
     def _append2doc_(self, doc, *args, **kwargs):
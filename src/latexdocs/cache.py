@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from pylatex.base_classes import LatexObject
+
+from .output import file_digest
+
+
+class FragmentCache:
+    """
+    An in-process LRU cache for the rendered TeX of document items, shared
+    across documents. Items take part by implementing a `_cache_key_` method,
+    that returns a hash of their state, or None if they can't be cached.
+    The least recently used fragments are evicted once the total size of
+    the cached fragments exceeds the limit.
+
+    Parameters
+    ----------
+    maxbytes : int, Optional
+        The maximum total size of the cached fragments in bytes.
+        Default is 64 MB.
+
+    Example
+    -------
+    >>> from latexdocs import Document, FragmentCache
+    >>> cache = FragmentCache(maxbytes=16 * 1024 * 1024)
+    >>> doc = Document(title='Title', author='Author', date=True)
+    >>> doc['Section 1'].append('Some regular text')
+    >>> doc.build(cache=cache)
+    >>> cache.hits, cache.misses
+
+    """
+
+    def __init__(self, maxbytes: int = 64 * 1024 * 1024, *args, **kwargs):
+        self.maxbytes = maxbytes
+        self.hits = 0
+        self.misses = 0
+        self._nbytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns the total size of the cached fragments in bytes.
+
+        """
+        return self._nbytes
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key):
+        """
+        Returns the cached TeX and packages of an item as a tuple, or None
+        if the key is not in the cache.
+
+        """
+        with self._lock:
+            entry = self._data.get(key, None)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[1]
+
+    def put(self, key, tex: str, packages: list) -> tuple:
+        """
+        Stores the rendered TeX and the packages of an item, and returns them
+        as a tuple. Fragments larger than the limit are not stored.
+
+        """
+        nbytes = sys.getsizeof(tex)
+        with self._lock:
+            if nbytes > self.maxbytes:
+                return tex, packages
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self._nbytes -= previous[2]
+            self._data[key] = (tex, packages, nbytes)
+            self._nbytes += nbytes
+            while self._nbytes > self.maxbytes:
+                _, (_, _, n) = self._data.popitem(last=False)
+                self._nbytes -= n
+        return tex, packages
+
+    def clear(self):
+        """
+        Removes all the cached fragments and resets the statistics.
+
+        """
+        with self._lock:
+            self._data.clear()
+            self._nbytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+_default_cache_ = FragmentCache()
+
+
+def default_cache() -> FragmentCache:
+    """
+    Returns the cache of the process, that is used if caching is turned on
+    with `cache=True`.
+
+    """
+    return _default_cache_
+
+
+def resolve_cache(cache):
+    """
+    Returns the cache to use: None, the default cache of the process if
+    `cache` is True, or the cache itself otherwise.
+
+    """
+    if cache is True:
+        return _default_cache_
+    if cache is None or cache is False:
+        return None
+    return cache
+
+
+# types that are hashed by their representation, which doesn't depend on
+# the identity of the objects
+_plain_types_ = (type(None), bool, int, float, complex)
+
+
+def _state_bytes_(part) -> bytes:
+    if isinstance(part, bytes):
+        return b'b' + part
+    if isinstance(part, str):
+        return b's' + part.encode('utf-8')
+    if isinstance(part, _plain_types_):
+        return repr((type(part).__name__, part)).encode('utf-8')
+    if isinstance(part, LatexObject):
+        return b'l' + (type(part).__name__ + ':' + part.dumps()).encode('utf-8')
+    if isinstance(part, (list, tuple)):
+        return b't' + state_hash(*part).encode('ascii')
+    if isinstance(part, dict):
+        return b'd' + state_hash(*(x for kv in part.items() for x in kv)).encode('ascii')
+    if hasattr(part, '__array__'):
+        array = np.asarray(part)
+        if array.dtype.hasobject:
+            data = state_hash(*array.ravel().tolist()).encode('ascii')
+        else:
+            data = array.tobytes()
+        return b'a' + repr((str(array.dtype), array.shape)).encode('utf-8') + data
+    raise TypeError("Can't hash the state of an instance of '{}'.".format(
+        type(part).__name__))
+
+
+def state_hash(*parts) -> str:
+    """
+    Returns a hash of the state of an item. Strings and bytes are hashed
+    as they are, numbers and None by their representation, LaTeX objects 
+    by their LaTeX source, arrays by their data type, shape and content, 
+    and lists, tuples and dictionaries by their items. A TypeError is 
+    raised for anything else, since the default representation of objects 
+    contains their address in memory, which says nothing about their state.
+
+    """
+    h = hashlib.sha256()
+    for part in parts:
+        data = _state_bytes_(part)
+        h.update(len(data).to_bytes(8, 'little'))
+        h.update(data)
+    return h.hexdigest()
+
+
+# the hashes of the files, with the sizes and the modification times
+_file_hashes_ = OrderedDict()
+_file_hashes_lock_ = threading.Lock()
+_file_hashes_maxsize_ = 4096
+
+
+def file_hash(path: str) -> str:
+    """
+    Returns the hash of a file, or None if it doesn't exist. The hash is
+    remembered as long as the size and the modification time of the file
+    don't change, for the most recently used files.
+
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    path = os.path.abspath(path)
+    version = (stat.st_size, stat.st_mtime_ns)
+    with _file_hashes_lock_:
+        entry = _file_hashes_.get(path, None)
+        if entry is not None and entry[0] == version:
+            _file_hashes_.move_to_end(path)
+            return entry[1]
+    # the file is read without holding the lock
+    entry = (version, file_digest(path))
+    with _file_hashes_lock_:
+        _file_hashes_[path] = entry
+        _file_hashes_.move_to_end(path)
+        while len(_file_hashes_) > _file_hashes_maxsize_:
+            _file_hashes_.popitem(last=False)
+    return entry[1]
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+from .spec import load_spec, from_spec, __spec__extensions__
+from .cache import FragmentCache
+from .pool import TexWorkerPool
+from .watch import Watcher
+
+
+def find_specs(paths: Iterable[str]) -> list:
+    """
+    Returns the spec files among the paths, looking into directories
+    (not recursively).
+
+    """
+    specs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if os.path.splitext(name)[1].lower() in __spec__extensions__:
+                    specs.append(os.path.join(path, name))
+        else:
+            specs.append(path)
+    return specs
+
+
+def _output_path_(path: str, spec: dict, outdir: str = None) -> str:
+    name = spec.get('output', os.path.splitext(os.path.basename(path))[0])
+    basedir = os.path.dirname(os.path.abspath(path)) if outdir is None else outdir
+    return os.path.abspath(os.path.join(basedir, name))
+
+
+def _parser_() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog='latexdocs',
+        description="Build documents from specs, or watch document scripts.")
+    commands = parser.add_subparsers(dest='command')
+    build = commands.add_parser(
+        'build', help="build documents from spec files or directories of specs")
+    build.add_argument('paths', nargs='+',
+                       help="spec files, or directories containing specs")
+    build.add_argument('-o', '--outdir', default=None,
+                       help="the output directory, default is next to the specs")
+    build.add_argument('-j', '--workers', type=int, default=os.cpu_count(),
+                       help="the number of concurrent builds")
+    build.add_argument('--tex-only', action='store_true',
+                       help="only write the tex files")
+    build.add_argument('--pool', action='store_true',
+                       help="compile with a pool of warm TeX workers")
+    build.add_argument('--compiler', default='pdflatex')
+    build.add_argument('--max-passes', type=int, default=5)
+    build.add_argument('--keep-aux', action='store_true',
+                       help="keep the auxiliary files of the compilations")
+    build.add_argument('--force', action='store_true',
+                       help="rebuild even if the outputs are up to date")
+    build.add_argument('-q', '--quiet', action='store_true')
+    watch = commands.add_parser(
+        'watch', help="rebuild the document of a script whenever it changes")
+    watch.add_argument('script', help="a Python script that creates a document")
+    watch.add_argument('-o', '--output', default=None,
+                       help="the path of the document without extension, "
+                       "default is the path of the script")
+    watch.add_argument('--interval', type=float, default=0.5,
+                       help="the time between checks for changes in seconds")
+    watch.add_argument('--paths', nargs='*', default=None,
+                       help="additional files to watch")
+    watch.add_argument('--full', action='store_true',
+                       help="typeset the whole document on every change")
+    watch.add_argument('--tex-only', action='store_true',
+                       help="only write the tex files")
+    watch.add_argument('--compiler', default='pdflatex')
+    watch.add_argument('--max-passes', type=int, default=5)
+    return parser
+
+
+def build(paths: Iterable[str], *args, outdir: str = None, workers: int = None,
+          tex_only: bool = False, pool: bool = False, compiler: str = 'pdflatex',
+          max_passes: int = 5, keep_aux: bool = False, force: bool = False,
+          quiet: bool = False, **kwargs) -> int:
+    """
+    Builds the documents of many spec files in one process and returns the
+    number of failures. The rendered items are shared between the documents
+    through a :class:`latexdocs.cache.FragmentCache`, and the documents whose
+    outputs are up to date are skipped, unless `force` is True.
+
+    Parameters
+    ----------
+    paths : Iterable[str]
+        Spec files, or directories containing spec files.
+
+    outdir : str, Optional
+        The output directory. Default is None, which means next to the specs.
+
+    workers : int, Optional
+        The number of concurrent builds. Default is None, which means the
+        number of CPUs.
+
+    tex_only : bool, Optional
+        If True, only the tex files are written. Default is False.
+
+    pool : bool, Optional
+        If True, the documents are compiled by a
+        :class:`latexdocs.pool.TexWorkerPool`, with the preamble of the first
+        document. Default is False.
+
+    See Also
+    --------
+    :func:`latexdocs.spec.from_spec`
+
+    """
+    specs = find_specs(paths)
+    workers = os.cpu_count() if workers is None else max(workers, 1)
+    if outdir is not None:
+        os.makedirs(outdir, exist_ok=True)
+    cache = FragmentCache()
+    texpool = None
+
+    def run(path: str) -> str:
+        t0 = time.perf_counter()
+        spec = load_spec(path)
+        doc = from_spec(spec, basedir=os.path.dirname(os.path.abspath(path)))
+        filepath = _output_path_(path, spec, outdir)
+        if tex_only:
+            report = doc.generate_tex(filepath, write_if_changed=not force,
+                                      cache=cache)
+            status = 'written' if report.changed else 'unchanged'
+            target = filepath + '.tex'
+        else:
+            result = doc.generate_pdf(filepath, compiler=compiler,
+                                      max_passes=max_passes, clean=not keep_aux,
+                                      write_if_changed=not force, pool=texpool,
+                                      cache=cache)
+            status = 'up to date' if result.runs == 0 else \
+                '{} passes'.format(result.runs)
+            target = filepath + '.pdf'
+        return "{} -> {} ({}, {:.2f} s)".format(path, target, status,
+                                                time.perf_counter() - t0)
+
+    failures = 0
+    try:
+        if pool and not tex_only and len(specs) > 0:
+            spec = load_spec(specs[0])
+            doc = from_spec(spec, basedir=os.path.dirname(os.path.abspath(specs[0])))
+            texpool = TexWorkerPool.from_document(doc, workers=workers,
+                                                  compiler=compiler,
+                                                  max_passes=max_passes)
+        with ThreadPoolExecutor(workers) as executor:
+            futures = [(path, executor.submit(run, path)) for path in specs]
+            for path, future in futures:
+                try:
+                    line = future.result()
+                except Exception as e:
+                    failures += 1
+                    print("{}: error: {}".format(path, e), file=sys.stderr)
+                else:
+                    if not quiet:
+                        print(line)
+    finally:
+        if texpool is not None:
+            texpool.close()
+    return failures
+
+
+def main(argv: Iterable[str] = None) -> int:
+    """
+    The entry point of the `latexdocs` command.
+
+    Example
+    -------
+    .. code-block:: bash
+
+        latexdocs build reports/ -o build -j 8
+        latexdocs watch report.py
+
+    """
+    parser = _parser_()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 2
+    options = vars(args)
+    command = options.pop('command')
+    if command == 'watch':
+        watcher = Watcher(args.script, args.output, interval=args.interval,
+                          paths=args.paths, partial=not args.full,
+                          compile=not args.tex_only, compiler=args.compiler,
+                          max_passes=args.max_passes)
+        watcher.watch()
+        return 0
+    return 1 if build(options.pop('paths'), **options) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
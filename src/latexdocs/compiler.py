@@ -0,0 +1,547 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import time
+import errno
+import shutil
+import tempfile
+import subprocess
+from typing import Iterable
+from contextlib import contextmanager
+
+from pylatex.errors import CompilerError
+
+from .utils import issequence
+from .output import file_digest
+
+
+__aux__extensions__ = ["aux", "log", "out", "fls", "fdb_latexmk"]
+
+__rerun__extensions__ = ["aux", "toc", "lof", "lot"]
+
+_draft_flags_ = {
+    'pdflatex': '-draftmode', 
+    'lualatex': '--draftmode', 
+    'xelatex': '-no-pdf',
+}
+
+_output_pattern_ = re.compile(
+    r"Output written on .+?\((\d+) pages?, (\d+) bytes\)", re.S)
+_memory_pattern_ = re.compile(r"^\s*(\d+) (.+?) out of (\d+)\s*$")
+_latexmk_run_pattern_ = re.compile(r"Run number \d+ of rule '")
+_warning_pattern_ = re.compile(r"^(LaTeX|Package \w+) Warning", re.M)
+# messages of LaTeX and the packages asking for another pass
+_rerun_pattern_ = re.compile(r"Rerun to get|Rerun LaTeX|Please rerun|"
+                             r"There were undefined (references|citations)")
+
+
+class CompileHook:
+    """
+    Base class for callbacks receiving metrics during compilation.
+    Override the methods you are interested in and pass an instance
+    to :func:`BaseTexDoc.generate_pdf`.
+
+    Example
+    -------
+    >>> from latexdocs import Document, CompileHook
+    >>> class PrintHook(CompileHook):
+    >>>     def on_compile_end(self, result):
+    >>>         print(result.to_dict())
+    >>> doc = Document(title='Title', author='Author', date=True)
+    >>> doc.generate_pdf('filename', hooks=[PrintHook()])
+
+    """
+
+    def on_pass_start(self, index: int, command: list):
+        """
+        Called before a pass of the compiler is started.
+
+        """
+        ...
+
+    def on_pass_end(self, metrics: 'PassMetrics'):
+        """
+        Called after a pass of the compiler has finished.
+
+        """
+        ...
+
+    def on_compile_end(self, result: 'CompileResult'):
+        """
+        Called after the compilation has finished.
+
+        """
+        ...
+
+
+class PassMetrics:
+    """
+    Metrics of a single run of the LaTeX compiler.
+
+    Parameters
+    ----------
+    index : int
+        The index of the pass, starting from 0.
+
+    command : list
+        The command that was executed.
+
+    duration : float
+        Wall time in seconds.
+
+    rerun : bool
+        True, if the auxiliary files changed during the pass, hence
+        another pass is needed.
+
+    draft : bool
+        True, if the pass ran in draft mode, without writing the pdf.
+
+    """
+
+    def __init__(self, index, command, duration, rerun=False, draft=False):
+        self.index = index
+        self.command = command
+        self.duration = duration
+        self.rerun = rerun
+        self.draft = draft
+
+    def to_dict(self) -> dict:
+        return {
+            'index': self.index,
+            'command': list(self.command),
+            'duration': self.duration,
+            'rerun': self.rerun,
+            'draft': self.draft,
+        }
+
+
+class CompileResult:
+    """
+    The outcome of a compilation, with metrics parsed from the log
+    of the last pass.
+
+    Parameters
+    ----------
+    filepath : str
+        The absolute path of the document, without extension.
+
+    compiler : str
+        The name of the compiler.
+
+    passes : list
+        A list of :class:`PassMetrics` instances.
+
+    runs : int, Optional
+        The number of compiler runs. Only different from the number of passes
+        if the compiler manages the reruns itself, like `latexmk`.
+        Default is None.
+
+    log : str, Optional
+        The content of the log file of the last pass. Default is None.
+
+    outputs : :class:`latexdocs.output.OutputReport`, Optional
+        The files written before the compilation. Default is None.
+
+    pdf_bytes : bytes, Optional
+        The content of the pdf, if it was requested to be returned
+        instead of being written to the filesystem. Default is None.
+
+    """
+
+    def __init__(self, filepath, compiler, passes, runs=None, log=None, outputs=None,
+                 pdf_bytes=None):
+        self.filepath = filepath
+        self.compiler = compiler
+        self.passes = passes
+        self.runs = len(passes) if runs is None else runs
+        self.outputs = outputs
+        self.pdf_bytes = pdf_bytes
+        info = parse_log(log) if log is not None else {}
+        self.pages = info.get('pages', None)
+        self.tex_memory = info.get('memory', {})
+        self.warnings = info.get('warnings', 0)
+        pdf = self.pdf_path
+        self.pdf_size = os.path.getsize(pdf) if os.path.exists(pdf) else None
+
+    @property
+    def pdf_path(self) -> str:
+        """
+        Returns the path of the generated pdf file.
+
+        """
+        return self.filepath + '.pdf'
+
+    @property
+    def tex_path(self) -> str:
+        """
+        Returns the path of the compiled tex file.
+
+        """
+        return self.filepath + '.tex'
+
+    @property
+    def duration(self) -> float:
+        """
+        Returns the total wall time of all passes in seconds.
+
+        """
+        return sum(p.duration for p in self.passes)
+
+    @property
+    def skipped(self) -> bool:
+        """
+        Returns `True` if the compilation was skipped, because the pdf 
+        was up to date.
+
+        """
+        return self.runs == 0
+
+    @property
+    def reruns(self) -> int:
+        """
+        Returns the number of reruns of the compiler.
+
+        """
+        return max(self.runs - 1, 0)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the metrics as a dictionary, ready to be serialized
+        or fed into a metrics pipeline.
+
+        """
+        return {
+            'filepath': self.filepath,
+            'compiler': self.compiler,
+            'duration': self.duration,
+            'runs': self.runs,
+            'reruns': self.reruns,
+            'passes': [p.to_dict() for p in self.passes],
+            'pages': self.pages,
+            'pdf_size': self.pdf_size,
+            'warnings': self.warnings,
+            'skipped': self.skipped,
+            'outputs': self.outputs.to_dict() if self.outputs is not None else None,
+            'tex_memory': {k: list(v) for k, v in self.tex_memory.items()},
+        }
+
+
+def parse_log(log: str) -> dict:
+    """
+    Parses the log of a LaTeX run and returns the number of pages and bytes
+    written, the number of warnings and the memory statistics of TeX.
+
+    Parameters
+    ----------
+    log : str
+        The content of a log file.
+
+    Returns
+    -------
+    dict
+        A dictionary with keys 'pages', 'nbytes', 'warnings' and 'memory'. The
+        memory statistics are stored as `(used, capacity)` pairs.
+
+    """
+    res = {'warnings': len(_warning_pattern_.findall(log))}
+    match = _output_pattern_.search(log)
+    if match is not None:
+        res['pages'] = int(match.group(1))
+        res['nbytes'] = int(match.group(2))
+    memory = {}
+    if "Here is how much of TeX's memory you used:" in log:
+        block = log.split("Here is how much of TeX's memory you used:")[-1]
+        for line in block.splitlines()[1:]:
+            match = _memory_pattern_.match(line)
+            if match is None:
+                if 'out of' in line:
+                    continue
+                break
+            used, name, capacity = match.groups()
+            memory[name] = (int(used), int(capacity))
+    res['memory'] = memory
+    return res
+
+
+def snapshot(filepath: str, extensions: Iterable = None) -> dict:
+    """
+    Returns the hashes of the auxiliary files of a document, that decide
+    whether another pass of the compiler is necessary.
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the document, without extension.
+
+    extensions : Iterable, Optional
+        The extensions of the files to consider. Default is None, which means
+        'aux', 'toc', 'lof' and 'lot' files.
+
+    """
+    extensions = __rerun__extensions__ if extensions is None else extensions
+    return {ext: file_digest(filepath + '.' + ext) for ext in extensions}
+
+
+def needs_rerun(before: dict, after: dict, log: str = None) -> bool:
+    """
+    Returns `True` if another pass of the compiler is necessary, based on 
+    the snapshots of the auxiliary files before and after a pass (see 
+    :func:`snapshot`) and the log of the pass. 
+    
+    The aux file is written by every pass, hence if the pass created it, 
+    there was nothing to compare it to. In that case, it only counts as 
+    a change if the log asks for a rerun, otherwise a document without
+    references would always take two passes.
+
+    """
+    if after == before:
+        return False
+    if before.get('aux', None) is None and after.get('aux', None) is not None:
+        if any(after[k] != before.get(k, None) for k in after if k != 'aux'):
+            return True
+        return log is None or _rerun_pattern_.search(log) is not None
+    return True
+
+
+def _scratch_root_():
+    # prefer a RAM-backed filesystem if there is one
+    shm = '/dev/shm'
+    if os.path.isdir(shm) and os.access(shm, os.W_OK):
+        return shm
+    return None
+
+
+@contextmanager
+def scratch_dir(root: str = None):
+    """
+    Context manager for a temporary directory to compile in. By default, the
+    directory is created on a RAM-backed filesystem (`/dev/shm`) if available,
+    otherwise in the default temporary directory of the system. The directory
+    and everything in it is removed on exit.
+
+    Parameters
+    ----------
+    root : str, Optional
+        The directory to create the scratch directory in. Default is None.
+
+    Example
+    -------
+    >>> from latexdocs.compiler import scratch_dir
+    >>> with scratch_dir() as path:
+    >>>     ...
+
+    """
+    root = _scratch_root_() if root is None else root
+    path = tempfile.mkdtemp(prefix='latexdocs-', dir=root)
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def source_date_epoch(value=True) -> int:
+    """
+    Returns the time to pin the dates of reproducible builds to, in seconds
+    since the Unix epoch. An integer is returned as it is, otherwise the 
+    value of the `SOURCE_DATE_EPOCH` environment variable is used, or 0 if
+    it is not set.
+
+    """
+    if value is True:
+        return int(os.environ.get('SOURCE_DATE_EPOCH', 0))
+    return int(value)
+
+
+def reproducible_env(epoch: int, env: dict = None) -> dict:
+    """
+    Returns an environment for the compiler, in which the dates embedded in 
+    the pdf are pinned to a time given in seconds since the Unix epoch, 
+    by setting `SOURCE_DATE_EPOCH` and `FORCE_SOURCE_DATE`.
+
+    Parameters
+    ----------
+    epoch : int
+        The time in seconds since the Unix epoch.
+
+    env : dict, Optional
+        The environment to start from. Default is None, which means the
+        environment of the current process.
+
+    """
+    env = dict(os.environ if env is None else env)
+    env['SOURCE_DATE_EPOCH'] = str(int(epoch))
+    env['FORCE_SOURCE_DATE'] = '1'
+    return env
+
+
+def _copy_files_(source: str, target: str, extensions: Iterable):
+    for ext in extensions:
+        path = source + '.' + ext
+        if os.path.isfile(path):
+            shutil.copyfile(path, target + '.' + ext)
+
+
+def _read_log_(filepath: str):
+    try:
+        with open(filepath + '.log', 'rb') as f:
+            return f.read().decode('utf-8', errors='replace')
+    except (OSError, IOError):
+        return None
+
+
+def _notify_(hooks, event, *args):
+    for hook in hooks:
+        getattr(hook, event)(*args)
+
+
+def compile_tex(filepath: str, *args, compiler='pdflatex', compiler_args=None,
+                max_passes: int = 5, silent: bool = True, hooks: Iterable = None,
+                env: dict = None, draftmode: bool = True, outdir: str = None,
+                **kwargs) -> CompileResult:
+    """
+    Compiles an existing tex file and returns the metrics of the compilation.
+
+    Unless the compiler handles reruns itself (like `latexmk`), the hashes
+    of the auxiliary files (.aux, .toc, .lof, .lot) are compared after every
+    pass, and the compiler is rerun until they reach a fixed point, or the 
+    maximum number of passes is reached. See :func:`needs_rerun` for the 
+    details. Most documents settle after one or two passes, so these always
+    write the pdf. In draft mode, the passes after them are intermediate
+    passes that don't write the pdf, and the final one does.
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the document, without extension.
+
+    compiler : str or Iterable, Optional
+        The compiler to use. If it is None, `latexmk` is tried first
+        and `pdflatex` second. A sequence is interpreted as the beginning
+        of a command line. Default is 'pdflatex'.
+
+    compiler_args : list, Optional
+        Extra arguments passed to the compiler. Default is None.
+
+    max_passes : int, Optional
+        The maximum number of passes, if the compiler does not handle
+        reruns itself. It must be positive. Default is 5.
+
+    silent : bool, Optional
+        If False, the output of the compiler is printed. Default is True.
+
+    hooks : Iterable, Optional
+        A list of :class:`CompileHook` instances. Default is None.
+
+    env : dict, Optional
+        Environment variables for the compiler process. Default is None.
+
+    draftmode : bool, Optional
+        If True, intermediate passes run in draft mode. Only supported by
+        `pdflatex`, `lualatex` and `xelatex`. Default is True.
+
+    Returns
+    -------
+    :class:`CompileResult`
+
+    """
+    if max_passes <= 0:
+        raise ValueError("The number of passes must be positive.")
+    filepath = os.path.abspath(filepath)
+    dest_dir = os.path.dirname(filepath)
+    compiler_args = [] if compiler_args is None else list(compiler_args)
+    hooks = [] if hooks is None else list(hooks)
+    if compiler is None:
+        compilers = ((["latexmk"], ["--pdf"]), (["pdflatex"], []))
+    elif issequence(compiler):
+        compilers = ((list(compiler), []),)
+    else:
+        compilers = (([compiler], []),)
+    main_arguments = ["--interaction=nonstopmode", filepath + ".tex"]
+    outbase = filepath
+    if outdir is not None:
+        outdir = os.path.abspath(outdir)
+        outbase = os.path.join(outdir, os.path.basename(filepath))
+
+    for command, arguments in compilers:
+        name = os.path.basename(command[-1])
+        nprefix = len(command)
+        selfrerun = name.startswith('latexmk')
+        if outdir is not None:
+            flag = "-outdir=" if selfrerun else "-output-directory="
+            arguments = arguments + [flag + outdir]
+        command = command + arguments + compiler_args + main_arguments
+        passes = []
+        output = b''
+        draftflag = _draft_flags_.get(os.path.splitext(name)[0], None)
+        draft = draftmode and draftflag is not None and not selfrerun
+        try:
+            before = snapshot(outbase)
+            stable = False
+            for i in range(1 if selfrerun else max_passes):
+                # the first two passes are likely to be the last one, 
+                # intermediate passes don't need to write the pdf
+                settled = stable
+                final = settled or not draft or i == max_passes - 1 or i < 2
+                cmd = command if final else \
+                    command[:nprefix] + [draftflag] + command[nprefix:]
+                _notify_(hooks, 'on_pass_start', i, cmd)
+                t0 = time.perf_counter()
+                output = subprocess.check_output(
+                    cmd, stderr=subprocess.STDOUT, cwd=dest_dir, env=env)
+                duration = time.perf_counter() - t0
+                if not silent:
+                    print(output.decode())
+                after = snapshot(outbase)
+                # the log only matters if the pass created the aux file
+                log = _read_log_(outbase) if before['aux'] is None else None
+                stable = not needs_rerun(before, after, log)
+                before = after
+                metrics = PassMetrics(i, cmd, duration, not stable, not final)
+                passes.append(metrics)
+                _notify_(hooks, 'on_pass_end', metrics)
+                if final and (stable or settled or i == max_passes - 1):
+                    break
+        except (OSError, IOError) as e:
+            if e.errno == errno.ENOENT:
+                # If compiler does not exist, try next in the list
+                continue
+            raise
+        except subprocess.CalledProcessError as e:
+            print(e.output.decode())
+            raise
+        runs = None
+        if selfrerun:
+            runs = max(len(_latexmk_run_pattern_.findall(output.decode())), 1)
+        result = CompileResult(outbase, name, passes, runs=runs,
+                               log=_read_log_(outbase))
+        _notify_(hooks, 'on_compile_end', result)
+        return result
+
+    raise CompilerError(
+        "No LaTex compiler was found\n"
+        "Either specify a LaTex compiler "
+        "or make sure you have latexmk or pdfLaTex installed."
+    )
+
+
+def clean_aux(filepath: str, extensions: Iterable = None):
+    """
+    Removes the auxiliary files of a compilation.
+
+    Parameters
+    ----------
+    filepath : str
+        The path of the document, without extension.
+
+    extensions : Iterable, Optional
+        The extensions of the files to remove. Default is None, which
+        removes 'aux', 'log', 'out', 'fls' and 'fdb_latexmk' files.
+
+    """
+    extensions = __aux__extensions__ if extensions is None else extensions
+    for ext in extensions:
+        try:
+            os.remove(filepath + "." + ext)
+        except (OSError, IOError) as e:
+            if e.errno != errno.ENOENT:
+                raise
@@ -1,10 +1,30 @@
 # -*- coding: utf-8 -*-
+import io
+import os
+import time
+import shutil
+import inspect
+from itertools import chain
+from typing import Iterable
 import pylatex as pltx
+from pylatex.base_classes.containers import Fragment
+from pylatex.utils import dumps_list
 from abc import abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 
 from .base import TexBase
-from .preamble import append_packages, append_cover
+from .preamble import (append_packages, append_cover, packages_of, resolve_packages,
+                       append_reproducible, format_date, _TrailerID)
 from .utils import section
+from .compiler import (compile_tex, clean_aux, scratch_dir, _copy_files_, 
+                       __aux__extensions__, __rerun__extensions__, CompileResult,
+                       source_date_epoch, reproducible_env)
+from .output import OutputReport, write_file, write_chunks
+from .spill import SpillBuffer
+from .preview import get_renderer
+from .lazy import Lazy, evaluate_all
+from .cache import resolve_cache
+from . import serialization
 
 
 _default_geometry_options_ = {
@@ -14,6 +34,71 @@ _default_geometry_options_ = {
 }
 
 
+def _append_item_(doc, item, level, cache=None):
+    if hasattr(item, '_append2doc_'):
+        key = None
+        if cache is not None and hasattr(item, '_cache_key_'):
+            key = item._cache_key_()
+        if key is None:
+            return item._append2doc_(doc, level=level, nosection=True)
+        entry = cache.get(key)
+        if entry is None:
+            fragment = item._append2doc_(Fragment(), level=level, nosection=True)
+            fragment._propagate_packages()
+            entry = cache.put(key, fragment.dumps(), list(fragment.packages))
+        tex, packages = entry
+        if len(tex) > 0:
+            doc.append(pltx.NoEscape(tex))
+        for p in packages:
+            doc.packages.add(p)
+        return doc
+    doc.append(item)
+    return doc
+
+
+_body_marker_ = 'LTXDOCSBODYMARKER'
+
+# the options of `BaseTexDoc.build`
+_build_options_ = ('profiler', 'lazy_workers', 'lazy_executor', 'processes', 'cache')
+
+# the default path of the documents of PyLaTeX, without extension
+_default_filepath_ = inspect.signature(pltx.Document).parameters['default_filepath'].default
+
+_section_counters_ = {1: 'section', 2: 'subsection', 3: 'subsubsection'}
+
+
+def _render_fragment_(node, level):
+    # renders a subtree into a TeX fragment, along with the packages it needs
+    t0 = time.perf_counter()
+    container = node.build(_doc=Fragment(), _level=level)
+    container._propagate_packages()
+    tex = container.dumps()
+    return tex, list(container.packages), time.perf_counter() - t0
+
+
+class _Document(pltx.Document):
+    # Renders the body before the preamble, so that the preamble can 
+    # depend on it, like the trailer ID of reproducible builds.
+
+    def dumps_body(self) -> str:
+        return super(pltx.Document, self).dumps()
+
+    def dumps(self, body: str = None, chunks: Iterable = None) -> str:
+        body = self.dumps_body() if body is None else body
+        trailers = [c for c in self.preamble if isinstance(c, _TrailerID)]
+        for c in trailers:
+            c.set_body([body] if chunks is None else chunks)
+        try:
+            head = self.documentclass.dumps() + "%\n"
+            head += self.dumps_packages() + "%\n"
+            head += dumps_list(self.variables) + "%\n"
+            head += dumps_list(self.preamble) + "%\n"
+        finally:
+            for c in trailers:
+                c.set_body(None)
+        return head + "%\n" + body
+
+
 class BaseTexDoc(TexBase):
     """
     Base class for all document types.
@@ -22,7 +107,8 @@ class BaseTexDoc(TexBase):
     documentclass = None
 
     def __init__(self, *args, geometry_options=None, title=None, author=None,
-                 date=False, doc=None, content=None, **kwargs):
+                 date=False, doc=None, content=None, extra_packages=None, 
+                 reproducible=False, **kwargs):
         super().__init__(*args, **kwargs)
         isroot = self.is_root()
         if title is not None:
@@ -38,6 +124,9 @@ class BaseTexDoc(TexBase):
             geometry_options = _default_geometry_options_
         self._geometry_options = geometry_options
         self._preamble = [] if isroot else None
+        self._sidecars = {} if isroot else None
+        self._extra_packages = extra_packages if isroot else None
+        self._reproducible = reproducible if isroot else False
         self._doc = doc
 
     @property
@@ -64,6 +153,38 @@ class BaseTexDoc(TexBase):
         """
         return self.root()._preamble
 
+    @property
+    def sidecars(self) -> dict:
+        """
+        Returns the files written alongside the tex file, as a dictionary 
+        mapping paths relative to the tex file to their content.
+
+        """
+        return self.root()._sidecars
+
+    def add_sidecar(self, filename: str, content):
+        """
+        Registers a file to be written alongside the tex file, like data files
+        or externalized figures. 
+
+        Parameters
+        ----------
+        filename : str
+            The path of the file, relative to the tex file.
+
+        content : str or bytes
+            The content of the file.
+
+        """
+        self.sidecars[filename] = content
+
+    def _epoch_(self):
+        # the time to pin the dates to in reproducible mode, or None
+        reproducible = self.root()._reproducible
+        if reproducible is None or reproducible is False:
+            return None
+        return source_date_epoch(reproducible)
+
     @abstractmethod
     def init_doc(self, **kwargs) -> pltx.Document:
         """
@@ -88,27 +209,96 @@ class BaseTexDoc(TexBase):
     def has_children(self):
         return any(map(lambda v: isinstance(v, BaseTexDoc), self.values()))
 
-    def _append2doc_(self, doc, *args, level=None, nosection=False, **kwargs):
+    def _append2doc_(self, doc, *args, level=None, nosection=False, 
+                     profiler=None, cache=None, **kwargs):
         level = level if level is not None else self.depth
         if self.is_nested(_level=level) and not nosection:
             with doc.create(section(self.key, level=level)):
-                for c in self.content:
-                    if hasattr(c, '_append2doc_'):
-                        doc = c._append2doc_(doc, level=level, nosection=True)
-                    else:
-                        doc.append(c)
+                doc = self._append_content_(doc, level, profiler, cache)
         else:
+            doc = self._append_content_(doc, level, profiler, cache)
+        return doc
+
+    def _append_content_(self, doc, level, profiler=None, cache=None):
+        if profiler is None:
             for c in self.content:
-                if hasattr(c, '_append2doc_'):
-                    doc = c._append2doc_(doc, level=level, nosection=True)
-                else:
-                    doc.append(c)
+                doc = _append_item_(doc, c, level, cache)
+        else:
+            address = tuple(self.address)
+            for i, c in enumerate(self.content):
+                path = address + ("{}[{}]".format(type(c).__name__, i),)
+                with profiler.record(path, doc, kind='item'):
+                    doc = _append_item_(doc, c, level, cache)
         return doc
 
-    def build(self, *args, **kwargs) -> pltx.Document:
+    def required_packages(self) -> set:
+        """
+        Returns the names of the LaTeX packages required by the content of
+        the current section and its subsections.
+
+        """
+        nodes = [self] + list(self.containers(dtype=BaseTexDoc))
+        packages = set()
+        for n in nodes:
+            for c in n.content:
+                packages |= packages_of(c)
+        if self.is_root():
+            for c in self.preamble:
+                packages |= packages_of(c)
+        return packages
+
+    def lazy_items(self) -> list:
+        """
+        Returns all the :class:`latexdocs.lazy.Lazy` items of the current 
+        section and its subsections.
+
+        """
+        nodes = [self] + list(self.containers(dtype=BaseTexDoc))
+        return [c for n in nodes for c in n.content if isinstance(c, Lazy)]
+
+    def input_files(self) -> list:
+        """
+        Returns the paths of the files included by the items of the current 
+        section and its subsections, like images.
+
+        """
+        nodes = [self] + list(self.containers(dtype=BaseTexDoc))
+        return [f for n in nodes for c in n.content 
+                if hasattr(c, 'input_files') for f in c.input_files()]
+
+    def build(self, *args, profiler=None, lazy_workers=None, lazy_executor='thread',
+              processes=None, cache=None, **kwargs) -> pltx.Document:
         """
         Builds and returns an instance of :class:`pylatex.document.Document`.
 
+        Parameters
+        ----------
+        profiler : :class:`latexdocs.profiling.BuildProfiler`, Optional
+            If provided, wall time, emitted bytes and allocations are recorded
+            for every node and item of the document. Default is None.
+
+        lazy_workers : int, Optional
+            If provided, :class:`latexdocs.lazy.Lazy` items are evaluated 
+            concurrently before emission, using this many workers. Otherwise
+            they are evaluated one by one as they are emitted. Default is None.
+
+        lazy_executor : str or :class:`concurrent.futures.Executor`, Optional
+            The pool to evaluate lazy items with, if `lazy_workers` is provided.
+            It can be 'thread', 'process' or an executor instance. 
+            Default is 'thread'.
+
+        processes : int or bool, Optional
+            If provided, the top-level sections are rendered to TeX fragments
+            in a pool of this many processes, and the fragments are merged in 
+            document order. If True, the number of processes equals the number
+            of CPUs. The nodes must be picklable. Default is None.
+
+        cache : :class:`latexdocs.cache.FragmentCache` or bool, Optional
+            If provided, the rendered TeX of cacheable items, like tables and
+            images, is looked up in and stored to the cache, which can be 
+            shared across documents. If True, the default cache of the process 
+            is used. The cache is not used in parallel builds. Default is None.
+
         Example
         -------
         >>> from latexdocs import Document
@@ -121,47 +311,673 @@ class BaseTexDoc(TexBase):
         level = kwargs.get('_level', None)
         if doc is None:
             assert self.is_root()
+            cache = resolve_cache(cache)
+            if lazy_workers is not None:
+                evaluate_all(self.lazy_items(), workers=lazy_workers, 
+                             executor=lazy_executor)
+            if profiler is not None:
+                with profiler.running():
+                    with profiler.record((), kind='init'):
+                        doc = self.init_doc()
+                    if processes:
+                        return self._build_parallel_(doc, processes, profiler)
+                    return self.build(_doc=doc, _level=0, profiler=profiler, 
+                                      cache=cache)
             doc = self.init_doc()
-            return self.build(_doc=doc, _level=0)
+            if processes:
+                return self._build_parallel_(doc, processes)
+            return self.build(_doc=doc, _level=0, cache=cache)
         else:
             assert isinstance(level, int)
-            if level == 0:
-                doc = self._append2doc_(doc, level=level, nosection=True)
+            nosection = level == 0
+            if profiler is None:
+                doc = self._append2doc_(doc, level=level, nosection=nosection, 
+                                        cache=cache)
             else:
-                doc = self._append2doc_(doc, level=level)
+                with profiler.record(self.address, doc, kind='node'):
+                    doc = self._append2doc_(doc, level=level, nosection=nosection,
+                                            profiler=profiler, cache=cache)
             for v in self.values():
                 if isinstance(v, BaseTexDoc):
-                    v.build(_doc=doc, _level=level+1)
+                    v.build(_doc=doc, _level=level+1, profiler=profiler, cache=cache)
+            return doc
+
+    def build_subtree(self, path, *args, profiler=None, lazy_workers=None, 
+                      lazy_executor='thread', cache=None, **kwargs) -> pltx.Document:
+        """
+        Builds a document with the preamble and the cover of the root, but
+        only a single subtree of the content. The sections keep their levels,
+        and they are numbered as in the whole document.
+
+        Parameters
+        ----------
+        path : str or Iterable
+            The keys of the node in the document tree.
+
+        profiler : :class:`latexdocs.profiling.BuildProfiler`, Optional
+            See :func:`build`. Default is None.
+
+        lazy_workers : int, Optional
+            See :func:`build`. Default is None.
+
+        lazy_executor : str or :class:`concurrent.futures.Executor`, Optional
+            See :func:`build`. Default is 'thread'.
+
+        cache : :class:`latexdocs.cache.FragmentCache` or bool, Optional
+            See :func:`build`. Default is None.
+
+        Example
+        -------
+        >>> from latexdocs import Document
+        >>> doc = Document(title='Title', author='Author', date=True)
+        >>> doc['Chapter 1', 'Results'].append('Some regular text')
+        >>> doc['Chapter 2', 'Results'].append('Some regular text')
+        >>> doc.build_subtree(('Chapter 2', 'Results'))
+
+        """
+        assert self.is_root()
+        path = (path,) if isinstance(path, str) else tuple(path)
+        assert len(path) > 0, "The path must not be empty."
+        node, counters = self, []
+        for level, key in enumerate(path, 1):
+            # don't create the missing nodes
+            if key not in node or not isinstance(node[key], BaseTexDoc):
+                raise KeyError("There is no section at {}.".format(path[:level]))
+            count = 0
+            for k, v in node.items():
+                if k == key:
+                    break
+                if isinstance(v, BaseTexDoc) and v.is_nested(_level=level):
+                    count += 1
+            counters.append(count + 1 if level < len(path) else count)
+            node = node[key]
+        if lazy_workers is not None:
+            evaluate_all(node.lazy_items(), workers=lazy_workers, 
+                         executor=lazy_executor)
+        doc = self.init_doc()
+        for level, count in enumerate(counters, 1):
+            if level in _section_counters_:
+                doc.append(pltx.Command('setcounter', 
+                                        arguments=[_section_counters_[level], count]))
+        cache = resolve_cache(cache)
+        if profiler is None:
+            return node.build(_doc=doc, _level=len(path), cache=cache)
+        with profiler.running():
+            return node.build(_doc=doc, _level=len(path), profiler=profiler, 
+                              cache=cache)
+
+    def build_stream(self, buffer, *args, profiler=None, lazy_workers=None, 
+                     lazy_executor='thread', cache=None, **kwargs) -> pltx.Document:
+        """
+        Builds the document node by node, writing the rendered body into
+        a buffer, and returns an instance of :class:`pylatex.document.Document` 
+        with the preamble and without the body. Only the content of a single 
+        node is held in memory at a time.
+
+        Parameters
+        ----------
+        buffer : file-like
+            An object with a `write` method accepting strings, like
+            a :class:`latexdocs.spill.SpillBuffer` or an :class:`io.StringIO`.
+
+        profiler : :class:`latexdocs.profiling.BuildProfiler`, Optional
+            See :func:`build`. Default is None.
+
+        lazy_workers : int, Optional
+            See :func:`build`. Default is None.
+
+        lazy_executor : str or :class:`concurrent.futures.Executor`, Optional
+            See :func:`build`. Default is 'thread'.
+
+        cache : :class:`latexdocs.cache.FragmentCache` or bool, Optional
+            See :func:`build`. Default is None.
+
+        Example
+        -------
+        >>> import io
+        >>> from latexdocs import Document
+        >>> doc = Document(title='Title', author='Author', date=True)
+        >>> doc['Section 1'].append('Some regular text')
+        >>> buffer = io.StringIO()
+        >>> head = doc.build_stream(buffer)
+
+        """
+        assert self.is_root()
+        if lazy_workers is not None:
+            evaluate_all(self.lazy_items(), workers=lazy_workers, 
+                         executor=lazy_executor)
+        cache = resolve_cache(cache)
+        if profiler is None:
+            doc = self.init_doc()
+            self._stream_(buffer, doc, cache=cache)
             return doc
+        with profiler.running():
+            with profiler.record((), kind='init'):
+                doc = self.init_doc()
+            self._stream_(buffer, doc, profiler, cache)
+        return doc
+
+    def _stream_(self, buffer, doc, profiler=None, cache=None):
+        empty = True
+        stack = [(self, 0)]
+        while len(stack) > 0:
+            node, level = stack.pop()
+            fragment = Fragment()
+            nosection = level == 0
+            if profiler is None:
+                node._append2doc_(fragment, level=level, nosection=nosection, 
+                                  cache=cache)
+            else:
+                with profiler.record(node.address, fragment, kind='node'):
+                    node._append2doc_(fragment, level=level, nosection=nosection,
+                                      profiler=profiler, cache=cache)
+            if len(fragment.data) > 0:
+                fragment._propagate_packages()
+                for p in fragment.packages:
+                    doc.packages.add(p)
+                # the same separator the container would put between items
+                if not empty:
+                    buffer.write('%\n')
+                buffer.write(fragment.dumps())
+                empty = False
+            children = [v for v in node.values() if isinstance(v, BaseTexDoc)]
+            stack.extend((child, level + 1) for child in reversed(children))
+
+    def _append2preview_(self, renderer, *args, level=None, **kwargs):
+        level = level if level is not None else self.depth
+        if level > 0 and self.is_nested(_level=level):
+            renderer.heading(self.key, level)
+        for c in self.content:
+            renderer.append(c)
 
-    def generate_pdf(self, *args, clean_tex=False, compiler='pdflatex', **kwargs):
+    def preview(self, fmt: str = 'html', filepath: str = None, *args, 
+                lazy_workers=None, lazy_executor='thread', **kwargs) -> str:
+        """
+        Renders the current section and its subsections in HTML or Markdown, 
+        for a quick preview without a TeX installation. Tables and images 
+        are rendered natively, math is left for MathJax to render, and the 
+        rest is shown as LaTeX source.
+
+        Parameters
+        ----------
+        fmt : str, Optional
+            The format of the preview, 'html' or 'markdown'. Default is 'html'.
+
+        filepath : str, Optional
+            The path of the file to write, without extension. Default is None.
+
+        lazy_workers : int, Optional
+            See :func:`build`. Default is None.
+
+        lazy_executor : str or :class:`concurrent.futures.Executor`, Optional
+            See :func:`build`. Default is 'thread'.
+
+        kwargs : tuple, Optional
+            Extra kyeword arguments are forwarded to the renderer, like
+            `mathjax=False` for HTML.
+
+        Returns
+        -------
+        str
+            The preview.
+
+        Example
+        -------
+        >>> from latexdocs import Document
+        >>> doc = Document(title='Title', author='Author', date=True)
+        >>> doc['Section 1'].append('Some regular text')
+        >>> html = doc.preview('html')
+
+        See Also
+        --------
+        :class:`latexdocs.preview.HTMLRenderer`
+        :class:`latexdocs.preview.MarkdownRenderer`
+
+        """
+        renderer = get_renderer(fmt, **kwargs)
+        if lazy_workers is not None:
+            evaluate_all(self.lazy_items(), workers=lazy_workers, 
+                         executor=lazy_executor)
+        stack = [(self, self.depth)]
+        while len(stack) > 0:
+            node, level = stack.pop()
+            node._append2preview_(renderer, level=level)
+            children = [v for v in node.values() if isinstance(v, BaseTexDoc)]
+            stack.extend((child, level + 1) for child in reversed(children))
+        if self.is_root():
+            content = renderer.document(self._title, self._author)
+        else:
+            content = renderer.document()
+        if filepath is not None:
+            write_file(filepath + '.' + renderer.extension, content)
+        return content
+
+    def dumpb(self, path: str = None, **kwargs):
+        """
+        Serializes the document in a compact binary format. Numerical arrays
+        (like the data of tables) are stored out-of-band, so that they can be 
+        memory-mapped when the document is loaded.
+
+        Parameters
+        ----------
+        path : str, Optional
+            The path of the output file. If not provided, the serialized data
+            is returned as bytes. Default is None.
+
+        Example
+        -------
+        >>> from latexdocs import Document
+        >>> doc = Document(title='Title', author='Author', date=True)
+        >>> doc['Section 1'].append('Some regular text')
+        >>> doc.dumpb('document.ltxd')
+        >>> doc = Document.loadb('document.ltxd')
+
+        See Also
+        --------
+        :func:`latexdocs.serialization.dumpb`
+
+        """
+        assert self.is_root(), "Only the root object can be serialized!"
+        return serialization.dumpb(self, path, **kwargs)
+
+    @classmethod
+    def loadb(cls, source, *args, mmap: bool = True, **kwargs) -> 'BaseTexDoc':
+        """
+        Loads a document serialized with :func:`dumpb`. Arrays are returned
+        as read-only views of the source.
+
+        Parameters
+        ----------
+        source : str or bytes
+            A path to a file or the serialized data.
+
+        mmap : bool, Optional
+            If True and the source is a file, it gets memory-mapped, 
+            otherwise it is read into memory. Default is True.
+
+        Warnings
+        --------
+        Loading untrusted data can execute arbitrary code, see 
+        :func:`latexdocs.serialization.loadb`.
+
+        See Also
+        --------
+        :func:`latexdocs.serialization.loadb`
+
+        """
+        doc = serialization.loadb(source, mmap=mmap)
+        assert isinstance(doc, cls), \
+            "Expected an instance of {}, got {}".format(cls.__name__, type(doc).__name__)
+        return doc
+
+    def _build_parallel_(self, doc, processes, profiler=None) -> pltx.Document:
+        processes = os.cpu_count() if processes is True else processes
+        if profiler is None:
+            doc = self._append2doc_(doc, level=0, nosection=True)
+        else:
+            with profiler.record(self.address, doc, kind='node'):
+                doc = self._append2doc_(doc, level=0, nosection=True, 
+                                        profiler=profiler)
+        children = [v for v in self.values() if isinstance(v, BaseTexDoc)]
+        if len(children) == 0:
+            return doc
+        chunksize = max(1, len(children) // (4 * processes))
+        with ProcessPoolExecutor(processes) as pool:
+            fragments = pool.map(_render_fragment_, children, 
+                                 [1] * len(children), chunksize=chunksize)
+            for child, (tex, packages, duration) in zip(children, fragments):
+                # sections are numbered by LaTeX, hence the order of the 
+                # fragments is all that matters
+                doc.append(pltx.NoEscape(tex))
+                for p in packages:
+                    doc.packages.add(p)
+                if profiler is not None:
+                    profiler.add(child.address, 'fragment', duration, 
+                                 len(tex.encode('utf-8')))
+        return doc
+
+    def generate_tex(self, filepath=None, *args, write_if_changed=False, 
+                     memory_budget=None, _doc=None, **kwargs) -> OutputReport:
+        """
+        Builds the document and writes the tex file and the sidecar files.
+
+        Parameters
+        ----------
+        filepath : str, Optional
+            The path of the file, without extension. Default is None, which
+            means the default filepath of PyLaTeX.
+
+        write_if_changed : bool, Optional
+            If True, only those files are written whose content has changed,
+            leaving the modification times of the rest untouched. 
+            Default is False.
+
+        memory_budget : int, Optional
+            If provided, the document is built with :func:`build_stream`, 
+            the rendered body is kept in memory up to this many bytes and 
+            spilled to a temporary file beyond that, and the tex file is 
+            written chunk by chunk. This keeps the memory usage bounded for
+            very large documents. Default is None.
+
+        kwargs : tuple, Optional
+            Extra kyeword arguments are forwarded to :func:`build`.
+
+        Returns
+        -------
+        :class:`latexdocs.output.OutputReport`
+            The list of updated and unchanged files.
+
+        """
+        report = OutputReport()
+        if _doc is None and memory_budget is not None:
+            with SpillBuffer(memory_budget) as buffer:
+                doc = self.build_stream(buffer, **kwargs)
+                filepath = doc.default_filepath if filepath is None else filepath
+                filepath = os.path.abspath(filepath)
+                # the preamble is only known after the body is rendered
+                if buffer.nbytes > 0:
+                    doc.append(pltx.NoEscape(_body_marker_))
+                    body = doc.dumps_body()
+                    pre, post = body.split(_body_marker_, 1)
+                    tex = doc.dumps(body, chain([pre], buffer.chunks(), [post]))
+                    head, tail = tex.split(_body_marker_, 1)
+                    doc.data.pop()
+                    chunks = chain([head], buffer.chunks(), [tail])
+                else:
+                    chunks = [doc.dumps()]
+                write_chunks(filepath + '.tex', chunks, 
+                             only_if_changed=write_if_changed, report=report)
+        else:
+            doc = self.build(**kwargs) if _doc is None else _doc
+            filepath = doc.default_filepath if filepath is None else filepath
+            filepath = os.path.abspath(filepath)
+            write_file(filepath + '.tex', doc.dumps(), 
+                       only_if_changed=write_if_changed, report=report)
+        dirname = os.path.dirname(filepath)
+        for filename, content in self.sidecars.items():
+            path = os.path.join(dirname, filename)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_file(path, content, only_if_changed=write_if_changed, report=report)
+        return report
+
+    def generate_pdf(self, filepath=None, *args, clean=True, clean_tex=False, 
+                     compiler='pdflatex', compiler_args=None, silent=True, 
+                     max_passes=5, draftmode=True, hooks=None, 
+                     write_if_changed=False, pool=None, scratch=False, 
+                     return_bytes=False, memory_budget=None, subtree=None, 
+                     **kwargs) -> CompileResult:
         """
         Builds the document and generates a pdf in one go.
 
         Parameters
         ----------
-        args : tuple, Optional
-            Extra positional arguments are forwarded to `pylatex.Document.generate_pdf`.
+        filepath : str, Optional
+            The path of the file, without extension. Default is None, which
+            means the default filepath of PyLaTeX.
+
+        clean : bool, Optional
+            Whether the auxiliary files created during compilation should 
+            be removed. Default is True.
 
         clean_tex : bool, Optional
-            Default is False.
+            Whether the generated tex file should be removed. Default is False.
 
         compiler : str, Optional
             The compiler to use. Default is `pdflatex`. See the docs of PyLaTeX
             for all the available options.
 
+        compiler_args : list, Optional
+            Extra arguments passed to the compiler. Default is None.
+
+        silent : bool, Optional
+            If False, the output of the compiler is printed. Default is True.
+
+        max_passes : int, Optional
+            The compiler is rerun until the auxiliary files (.aux, .toc, .lof,
+            .lot) reach a fixed point, but at most this many times. 
+            Default is 5.
+
+        draftmode : bool, Optional
+            If True, intermediate passes run in draft mode, and only the final
+            pass writes the pdf. Default is True.
+
+        hooks : Iterable, Optional
+            A list of :class:`latexdocs.compiler.CompileHook` instances to 
+            receive metrics during compilation. Default is None.
+
+        write_if_changed : bool, Optional
+            If True, only the files whose content has changed are written, and
+            the compilation is skipped if none of them has changed and the pdf
+            is newer than the tex file and the images of the document. Files 
+            that are included by raw LaTeX are not checked. Default is False.
+
+        pool : :class:`latexdocs.pool.TexWorkerPool`, Optional
+            A pool of warm TeX workers to dispatch the compilation to. 
+            Default is None.
+
+        scratch : bool or str, Optional
+            If True, the compiler runs in a temporary directory on a RAM-backed
+            filesystem (if there is one), and only the pdf is copied to its
+            destination in one go. A string is interpreted as the directory
+            to create the temporary directory in. The tex file is written to 
+            its destination as usual, and the files next to it can be referred 
+            to by relative paths. Default is False.
+
+        return_bytes : bool, Optional
+            If True, the document is compiled in a scratch directory and the pdf 
+            is returned as the `pdf_bytes` attribute of the result, without 
+            writing anything to the destination. Default is False.
+
+        memory_budget : int, Optional
+            If provided, the document is built in a streaming fashion with
+            a bounded memory usage. See :func:`generate_tex` for the details.
+            Default is None.
+
+        subtree : str or Iterable, Optional
+            The path of a section. If provided, only this section is 
+            compiled, for a quick preview. See :func:`build_subtree` for 
+            the details. Default is None.
+
         kwargs : tuple, Optional
-            Extra kyeword arguments are forwarded to `pylatex.Document.generate_pdf`.
+            Extra kyeword arguments are forwarded to :func:`build`.
+
+        Returns
+        -------
+        :class:`latexdocs.compiler.CompileResult`
+            Timing of the passes, number of reruns, TeX memory statistics, 
+            page count and size of the output.
 
         Example
         -------
         >>> from latexdocs import Document
         >>> doc = Document(title='Title', author='Author', date=True)
         >>> doc['Section 1'].append('Some regular text')
-        >>> doc.generate_pdf('filename', compiler='pdflatex')
+        >>> result = doc.generate_pdf('filename', compiler='pdflatex')
+        >>> result.pages, result.duration
+
+        """
+        if subtree is not None:
+            assert memory_budget is None, \
+                "A subtree can't be built with a memory budget."
+            doc = self.build_subtree(subtree, **kwargs)
+            filepath = doc.default_filepath if filepath is None else filepath
+        elif memory_budget is None:
+            doc = self.build(**kwargs)
+            filepath = doc.default_filepath if filepath is None else filepath
+        else:
+            # the document is built while the tex file is being written
+            doc = None
+            filepath = _default_filepath_ if filepath is None else filepath
+        filepath = os.path.abspath(filepath)
+        options = dict(clean=clean, clean_tex=clean_tex, compiler=compiler, 
+                       compiler_args=compiler_args, silent=silent, 
+                       max_passes=max_passes, draftmode=draftmode, hooks=hooks, 
+                       write_if_changed=write_if_changed, pool=pool, 
+                       memory_budget=memory_budget)
+        if scratch or return_bytes:
+            root = scratch if isinstance(scratch, str) else None
+            with scratch_dir(root) as workdir:
+                return self._generate_pdf_(doc, filepath, workdir=workdir, 
+                                           return_bytes=return_bytes, **options, 
+                                           **kwargs)
+        return self._generate_pdf_(doc, filepath, **options, **kwargs)
 
+    def to_pdf_bytes(self, *args, **kwargs) -> bytes:
         """
-        self.build().generate_pdf(*args, clean_tex=clean_tex, compiler=compiler, **kwargs)
+        Builds and compiles the document in a scratch directory and returns 
+        the content of the pdf. Nothing is written to the current directory,
+        but the files in it can be referred to by relative paths.
+
+        Parameters
+        ----------
+        kwargs : tuple, Optional
+            Extra kyeword arguments are forwarded to :func:`write_pdf`.
+
+        Example
+        -------
+        >>> from latexdocs import Document
+        >>> doc = Document(title='Title', author='Author', date=True)
+        >>> doc['Section 1'].append('Some regular text')
+        >>> pdf = doc.to_pdf_bytes()
+
+        """
+        buffer = io.BytesIO()
+        self.write_pdf(buffer, *args, **kwargs)
+        return buffer.getvalue()
+
+    def write_pdf(self, fileobj, *args, inputdir=None, scratch=True, 
+                  **kwargs) -> CompileResult:
+        """
+        Builds and compiles the document in a scratch directory and streams 
+        the pdf into a binary file-like object, without writing anything 
+        to the filesystem next to the document.
+
+        Parameters
+        ----------
+        fileobj : file-like
+            A writable binary file-like object, like an open file, an 
+            :class:`io.BytesIO` or the body of a response.
+
+        inputdir : str, Optional
+            The directory the document refers to files relative to. Default 
+            is None, which means the current working directory.
+
+        scratch : bool or str, Optional
+            A string is interpreted as the directory to create the scratch 
+            directory in. Default is True, which means a RAM-backed filesystem 
+            if there is one.
+
+        kwargs : tuple, Optional
+            The options of :func:`generate_pdf` that control the compilation
+            (like `compiler` or `max_passes`), `subtree`, and the options of 
+            :func:`build`. The options that make no sense without a destination, 
+            like `write_if_changed` or `memory_budget`, raise a TypeError.
+
+        Returns
+        -------
+        :class:`latexdocs.compiler.CompileResult`
+
+        Example
+        -------
+        >>> from latexdocs import Document
+        >>> doc = Document(title='Title', author='Author', date=True)
+        >>> doc['Section 1'].append('Some regular text')
+        >>> with open('filename.pdf', 'wb') as f:
+        >>>     doc.write_pdf(f)
+
+        """
+        options = dict(clean=True, clean_tex=False, compiler='pdflatex', 
+                       compiler_args=None, silent=True, max_passes=5, 
+                       draftmode=True, hooks=None, pool=None)
+        for key in list(options):
+            options[key] = kwargs.pop(key, options[key])
+        subtree = kwargs.pop('subtree', None)
+        unknown = sorted(set(kwargs) - set(_build_options_))
+        if len(unknown) > 0:
+            raise TypeError("write_pdf() got unsupported keyword arguments: " 
+                            "{}".format(', '.join(map(repr, unknown))))
+        if subtree is None:
+            doc = self.build(**kwargs)
+        else:
+            doc = self.build_subtree(subtree, **kwargs)
+        inputdir = os.getcwd() if inputdir is None else inputdir
+        filepath = os.path.join(os.path.abspath(inputdir), 
+                                os.path.basename(doc.default_filepath))
+        root = scratch if isinstance(scratch, str) else None
+        with scratch_dir(root) as workdir:
+            return self._generate_pdf_(doc, filepath, workdir=workdir, 
+                                       return_bytes=True, fileobj=fileobj, 
+                                       **options)
+
+    def _inputs_mtime_(self, filepath) -> float:
+        # the time of the latest change of the tex file and the files it includes,
+        # the paths of the latter are relative to the tex file
+        inputdir = os.path.dirname(filepath)
+        paths = [os.path.join(inputdir, f) for f in self.input_files()]
+        mtimes = [os.path.getmtime(p) for p in paths if os.path.isfile(p)]
+        return max([os.path.getmtime(filepath + '.tex')] + mtimes)
+
+    def _generate_pdf_(self, doc, filepath, *args, workdir=None, return_bytes=False,
+                       fileobj=None, clean=True, clean_tex=False, compiler='pdflatex', 
+                       compiler_args=None, silent=True, max_passes=5, draftmode=True, 
+                       hooks=None, write_if_changed=False, pool=None, 
+                       memory_budget=None, **kwargs):
+        inputdir = os.path.dirname(filepath)
+        texpath = filepath
+        if return_bytes:
+            # nothing goes to the destination, not even the tex file
+            texpath = os.path.join(workdir, os.path.basename(filepath))
+            write_if_changed = False
+        # the build options are only used if the document is not built yet
+        outputs = self.generate_tex(texpath, write_if_changed=write_if_changed, 
+                                    memory_budget=memory_budget, _doc=doc, **kwargs)
+        pdfpath = filepath + '.pdf'
+        if write_if_changed and not outputs.changed and os.path.isfile(pdfpath):
+            if os.path.getmtime(pdfpath) >= self._inputs_mtime_(filepath):
+                return CompileResult(filepath, compiler, [], runs=0, outputs=outputs)
+        outbase = filepath
+        env = None
+        if workdir is not None:
+            outbase = os.path.join(workdir, os.path.basename(filepath))
+            if not return_bytes:
+                # start from the auxiliary files of a previous compilation
+                _copy_files_(filepath, outbase, __rerun__extensions__)
+            else:
+                env = dict(os.environ)
+                env['TEXINPUTS'] = inputdir + os.pathsep + env.get('TEXINPUTS', '')
+        epoch = self._epoch_()
+        if epoch is not None:
+            env = reproducible_env(epoch, env)
+        if pool is not None:
+            assert doc is not None, "A pool can't be used with a memory budget."
+            result = pool.compile(doc.dumps(), outbase, inputpath=inputdir)
+            for hook in (hooks if hooks is not None else []):
+                hook.on_compile_end(result)
+        else:
+            result = compile_tex(texpath, compiler=compiler, 
+                                 compiler_args=compiler_args, silent=silent, 
+                                 max_passes=max_passes, draftmode=draftmode, 
+                                 hooks=hooks, env=env, outdir=workdir)
+        result.outputs = outputs
+        if workdir is not None:
+            if fileobj is not None:
+                with open(outbase + '.pdf', 'rb') as f:
+                    shutil.copyfileobj(f, fileobj)
+            elif return_bytes:
+                with open(outbase + '.pdf', 'rb') as f:
+                    result.pdf_bytes = f.read()
+            else:
+                with open(outbase + '.pdf', 'rb') as f:
+                    write_file(pdfpath, f.read(), only_if_changed=False)
+                if not clean:
+                    _copy_files_(outbase, filepath, 
+                                 __aux__extensions__ + __rerun__extensions__)
+            result.filepath = filepath
+        elif clean:
+            clean_aux(filepath)
+        if clean_tex and not return_bytes:
+            os.remove(filepath + '.tex')
+        return result
 
 
 class Document(BaseTexDoc):
@@ -180,8 +996,9 @@ class Document(BaseTexDoc):
     author : str, Optional
         The author of the document. Default is None.
 
-    date : bool, Optional
-        If True, a date is show on the title page. Default is False.
+    date : bool or str, Optional
+        If True, a date is show on the title page. A string is shown as it 
+        is. Default is False.
 
     doc : :class:`pylatex.document.Document`, Optional
         An instance of `pylatex.Document`, if you already have one.
@@ -190,6 +1007,20 @@ class Document(BaseTexDoc):
     content : list, Optional
         Content related to the current section. Default is None.    
 
+    extra_packages : Iterable or dict, Optional
+        Only the packages required by the content are loaded, these packages
+        are loaded anyway. Either names, or a dictionary mapping names to 
+        options. Pass `latexdocs.preamble.__default__packages__` to load 
+        all the default packages. Default is None.
+
+    reproducible : bool or int, Optional
+        If True or an integer, the same document always compiles to the same
+        bytes. The dates are pinned to the integer, in seconds since the Unix 
+        epoch, or to the `SOURCE_DATE_EPOCH` environment variable if True
+        (0 if it is not set). The date on the title page is rendered from 
+        this time, the trailer ID of the pdf is fixed, and the names of the 
+        files and the versions of the tools are left out. Default is False.
+
     Notes
     -----
     The implementation is not foolproof. For instance, if you ask for the date 
@@ -219,11 +1050,18 @@ class Document(BaseTexDoc):
         dcls = self.__class__.documentclass
         kwargs['documentclass'] = kwargs.get('documentclass', dcls)
         kwargs['geometry_options'] = self._geometry_options
-        doc = pltx.Document(**kwargs)
-        doc = append_packages(doc)
+        doc = _Document(**kwargs)
+        packages = resolve_packages(self.required_packages(), self._extra_packages)
+        doc = append_packages(doc, packages)
         for c in self.preamble:
             doc.preamble.append(c)
-        doc = append_cover(doc, self._title, self._author, self._date)
+        date, epoch = self._date, self._epoch_()
+        if epoch is not None and date is True:
+            date = format_date(epoch)
+        doc = append_cover(doc, self._title, self._author, date)
+        if epoch is not None:
+            doc = append_reproducible(doc, epoch, title=self._title, 
+                                      author=self._author)
         return doc
 
 
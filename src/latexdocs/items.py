@@ -1,8 +1,14 @@
 # -*- coding: utf-8 -*-
+import re
+import numpy as np
 import pylatex as pltx
+from pylatex.base_classes.containers import Fragment
 from abc import abstractmethod
 
 from .base import TexBase
+from .preamble import packages_of
+from .cache import state_hash, file_hash
+from .utils import escape_latex_many, to_dfrac, float_to_str_sig
 
 
 class BaseTexDocItem(TexBase):
@@ -10,6 +16,9 @@ class BaseTexDocItem(TexBase):
     Base class for all document items.
     
     """
+
+    # the names of the LaTeX packages the item needs
+    _packages_ = ()
     
     def __init__(self, *args, content=None, **kwargs):
         c = content if content is not None else []
@@ -25,6 +34,46 @@ class BaseTexDocItem(TexBase):
         """
         ...
 
+    def _cache_key_(self):
+        """
+        Override this to allow the rendered item to be cached. It should 
+        return a hash of everything that affects the output of 
+        :func:`_append2doc_`, or None if the item can't be cached.
+
+        """
+        return None
+
+    def required_packages(self) -> set:
+        """
+        Returns the names of the LaTeX packages the item needs. These are
+        the packages in the `_packages_` class attribute and the packages 
+        required by the content of the item. Override this if the requirements 
+        depend on the state of the item.
+
+        """
+        packages = set(self.__class__._packages_)
+        for c in self.content:
+            packages |= packages_of(c)
+        return packages
+
+    def input_files(self) -> list:
+        """
+        Returns the paths of the files the LaTeX source of the item includes,
+        like images. Override this if the item refers to external files.
+
+        """
+        return []
+
+    def _append2preview_(self, renderer, *args, **kwargs):
+        """
+        Override this to control how the item shows up in previews. 
+        By default, the LaTeX source of the item is shown.
+
+        """
+        fragment = Fragment()
+        self._append2doc_(fragment, nosection=True)
+        renderer.latex(fragment.dumps())
+
 
 class TikZFigure(BaseTexDocItem):
     """
@@ -58,6 +107,8 @@ class TikZFigure(BaseTexDocItem):
     
     """
 
+    _packages_ = ('pgfplots',)
+
     def __init__(self, *args, plot_options=None, **kwargs):
         super().__init__(*args, **kwargs)
         if plot_options is None:
@@ -99,6 +150,314 @@ class Text(BaseTexDocItem):
             doc.append(pltx.NoEscape(c))
         return doc    
 
+    def _cache_key_(self):
+        return state_hash(self.__class__.__name__, *self.content)
+
+    def _append2preview_(self, renderer, *args, **kwargs):
+        for c in self.content:
+            renderer.text(c, raw=True)
+
+
+class PlainText(Text):
+    """
+    A class for text, whose characters that are special in LaTeX are escaped,
+    like log extracts or listings of names. Lines are kept as they are.
+    
+    Parameters
+    ----------
+    txt : str or Iterable[str]
+        The content, either as a single string or as a list of lines.
+        
+    bold : bool, Optional
+        Default is False.
+
+    Example
+    -------
+    >>> from latexdocs import Document, PlainText
+    >>> doc = Document()
+    >>> with open('build.log') as f:
+    >>>     doc['Log'].append(PlainText(f.read().splitlines()))
+        
+    """
+    
+    def __init__(self, txt, *args, **kwargs):
+        if not isinstance(txt, str):
+            txt = '\n'.join(map(str, txt))
+        self.text = txt
+        super().__init__(escape_latex_many([txt])[0], *args, **kwargs)
+
+    def _append2preview_(self, renderer, *args, **kwargs):
+        renderer.text(self.text)
+
+
+class Equations(BaseTexDocItem):
+    r"""
+    A class for many equations at once, like the output of a symbolic
+    solver. The equations are written in bulk, as one environment or
+    as groups of at most `per_group` equations. Smaller groups are easier 
+    on TeX, and let long lists of equations break across pages.
+    
+    Parameters
+    ----------
+    lhs : Iterable[str]
+        The left hand sides, in LaTeX. If `rhs` is None, these are 
+        the pairs of the left and right hand sides.
+        
+    rhs : Iterable[str], Optional
+        The right hand sides, in LaTeX. Default is None.
+
+    env : str, Optional
+        The environment, either 'align' (aligned at the signs), 'dmath' 
+        (a 'dgroup' of breqn equations with automatic line breaks) or 
+        'equation' (separate equations). Default is 'align'.
+
+    sign : str, Optional
+        The relation between the sides. Default is '='.
+
+    dfrac : bool, Optional
+        If True, fractions are shown in display style. Default is False.
+
+    numbered : bool, Optional
+        If False, the equations are not numbered. Default is True.
+
+    per_group : int, Optional
+        The maximum number of equations in an environment. Default is None,
+        which means all equations are in one environment.
+
+    Example
+    -------
+    >>> from latexdocs import Document, Equations
+    >>> doc = Document(title='Title', author='Author', date=True)
+    >>> lhs = ['x_{}'.format(i) for i in range(1000)]
+    >>> rhs = [r'\frac{{{}}}{{2}}'.format(i) for i in range(1000)]
+    >>> doc['Solution'].append(Equations(lhs, rhs, dfrac=True, per_group=50))
+        
+    """
+
+    _envs_ = ('align', 'dmath', 'equation')
+    
+    def __init__(self, lhs, rhs=None, *args, env='align', sign='=', dfrac=False, 
+                 numbered=True, per_group=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if env not in self.__class__._envs_:
+            raise ValueError("Unknown environment '{}'.".format(env))
+        if rhs is None:
+            pairs = list(lhs)
+            lhs = [p[0] for p in pairs]
+            rhs = [p[1] for p in pairs]
+        self.lhs = list(map(str, lhs))
+        self.rhs = list(map(str, rhs))
+        assert len(self.lhs) == len(self.rhs), \
+            "The number of left and right hand sides must be the same."
+        assert per_group is None or per_group > 0
+        self.env = env
+        self.sign = sign
+        self.dfrac = dfrac
+        self.numbered = numbered
+        self.per_group = per_group
+
+    def __len__(self):
+        return len(self.lhs)
+
+    def required_packages(self) -> set:
+        packages = super().required_packages()
+        if self.env == 'dmath':
+            packages.add('breqn')
+        return packages
+
+    def _cache_key_(self):
+        return state_hash(self.__class__.__name__, self.lhs, self.rhs, self.env, 
+                          self.sign, self.dfrac, self.numbered, self.per_group)
+
+    def _lines_(self) -> list:
+        lhs, rhs = self.lhs, self.rhs
+        if self.dfrac:
+            lhs = list(map(to_dfrac, lhs))
+            rhs = list(map(to_dfrac, rhs))
+        star = '' if self.numbered else '*'
+        if self.env == 'align':
+            sign = ' &' + self.sign + ' '
+            return [l + sign + r for l, r in zip(lhs, rhs)]
+        sign = ' ' + self.sign + ' '
+        begin = '\\begin{' + self.env + star + '}\n'
+        end = '\n\\end{' + self.env + star + '}'
+        return [begin + l + sign + r + end for l, r in zip(lhs, rhs)]
+
+    def dumps(self) -> str:
+        """
+        Returns the LaTeX source of the equations.
+
+        """
+        lines = self._lines_()
+        n = len(lines)
+        if n == 0:
+            return ''
+        size = n if self.per_group is None else self.per_group
+        star = '' if self.numbered else '*'
+        if self.env == 'align':
+            head, sep, tail = '\\begin{align' + star + '}\n', ' \\\\\n', \
+                '\n\\end{align' + star + '}'
+        elif self.env == 'dmath':
+            head, sep, tail = '\\begin{dgroup' + star + '}\n', '\n', \
+                '\n\\end{dgroup' + star + '}'
+        else:
+            head, sep, tail = '', '\n', ''
+        groups = [head + sep.join(lines[i: i + size]) + tail 
+                  for i in range(0, n, size)]
+        return '\n'.join(groups)
+
+    def _append2doc_(self, doc, *args, **kwargs):
+        tex = self.dumps()
+        if len(tex) > 0:
+            doc.append(pltx.NoEscape(tex))
+        return doc
+
+    def _append2preview_(self, renderer, *args, **kwargs):
+        equations = self
+        if self.env == 'dmath':
+            # MathJax doesn't know the environments of breqn
+            equations = Equations(self.lhs, self.rhs, env='align', sign=self.sign, 
+                                  dfrac=self.dfrac, numbered=self.numbered, 
+                                  per_group=self.per_group)
+        tex = equations.dumps()
+        if len(tex) > 0:
+            renderer.math(tex)
+
+
+# exponents and special values of formatted floats, in math mode
+_float_exponent_ = re.compile(r"e([+-])0*(\d+)")
+_float_specials_ = re.compile(r"\b(inf|nan)\b")
+
+
+def _math_floats_(tex: str) -> str:
+    tex = _float_exponent_.sub(
+        lambda m: r" \cdot 10^{" + m.group(1).lstrip('+') + m.group(2) + "}", tex)
+    return _float_specials_.sub(
+        lambda m: r"\infty" if m.group(1) == 'inf' else r"\mathrm{NaN}", tex)
+
+
+class ArrayMath(BaseTexDocItem):
+    r"""
+    A class to show a NumPy array as a matrix. Large arrays are truncated
+    with ellipses, showing only the corners, hence the time and the size
+    of the output is bounded, whatever the size of the array is. 
+    One-dimensional arrays are shown as column vectors.
+    
+    Parameters
+    ----------
+    array : numpy.ndarray
+        A non-empty array with at most two dimensions.
+        
+    env : str, Optional
+        The matrix environment of amsmath, like 'bmatrix', 'pmatrix' or 
+        'vmatrix'. Default is 'bmatrix'.
+
+    lhs : str, Optional
+        The left hand side, like 'K'. Default is None.
+
+    sig : int, Optional
+        Number of significant digits. Default is 6.
+
+    atol : float, Optional
+        Values smaller than this in the absolute sense are shown as zero. 
+        Default is 1e-7.
+
+    maxrows : int, Optional
+        The number of rows shown, at most. Default is 8.
+
+    maxcols : int, Optional
+        The number of columns shown, at most. Default is 8.
+
+    Example
+    -------
+    >>> import numpy as np
+    >>> from latexdocs import Document, ArrayMath
+    >>> doc = Document(title='Title', author='Author', date=True)
+    >>> K = np.random.rand(1000, 1000)
+    >>> doc['Stiffness'].append(ArrayMath(K, lhs=r'\mathbf{K}', sig=3))
+        
+    """
+
+    _envs_ = ('matrix', 'bmatrix', 'pmatrix', 'vmatrix', 'Bmatrix', 'Vmatrix')
+
+    def __init__(self, array, *args, env='bmatrix', lhs=None, sig=6, atol=1e-7,
+                 maxrows=8, maxcols=8, **kwargs):
+        super().__init__(*args, **kwargs)
+        if env not in self.__class__._envs_:
+            raise ValueError("Unknown environment '{}'.".format(env))
+        array = np.asarray(array)
+        if array.ndim > 2:
+            raise ValueError("Only arrays with at most two dimensions are supported.")
+        if array.size == 0:
+            raise ValueError("The array is empty.")
+        assert maxrows > 1 and maxcols > 1
+        if array.ndim < 2:
+            array = array.reshape(-1, 1)
+        self.array = array
+        self.env = env
+        self.lhs = lhs
+        self.sig = sig
+        self.atol = atol
+        self.maxrows = maxrows
+        self.maxcols = maxcols
+
+    @staticmethod
+    def _shown_(n: int, nmax: int) -> tuple:
+        # the indices shown at the beginning and at the end
+        if n <= nmax:
+            return n, 0
+        return (nmax + 1) // 2, nmax // 2
+
+    def _corners_(self):
+        # the part of the array that is shown
+        nrows, ncols = self.array.shape
+        rhead, rtail = self._shown_(nrows, self.maxrows)
+        chead, ctail = self._shown_(ncols, self.maxcols)
+        rows = np.r_[0:rhead, nrows - rtail:nrows]
+        cols = np.r_[0:chead, ncols - ctail:ncols]
+        return self.array[np.ix_(rows, cols)], rhead, rtail, chead, ctail
+
+    def _cache_key_(self):
+        corners, *_ = self._corners_()
+        return state_hash(self.__class__.__name__, corners, self.array.shape, 
+                          self.env, self.lhs, self.sig, self.atol, 
+                          self.maxrows, self.maxcols)
+
+    def _math_(self) -> tuple:
+        # the displayed matrix and the number of its columns
+        corners, rhead, rtail, chead, ctail = self._corners_()
+        cells = float_to_str_sig(corners, sig=self.sig, atol=self.atol)
+        if ctail > 0:
+            cells = [r[:chead] + [r'\cdots'] + r[chead:] for r in cells]
+        if rtail > 0:
+            dots = [r'\vdots'] * len(cells[0])
+            if ctail > 0:
+                dots[chead] = r'\ddots'
+            cells = cells[:rhead] + [dots] + cells[rhead:]
+        body = _math_floats_(' \\\\\n'.join(' & '.join(r) for r in cells))
+        tex = '\\begin{' + self.env + '}\n' + body + '\n\\end{' + self.env + '}'
+        if self.lhs is not None:
+            tex = self.lhs + ' = ' + tex
+        return '\\[\n' + tex + '\n\\]', len(cells[0])
+
+    def dumps(self) -> str:
+        """
+        Returns the LaTeX source of the matrix.
+
+        """
+        tex, ncols = self._math_()
+        # amsmath allows 10 columns by default
+        if ncols > 10:
+            tex = '\\setcounter{MaxMatrixCols}{' + str(ncols) + '}\n' + tex
+        return tex
+
+    def _append2doc_(self, doc, *args, **kwargs):
+        doc.append(pltx.NoEscape(self.dumps()))
+        return doc
+
+    def _append2preview_(self, renderer, *args, **kwargs):
+        renderer.math(self._math_()[0])
+
 
 class Image(BaseTexDocItem):
     """
@@ -150,6 +509,9 @@ class Image(BaseTexDocItem):
         self._caption = caption
         self._filename = filename
 
+    def input_files(self) -> list:
+        return [] if self._filename is None else [self._filename]
+
     @classmethod
     def from_plt(cls, path, *args, **kwargs):
         """
@@ -165,10 +527,24 @@ class Image(BaseTexDocItem):
         plt.savefig(path)
         return Image(*args, filename=path, **kwargs)
     
+    def _cache_key_(self):
+        return state_hash(self.__class__.__name__, self._filename, 
+                          file_hash(self._filename), self._width, 
+                          self._position, self._caption)
+
+    def required_packages(self) -> set:
+        packages = super().required_packages()
+        if 'H' in self._position:
+            packages.add('float')
+        return packages
+
     def _append2doc_(self, doc, *args, **kwargs):
         with doc.create(pltx.Figure(position=self._position)) as pic:
             pic.add_image(self._filename, width=self._width)
             if self._caption is not None:
                 pic.add_caption(self._caption)
         return doc
+
+    def _append2preview_(self, renderer, *args, **kwargs):
+        renderer.image(self._filename, caption=self._caption)
     
\ No newline at end of file
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Callable, Iterable
+
+from pylatex import Package
+
+from .base import TexBase
+from .items import BaseTexDocItem
+from .preamble import packages_of
+
+
+def _call_(func, args, kwargs):
+    return func(*args, **kwargs)
+
+
+class Lazy(BaseTexDocItem):
+    """
+    A class to handle content that is expensive to produce. The callable 
+    is only evaluated when the item is emitted during a build, and the result 
+    is memoized. The result can be anything that can be appended to a section,
+    or a list of such things.
+    
+    Parameters
+    ----------
+    func : Callable
+        A callable that produces the content.
+        
+    *args : tuple, Optional
+        Positional arguments for the callable.
+        
+    **kwargs : dict, Optional
+        Keyword arguments for the callable.
+        
+    Example
+    -------
+    >>> from latexdocs import Document, Table, Lazy
+    >>> import numpy as np
+    >>> def simulate(n):
+    >>>     data = np.random.rand(n, 4)
+    >>>     return Table(data=data, columns=['A', 'B', 'C', 'D'])
+    >>> doc = Document(title='Title', author='Author', date=True)
+    >>> doc['Results'].append(Lazy(simulate, 10))
+    >>> doc.build(lazy_workers=4)
+    
+    """
+    
+    _transient_ = TexBase._transient_ + ('_lock',)
+    
+    def __init__(self, func: Callable, *args, **kwargs):
+        super().__init__()
+        assert callable(func), "The first argument must be a callable."
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._result = None
+        self._evaluated = False
+        self._lock = threading.Lock()
+        
+    def __setstate__(self, state):
+        super().__setstate__(state)
+        self._lock = threading.Lock()
+        
+    @property
+    def evaluated(self) -> bool:
+        """
+        Returns `True` if the callable has already been evaluated.
+        
+        """
+        return self._evaluated
+    
+    def evaluate(self):
+        """
+        Evaluates the callable if it hasn't been evaluated before and 
+        returns the result.
+        
+        """
+        if not self._evaluated:
+            with self._lock:
+                if not self._evaluated:
+                    self._result = self._func(*self._args, **self._kwargs)
+                    self._evaluated = True
+        return self._result
+    
+    def _set_result_(self, result):
+        with self._lock:
+            if not self._evaluated:
+                self._result = result
+                self._evaluated = True
+                
+    def _append2doc_(self, doc, *args, **kwargs):
+        result = self.evaluate()
+        result = result if isinstance(result, (list, tuple)) else [result]
+        for r in result:
+            if hasattr(r, '_append2doc_'):
+                doc = r._append2doc_(doc, *args, **kwargs)
+            elif r is not None:
+                doc.append(r)
+        # the preamble is built before the result is known, the packages 
+        # of the result are propagated to it with the emitted content
+        packages = set()
+        for r in result:
+            packages |= packages_of(r)
+        for name in sorted(packages):
+            doc.packages.add(Package(name))
+        return doc
+
+    def required_packages(self) -> set:
+        """
+        Returns an empty set, since the result is not known before the item
+        is emitted. The packages the result requires are added to the 
+        document when the item is emitted, hence collecting the requirements 
+        of a document doesn't evaluate its lazy items.
+
+        """
+        return set()
+
+    def _append2preview_(self, renderer, *args, **kwargs):
+        result = self.evaluate()
+        result = result if isinstance(result, (list, tuple)) else [result]
+        for r in result:
+            renderer.append(r)
+
+
+def evaluate_all(items: Iterable[Lazy], *args, workers: int = None, 
+                 executor='thread', **kwargs):
+    """
+    Evaluates lazy items concurrently. Items that have already been evaluated
+    are skipped.
+    
+    Parameters
+    ----------
+    items : Iterable[Lazy]
+        The items to evaluate.
+        
+    workers : int, Optional
+        The maximum number of workers. Default is None.
+        
+    executor : str or :class:`concurrent.futures.Executor`, Optional
+        'thread' or 'process', or an executor instance. With processes, 
+        the callables and their arguments must be picklable. 
+        Default is 'thread'.
+    
+    """
+    pending, ids = [], set()
+    for item in items:
+        if not item.evaluated and id(item) not in ids:
+            ids.add(id(item))
+            pending.append(item)
+    if len(pending) == 0:
+        return
+    if isinstance(executor, Executor):
+        pool, shutdown = executor, False
+    elif executor == 'thread':
+        pool, shutdown = ThreadPoolExecutor(workers), True
+    elif executor == 'process':
+        pool, shutdown = ProcessPoolExecutor(workers), True
+    else:
+        raise NotImplementedError("Unknown executor '{}'".format(executor))
+    try:
+        futures = [pool.submit(_call_, l._func, l._args, l._kwargs) for l in pending]
+        for l, f in zip(pending, futures):
+            l._set_result_(f.result())
+    finally:
+        if shutdown:
+            pool.shutdown()
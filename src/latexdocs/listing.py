@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+from functools import lru_cache
+from typing import Iterable
+from concurrent.futures import ProcessPoolExecutor
+
+from pylatex.utils import NoEscape, escape_latex
+
+from .items import BaseTexDocItem
+from .cache import FragmentCache, state_hash, file_hash
+
+
+# the highlighted sources, shared by all the listings of the process
+_listing_cache_ = FragmentCache(maxbytes=32 * 1024 * 1024)
+
+
+def _pygments_():
+    try:
+        import pygments
+    except ImportError:
+        raise ImportError("You need Pygments for this.")
+    return pygments
+
+
+def _command_prefix_(style: str) -> str:
+    # every style has its own macros, so that styles can be mixed
+    return 'PY' + re.sub('[^a-zA-Z]', '', style)
+
+
+def guess_language(filename: str) -> str:
+    """
+    Returns the name of the Pygments lexer for a file, based on its name.
+
+    """
+    _pygments_()
+    from pygments.lexers import get_lexer_for_filename
+    return get_lexer_for_filename(filename).aliases[0]
+
+
+@lru_cache(maxsize=None)
+def style_defs(style: str = 'default') -> str:
+    """
+    Returns the definitions of the macros used by the highlighted sources
+    of a Pygments style, to be put in the preamble.
+
+    Example
+    -------
+    >>> from latexdocs.listing import style_defs
+    >>> defs = style_defs('monokai')
+
+    """
+    _pygments_()
+    from pygments.formatters import LatexFormatter
+    formatter = LatexFormatter(style=style, commandprefix=_command_prefix_(style))
+    return formatter.get_style_defs()
+
+
+def highlight(source: str, language: str = 'python', style: str = 'default',
+              *args, linenos: bool = False, options: str = None, **kwargs) -> str:
+    """
+    Returns the highlighted source as a fancyvrb 'Verbatim' environment,
+    colored by the macros of :func:`style_defs`.
+
+    Parameters
+    ----------
+    source : str
+        The source code.
+
+    language : str, Optional
+        The name of a Pygments lexer. Default is 'python'.
+
+    style : str, Optional
+        The name of a Pygments style. Default is 'default'.
+
+    linenos : bool, Optional
+        If True, the lines are numbered. Default is False.
+
+    options : str, Optional
+        Extra options of the 'Verbatim' environment. Default is None.
+
+    Example
+    -------
+    >>> from latexdocs.listing import highlight
+    >>> tex = highlight("print('Hello')", 'python')
+
+    """
+    pygments = _pygments_()
+    from pygments.lexers import get_lexer_by_name
+    from pygments.formatters import LatexFormatter
+    formatter = LatexFormatter(style=style, commandprefix=_command_prefix_(style),
+                               linenos=linenos, verboptions=options or '')
+    return pygments.highlight(source, get_lexer_by_name(language), formatter)
+
+
+def _highlight_job_(job: tuple) -> str:
+    source, filename, language, style, linenos, options = job
+    if source is None:
+        with open(filename, 'r', encoding='utf-8') as f:
+            source = f.read()
+    return highlight(source, language, style, linenos=linenos, options=options)
+
+
+class CodeListing(BaseTexDocItem):
+    """
+    A class to show source code. The code is tokenized by Pygments in Python,
+    and written as pre-colored TeX, hence typesetting doesn't need shell
+    escape, or the listings package. The highlighted sources are cached by
+    the hash of their content, so unchanged files are not tokenized again.
+    Requires Pygments.
+
+    Parameters
+    ----------
+    source : str, Optional
+        The source code. It must be provided either with this argument,
+        or as a file with `filename`. Default is None.
+
+    filename : str, Optional
+        The path of a file to read the source from. Default is None.
+
+    language : str, Optional
+        The name of a Pygments lexer. Default is None, which means it is
+        guessed from the name of the file, or 'python' if there is no file.
+
+    style : str, Optional
+        The name of a Pygments style. Default is 'default'.
+
+    linenos : bool, Optional
+        If True, the lines are numbered. Default is False.
+
+    frame : str, Optional
+        The frame of the listing, like 'single' or 'lines'. Default is None.
+
+    fontsize : str, Optional
+        The font size, like '\\small'. Default is None.
+
+    label : str, Optional
+        A title shown on the frame. Default is None.
+
+    Example
+    -------
+    >>> from latexdocs import Document, CodeListing
+    >>> doc = Document(title='Title', author='Author', date=True)
+    >>> doc['Source'].append(CodeListing(filename='script.py', linenos=True,
+    >>>                                  frame='single', style='friendly'))
+
+    See Also
+    --------
+    :func:`highlight_many`
+
+    """
+
+    _packages_ = ('fancyvrb',)
+
+    def __init__(self, source: str = None, *args, filename: str = None,
+                 language: str = None, style: str = 'default', linenos: bool = False,
+                 frame: str = None, fontsize: str = None, label: str = None,
+                 **kwargs):
+        super().__init__(*args, **kwargs)
+        assert source is not None or filename is not None, "No source provided!"
+        if language is None:
+            language = guess_language(filename) if filename is not None else 'python'
+        self._source = source
+        self._filename = filename
+        self.language = language
+        self.style = style
+        self.linenos = linenos
+        self.frame = frame
+        self.fontsize = fontsize
+        self.label = label
+
+    @property
+    def source(self) -> str:
+        """
+        Returns the source code.
+
+        """
+        if self._source is not None:
+            return self._source
+        with open(self._filename, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def _options_(self) -> str:
+        # the extra options of the Verbatim environment
+        options = []
+        if self.frame is not None:
+            options.append('frame=' + self.frame)
+        if self.fontsize is not None:
+            options.append('fontsize=' + self.fontsize)
+        if self.label is not None:
+            options.append('label={' + escape_latex(self.label) + '}')
+        return ','.join(options)
+
+    def _job_(self) -> tuple:
+        return (self._source, self._filename, self.language, self.style,
+                self.linenos, self._options_())
+
+    def _cache_key_(self):
+        content = self._source if self._source is not None else \
+            file_hash(self._filename)
+        return state_hash(self.__class__.__name__, content, self.language,
+                          self.style, self.linenos, self._options_())
+
+    def highlighted(self) -> str:
+        """
+        Returns the highlighted source.
+
+        """
+        key = self._cache_key_()
+        entry = _listing_cache_.get(key)
+        if entry is not None:
+            return entry[0]
+        return _listing_cache_.put(key, _highlight_job_(self._job_()), [])[0]
+
+    def _append2doc_(self, doc, *args, **kwargs):
+        doc.append(NoEscape(self.highlighted()))
+        doc.packages.add(NoEscape(style_defs(self.style)))
+        return doc
+
+    def _append2preview_(self, renderer, *args, **kwargs):
+        renderer.code(self.source, self.language)
+
+
+def highlight_many(listings: Iterable[CodeListing], *args, workers: int = None,
+                   **kwargs) -> list:
+    """
+    Highlights many listings in parallel and returns the highlighted sources.
+    Only the sources that are not in the cache are tokenized, by a pool of
+    processes. The results are cached, so that building the documents of
+    the listings afterwards takes them from the cache.
+
+    Parameters
+    ----------
+    listings : Iterable[:class:`CodeListing`]
+        The listings.
+
+    workers : int, Optional
+        The number of processes. Default is None, which means the number
+        of CPUs. If it is 1, the sources are highlighted one after the other.
+
+    Example
+    -------
+    >>> import glob
+    >>> from latexdocs import Document, CodeListing
+    >>> from latexdocs.listing import highlight_many
+    >>> listings = [CodeListing(filename=f) for f in sorted(glob.glob('src/*.py'))]
+    >>> highlight_many(listings, workers=8)
+    >>> doc = Document(title='Sources')
+    >>> for f, listing in zip(sorted(glob.glob('src/*.py')), listings):
+    >>>     doc['Sources', f].append(listing)
+
+    """
+    listings = list(listings)
+    keys = [listing._cache_key_() for listing in listings]
+    missing = {}
+    for listing, key in zip(listings, keys):
+        if key not in _listing_cache_ and key not in missing:
+            missing[key] = listing._job_()
+    jobs = list(missing.values())
+    if len(jobs) > 1 and (workers is None or workers > 1):
+        workers = os.cpu_count() if workers is None else workers
+        chunksize = max(1, len(jobs) // (4 * workers))
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(_highlight_job_, jobs, chunksize=chunksize))
+    else:
+        results = list(map(_highlight_job_, jobs))
+    texts = dict(zip(missing.keys(), results))
+    for key, tex in texts.items():
+        _listing_cache_.put(key, tex, [])
+    return [texts[key] if key in texts else listing.highlighted()
+            for listing, key in zip(listings, keys)]
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import hashlib
+import tempfile
+from functools import lru_cache
+from typing import Union, Iterable
+
+
+@lru_cache(maxsize=None)
+def _umask_() -> int:
+    # the mask of the permissions of new files, read when it is first needed
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('Umask:'):
+                    return int(line.split()[1], 8)
+    except (OSError, IOError, ValueError):
+        pass
+    # without procfs, the only way to read it is to set it
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
+
+
+def _set_mode_(tmp: str, path: str):
+    # `tempfile.mkstemp` creates private files, existing files keep their
+    # permissions, new ones get the usual ones
+    if os.path.isfile(path):
+        shutil.copymode(path, tmp)
+    else:
+        os.chmod(tmp, 0o666 & ~_umask_())
+
+
+def digest(content: Union[str, bytes]) -> str:
+    """
+    Returns the SHA-256 hash of some content as a hexadecimal string.
+    Strings are encoded using UTF-8.
+
+    """
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+def file_digest(path: str, chunksize: int = 1 << 20) -> Union[str, None]:
+    """
+    Returns the SHA-256 hash of a file as a hexadecimal string, or None
+    if the file does not exist.
+
+    """
+    if not os.path.isfile(path):
+        return None
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunksize), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class OutputReport:
+    """
+    A class to keep track of the files written during the generation
+    of a document.
+
+    """
+
+    def __init__(self):
+        self.updated = []
+        self.unchanged = []
+
+    @property
+    def changed(self) -> bool:
+        """
+        Returns `True` if any of the files has been updated.
+
+        """
+        return len(self.updated) > 0
+
+    def to_dict(self) -> dict:
+        return {'updated': list(self.updated), 'unchanged': list(self.unchanged)}
+
+
+def write_file(path: str, content: Union[str, bytes], *args,
+               only_if_changed: bool = True, report: OutputReport = None,
+               **kwargs) -> bool:
+    """
+    Writes content to a file. If `only_if_changed` is True, the file is
+    only written if its content differs from the new content, so that its 
+    modification time stays untouched otherwise. The file is replaced 
+    atomically, hence file watchers only see a single change.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+
+    content : str or bytes
+        The content to write. Strings are encoded using UTF-8.
+
+    only_if_changed : bool, Optional
+        Default is True.
+
+    report : :class:`OutputReport`, Optional
+        If provided, the path is registered as updated or unchanged.
+        Default is None.
+
+    Returns
+    -------
+    bool
+        `True` if the file has been written, `False` otherwise.
+
+    """
+    data = content.encode('utf-8') if isinstance(content, str) else bytes(content)
+    if only_if_changed and os.path.isfile(path) and os.path.getsize(path) == len(data):
+        if file_digest(path) == digest(data):
+            if report is not None:
+                report.unchanged.append(path)
+            return False
+    dirname = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=dirname, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        _set_mode_(tmp, path)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    if report is not None:
+        report.updated.append(path)
+    return True
+
+
+def write_chunks(path: str, chunks: Iterable, *args, only_if_changed: bool = True, 
+                 report: OutputReport = None, **kwargs) -> bool:
+    """
+    Writes content to a file chunk by chunk, without holding all of it 
+    in memory. Otherwise it works like :func:`write_file`.
+
+    Parameters
+    ----------
+    path : str
+        The path of the file.
+
+    chunks : Iterable
+        An iterable of strings or bytes. Strings are encoded using UTF-8.
+
+    only_if_changed : bool, Optional
+        Default is True.
+
+    report : :class:`OutputReport`, Optional
+        If provided, the path is registered as updated or unchanged.
+        Default is None.
+
+    Returns
+    -------
+    bool
+        `True` if the file has been written, `False` otherwise.
+
+    """
+    dirname = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=dirname, prefix='.', suffix='.tmp')
+    try:
+        h = hashlib.sha256()
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                h.update(chunk)
+                f.write(chunk)
+        if only_if_changed and file_digest(path) == h.hexdigest():
+            os.remove(tmp)
+            if report is not None:
+                report.unchanged.append(path)
+            return False
+        _set_mode_(tmp, path)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    if report is not None:
+        report.updated.append(path)
+    return True
@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+import queue
+import shutil
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import Future
+from typing import Iterable, Tuple
+
+from .compiler import (CompileResult, PassMetrics, snapshot, needs_rerun, 
+                       reproducible_env)
+from .output import digest, write_file
+
+
+_begin_document_ = r"\begin{document}"
+
+# The driver loads the preamble, then waits for the name of the body on the
+# terminal. The name is read without a trailing space.
+_driver_ = r"""{preamble}
+\begingroup\endlinechar=-1\relax
+\global\read16 to \ltxdocsbody
+\endgroup
+\input{{\ltxdocsbody}}
+"""
+
+_jobname_ = 'job'
+
+
+def split_tex(tex: str) -> Tuple[str, str]:
+    """
+    Splits the content of a tex file into the preamble and the body.
+    The body starts with '\\begin{document}'.
+
+    """
+    index = tex.find(_begin_document_)
+    if index < 0:
+        raise ValueError("The content has no '{}'.".format(_begin_document_))
+    return tex[:index], tex[index:]
+
+
+class _Worker:
+    """
+    A worker slot of a :class:`TexWorkerPool`, with its own scratch directory
+    and a TeX process, that sits paused after loading the preamble.
+    """
+
+    def __init__(self, pool: 'TexWorkerPool', index: int):
+        self.pool = pool
+        self.index = index
+        self.jobs = 0
+        self.restarts = 0
+        self.dir = None
+        self.process = None
+        self.lock = threading.Lock()
+        self._reset_dir_()
+        self.process = self._spawn_(pool.preamble)
+
+    def _reset_dir_(self):
+        if self.dir is not None:
+            shutil.rmtree(self.dir, ignore_errors=True)
+        self.dir = tempfile.mkdtemp(prefix='latexdocs-worker-', dir=self.pool.workdir)
+
+    def _spawn_(self, preamble: str) -> subprocess.Popen:
+        driver = 'driver-{}.tex'.format(digest(preamble)[:16])
+        path = os.path.join(self.dir, driver)
+        if not os.path.exists(path):
+            write_file(path, _driver_.format(preamble=preamble))
+        command = self.pool.command + [driver]
+        return subprocess.Popen(command, cwd=self.dir, stdin=subprocess.PIPE,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                env=self.pool.env)
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def ensure(self):
+        """
+        Restarts the worker, if its process died.
+        """
+        if not self.alive:
+            self.restarts += 1
+            self.process = self._spawn_(self.pool.preamble)
+
+    def _remove_(self, *extensions):
+        for ext in extensions:
+            path = os.path.join(self.dir, _jobname_ + '.' + ext)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def run(self, preamble: str, body: str, filepath: str, inputpath: str = None):
+        pool = self.pool
+        warm = preamble == pool.preamble
+        if inputpath is not None:
+            # make the files next to the document available
+            inputpath = os.path.abspath(inputpath).replace('\\', '/').rstrip('/') + '/'
+            body = r"\makeatletter\def\input@path{{" + inputpath + \
+                r"}}\makeatother" + '\n' + body
+        write_file(os.path.join(self.dir, 'body.tex'), body)
+        self._remove_('pdf', 'aux', 'toc', 'lof', 'lot')
+        filebase = os.path.join(self.dir, _jobname_)
+        passes = []
+        before = snapshot(filebase)
+        for i in range(pool.max_passes):
+            if warm:
+                self.ensure()
+                process, self.process = self.process, None
+            else:
+                process = self._spawn_(preamble)
+            t0 = time.perf_counter()
+            try:
+                process.communicate(b'body\n', timeout=pool.timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.communicate()
+                raise
+            finally:
+                if warm:
+                    # warm up the next process while the result is processed
+                    self.process = self._spawn_(pool.preamble)
+            duration = time.perf_counter() - t0
+            if process.returncode != 0:
+                log = _read_(filebase + '.log')
+                raise subprocess.CalledProcessError(
+                    process.returncode, process.args, output=log)
+            after = snapshot(filebase)
+            log = _read_(filebase + '.log') if before['aux'] is None else None
+            stable = not needs_rerun(before, after, log)
+            before = after
+            passes.append(PassMetrics(i, process.args, duration, not stable))
+            if stable:
+                break
+        log = _read_(filebase + '.log')
+        self.jobs += 1
+        os.makedirs(os.path.dirname(os.path.abspath(filepath)), exist_ok=True)
+        shutil.move(filebase + '.pdf', filepath + '.pdf')
+        result = CompileResult(os.path.abspath(filepath), pool.compiler, passes, log=log)
+        if pool.recycle_after is not None and self.jobs % pool.recycle_after == 0:
+            self.recycle()
+        return result
+
+    def recycle(self):
+        """
+        Stops the process and recreates the scratch directory of the worker.
+        """
+        self.kill()
+        self._reset_dir_()
+        self.process = self._spawn_(self.pool.preamble)
+
+    def kill(self):
+        if self.process is not None:
+            if self.process.poll() is None:
+                self.process.kill()
+            self.process.communicate()
+            self.process = None
+
+    def close(self):
+        self.kill()
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def _read_(path: str) -> str:
+    try:
+        with open(path, 'rb') as f:
+            return f.read().decode('utf-8', errors='replace')
+    except (OSError, IOError):
+        return None
+
+
+class TexWorkerPool:
+    """
+    A pool of long-lived TeX workers for low-latency rendering of small
+    documents. Every worker keeps a TeX process that sits paused after
+    loading the common preamble, waiting for the body of the next document,
+    hence a job only pays for typesetting the body. A new process is warmed
+    up as soon as a job is dispatched to the previous one.
+
+    Documents with a different preamble are compiled by the same workers,
+    without the benefit of a preloaded preamble.
+
+    Parameters
+    ----------
+    preamble : str
+        The common preamble of the documents, everything before
+        '\\begin{document}'.
+
+    workers : int, Optional
+        The number of workers. Default is 2.
+
+    compiler : str, Optional
+        The compiler to use. It must be able to read from the terminal in
+        scroll mode, like `pdflatex`, `xelatex` or `lualatex`.
+        Default is 'pdflatex'.
+
+    compiler_args : list, Optional
+        Extra arguments passed to the compiler. Default is None.
+
+    max_passes : int, Optional
+        The maximum number of passes per document. Every pass is dispatched
+        to a warm process. Default is 1.
+
+    recycle_after : int, Optional
+        The scratch directory of a worker is recreated after this many jobs.
+        Default is 100.
+
+    timeout : float, Optional
+        The maximum time in seconds for a pass. Default is 60.
+
+    workdir : str, Optional
+        The directory to create the scratch directories in. Default is None,
+        which means the default temporary directory of the system.
+
+    env : dict, Optional
+        The environment of the TeX processes. Default is None, which means 
+        the environment of the current process.
+
+    Example
+    -------
+    >>> from latexdocs import Document, TexWorkerPool
+    >>> doc = Document(title='Title', author='Author')
+    >>> with TexWorkerPool.from_document(doc, workers=4) as pool:
+    >>>     for i in range(10):
+    >>>         doc = Document(title='Title', author='Author')
+    >>>         doc['Section'].append('Request {}'.format(i))
+    >>>         doc.generate_pdf('request_{}'.format(i), pool=pool)
+
+    """
+
+    def __init__(self, preamble: str, *args, workers: int = 2, compiler='pdflatex',
+                 compiler_args: Iterable = None, max_passes: int = 1,
+                 recycle_after: int = 100, timeout: float = 60, workdir: str = None,
+                 env: dict = None, **kwargs):
+        if max_passes <= 0:
+            raise ValueError("The number of passes must be positive.")
+        self.preamble = preamble
+        self.compiler = compiler
+        compiler_args = [] if compiler_args is None else list(compiler_args)
+        self.command = [compiler, '-interaction=scrollmode',
+                        '-jobname=' + _jobname_] + compiler_args
+        self.max_passes = max_passes
+        self.recycle_after = recycle_after
+        self.timeout = timeout
+        self.workdir = workdir
+        self.env = env
+        self._queue = queue.Queue()
+        self._workers = [_Worker(self, i) for i in range(workers)]
+        self._threads = []
+        for w in self._workers:
+            t = threading.Thread(target=self._serve_, args=(w,), daemon=True)
+            t.start()
+            self._threads.append(t)
+        self._closed = False
+
+    @classmethod
+    def from_document(cls, doc, *args, **kwargs) -> 'TexWorkerPool':
+        """
+        Returns a pool with the preamble of a document. If the document is 
+        reproducible, the dates embedded in the pdfs are pinned.
+
+        """
+        preamble, _ = split_tex(doc.build().dumps())
+        epoch = doc._epoch_()
+        if epoch is not None and kwargs.get('env', None) is None:
+            kwargs['env'] = reproducible_env(epoch)
+        return cls(preamble, *args, **kwargs)
+
+    def _serve_(self, worker: _Worker):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            future, args = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                with worker.lock:
+                    result = worker.run(*args)
+                future.set_result(result)
+            except BaseException as e:
+                future.set_exception(e)
+
+    def submit(self, tex: str, filepath: str, *args, inputpath: str = None,
+               **kwargs) -> Future:
+        """
+        Submits a document for compilation and returns a future of
+        a :class:`latexdocs.compiler.CompileResult`.
+
+        Parameters
+        ----------
+        tex : str
+            The content of the tex file.
+
+        filepath : str
+            The path of the pdf, without extension.
+
+        inputpath : str, Optional
+            A directory to look for files used by the document, like images.
+            Default is None.
+
+        """
+        assert not self._closed, "The pool is closed!"
+        preamble, body = split_tex(tex)
+        future = Future()
+        self._queue.put((future, (preamble, body, filepath, inputpath)))
+        return future
+
+    def compile(self, tex: str, filepath: str, **kwargs) -> CompileResult:
+        """
+        Compiles a document and returns the result. See :func:`submit`
+        for the parameters.
+
+        """
+        return self.submit(tex, filepath, **kwargs).result()
+
+    def health_check(self) -> list:
+        """
+        Restarts dead workers and returns the status of all of them.
+
+        """
+        status = []
+        for w in self._workers:
+            busy = not w.lock.acquire(blocking=False)
+            if busy:
+                alive = True
+            else:
+                try:
+                    alive = w.alive
+                    if not alive and not self._closed:
+                        w.ensure()
+                finally:
+                    w.lock.release()
+            status.append({'index': w.index, 'alive': alive, 'busy': busy,
+                           'jobs': w.jobs, 'restarts': w.restarts})
+        return status
+
+    def close(self):
+        """
+        Stops the workers and removes their scratch directories.
+
+        """
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+        for w in self._workers:
+            w.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,5 +1,11 @@
 # -*- coding: utf-8 -*-
+import re
+import hashlib
+import datetime
+from typing import Iterable
+
 from pylatex import (NoEscape, Package, Command, NewPage)
+from pylatex.base_classes import LatexObject
 from linkeddeepdict import LinkedDeepDict
 
 
@@ -31,11 +37,98 @@ __default__packages__['float']
 __default__packages__['tabularx']
 
 
+# Packages that are always loaded, because raw content often relies on them.
+__core__packages__ = ('amsmath', 'amsopn', 'mathtools', 'enumitem', 'xcolor', 
+                      'lmodern')
+
+# Raw LaTeX that requires a package, if found in the content of a document.
+# The baseline loaded all the default packages, so these cover what raw 
+# content could rely on, including TikZ, which comes with pgfplots.
+__package__markers__ = {
+    'breqn': re.compile(r"\\begin\{(dmath|dgroup|darray|dseries|dsuspend)\*?\}"),
+    'pgf': re.compile(r"\\pgf(image|declareimage|useimage|mathsetmacro|mathparse"
+                      r"|keys|declarelayer|setlayers)\b|\\begin\{pgf(picture|onlayer)\}"
+                      r"|\\input\{[^}]*\.pgf\}"),
+    'tikz': re.compile(r"\\begin\{tikzpicture\}|\\tikz(set|style)?\b"
+                       r"|\\usetikzlibrary\b"),
+    'pgfplots': re.compile(r"\\begin\{(axis|semilogxaxis|semilogyaxis|loglogaxis"
+                           r"|polaraxis|groupplot)\}|\\addplot\b|\\pgfplotsset\b"
+                           r"|\\usepgfplotslibrary\b|\\pgfplotstable\w*"),
+    'pdfpages': re.compile(r"\\includepdf(merge)?\b"),
+    'float': re.compile(r"\\begin\{(figure|table)\}\[[^\]]*H|\\(restylefloat|floatstyle"
+                        r"|newfloat|floatname|listof)\b"),
+    'tabularx': re.compile(r"\\begin\{tabularx\}|\\tabularxcolumn\b"),
+}
+
+
+def scan_packages(content: str) -> set:
+    """
+    Returns the names of the packages required by some raw LaTeX, based on
+    the environments and commands it uses.
+
+    Example
+    -------
+    >>> from latexdocs.preamble import scan_packages
+    >>> scan_packages(r"\\begin{dmath} x = 1 \\end{dmath}")
+    {'breqn'}
+
+    """
+    return {pkg for pkg, pattern in __package__markers__.items() 
+            if pattern.search(content) is not None}
+
+
+def packages_of(item) -> set:
+    """
+    Returns the names of the packages required by an item of the content
+    of a document. Items can declare their requirements by implementing a 
+    `required_packages` method, strings are scanned for known markers.
+
+    """
+    if hasattr(item, 'required_packages'):
+        return set(item.required_packages())
+    if isinstance(item, str):
+        return scan_packages(item)
+    return set()
+
+
+def resolve_packages(names: Iterable, extra=None) -> dict:
+    """
+    Returns the packages to load as a dictionary, mapping the names to the 
+    options. The core packages are always included, and the order of the 
+    default packages is preserved.
+
+    Parameters
+    ----------
+    names : Iterable
+        The names of the required packages.
+
+    extra : Iterable or dict, Optional
+        Packages to include anyway, either as names or as a dictionary 
+        mapping names to options. Default is None.
+
+    """
+    names = set(names) | set(__core__packages__)
+    options = {}
+    if extra is not None:
+        if isinstance(extra, dict):
+            options = {k: v for k, v in extra.items()}
+        else:
+            options = {k: None for k in extra}
+    names |= set(options.keys())
+    result = {}
+    for pkg in __default__packages__.keys():
+        if pkg in names:
+            result[pkg] = options.get(pkg, None)
+    for pkg in sorted(names - set(result.keys())):
+        result[pkg] = options.get(pkg, None)
+    return result
+
+
 def append_packages(doc, packages=None):
     if packages is None:
         packages = __default__packages__
     for pkg, options in packages.items():
-        pkgo = options if len(options) > 0 else None
+        pkgo = options if options is not None and len(options) > 0 else None
         doc.packages.append(Package(pkg, options=pkgo))    
     return doc
 
@@ -52,8 +145,9 @@ def append_cover(doc, title=None, author=None, date=True):
     author : str, Optional
         The author of the document. Default is None.
 
-    date : bool, Optional
-        If True, a date is show on the title page. Default is False.
+    date : bool or str, Optional
+        If True, the date of the compilation is show on the title page.
+        A string is shown as it is. Default is False.
      
     """
     
@@ -61,8 +155,102 @@ def append_cover(doc, title=None, author=None, date=True):
         doc.preamble.append(Command('title', title))
     if author is not None:
         doc.preamble.append(Command('author', author))
-    if date:
+    if isinstance(date, str):
+        doc.preamble.append(Command('date', date))
+    elif date:
         doc.preamble.append(Command('date', NoEscape(r'\today')))
     else:
         doc.preamble.append(NoEscape(r"\date{}"))
+    return doc
+
+
+_months_ = ('January', 'February', 'March', 'April', 'May', 'June', 'July',
+            'August', 'September', 'October', 'November', 'December')
+
+
+def format_date(epoch: int) -> str:
+    """
+    Returns a date the way '\\today' shows it, from the number of seconds
+    since the Unix epoch, in UTC. The result doesn't depend on the locale.
+
+    Example
+    -------
+    >>> from latexdocs.preamble import format_date
+    >>> format_date(0)
+    'January 1, 1970'
+
+    """
+    d = datetime.datetime.fromtimestamp(epoch, tz=datetime.timezone.utc)
+    return "{} {}, {}".format(_months_[d.month - 1], d.day, d.year)
+
+
+class _TrailerID(LatexObject):
+    # The commands that fix the trailer ID. Unless it is given, the ID is
+    # a hash of the rendered body of the document, that the document sets 
+    # with `set_body` before dumping the preamble. Without a body, only the
+    # seed is hashed.
+
+    def __init__(self, seed: str, trailerid: str = None):
+        super().__init__()
+        self.seed = seed
+        self.trailerid = trailerid
+        self.digest = None
+
+    def set_body(self, chunks: Iterable = None):
+        if chunks is None:
+            self.digest = None
+            return
+        h = hashlib.md5(self.seed.encode('utf-8'))
+        for chunk in chunks:
+            h.update(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+        self.digest = h.hexdigest().upper()
+
+    def dumps(self) -> str:
+        trailerid = self.trailerid if self.trailerid is not None else self.digest
+        if trailerid is None:
+            trailerid = hashlib.md5(self.seed.encode('utf-8')).hexdigest().upper()
+        return r"\ifdefined\pdftrailerid\pdftrailerid{" + trailerid + "}\\fi%\n" + \
+            r"\ifdefined\pdfvariable\pdfvariable trailerid{[<" + trailerid + \
+            "><" + trailerid + ">]}\\fi"
+
+
+def append_reproducible(doc, epoch: int, *args, title=None, author=None, 
+                        trailerid: str = None, **kwargs):
+    """
+    Appends the commands that make the output of the compilation 
+    reproducible: a fixed trailer ID, and no information about the file 
+    names and the versions of the tools. The commands are only executed 
+    by the engines that know them, `pdflatex` and `lualatex`. The dates 
+    in the pdf are fixed by setting `SOURCE_DATE_EPOCH` for the compiler, 
+    see :func:`latexdocs.compiler.reproducible_env`.
+
+    Parameters
+    ----------
+    epoch : int
+        The time the dates are pinned to, in seconds since the Unix epoch.
+
+    title : str, Optional
+        The title of the document. Default is None.
+
+    author : str, Optional
+        The author of the document. Default is None.
+
+    trailerid : str, Optional
+        The trailer ID, 32 hexadecimal digits. Default is None, which means 
+        the MD5 hash of the title, the author, the epoch and the body of the 
+        document, hence different documents get different IDs. The body is
+        only hashed by the documents of latexdocs, that render it before 
+        the preamble.
+
+    """
+    if trailerid is not None:
+        assert re.fullmatch(r"[0-9a-fA-F]{32}", trailerid), \
+            "The trailer ID must be 32 hexadecimal digits."
+        trailerid = trailerid.upper()
+    seed = repr((title, author, int(epoch)))
+    doc.preamble.append(_TrailerID(seed, trailerid))
+    doc.preamble.append(NoEscape(
+        r"\ifdefined\pdfsuppressptexinfo\pdfsuppressptexinfo=-1\relax\fi"))
+    doc.preamble.append(NoEscape(
+        r"\ifdefined\pdfvariable\pdfvariable suppressoptionalinfo 767\relax\fi"))
     return doc
\ No newline at end of file
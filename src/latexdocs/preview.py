@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+import re
+import html
+from typing import Iterable
+
+from pylatex.base_classes import LatexObject
+from pylatex.utils import NoEscape
+
+
+_mathjax_ = r"""<script>
+window.MathJax = {tex: {inlineMath: [['$', '$'], ['\\(', '\\)']],
+                        displayMath: [['$$', '$$'], ['\\[', '\\]']],
+                        processEnvironments: true},
+                  options: {ignoreHtmlClass: 'tex2jax_ignore'}};
+</script>
+<script async src="https://cdn.jsdelivr.net/npm/mathjax@3/es5/tex-mml-chtml.js"></script>
+"""
+
+_html_template_ = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+{mathjax}<style>
+body {{max-width: 50em; margin: auto; font-family: serif;}}
+table {{border-collapse: collapse; margin: 1em auto;}}
+td, th {{border: 1px solid #999; padding: 0.2em 0.6em;}}
+figure {{text-align: center;}}
+img {{max-width: 100%;}}
+pre.latex {{background: #f4f4f4; padding: 0.5em; overflow-x: auto;}}
+</style>
+</head>
+<body>
+{body}</body>
+</html>
+"""
+
+# MathJax skips the elements of this class, plain text goes into them, so that
+# dollar signs are shown as they are, like in the pdf
+_plain_class_ = 'tex2jax_ignore'
+
+# simple text formatting commands that have an equivalent in the previews
+_inline_pattern_ = re.compile(r"\\(textbf|textit|emph|texttt)\{([^{}]*)\}")
+
+
+class PreviewRenderer:
+    """
+    Base class for renderers that turn a document tree into a light-weight
+    preview, without a TeX installation. Items contribute to the preview
+    through their `_append2preview_` method, by calling the methods of the
+    renderer, the same way they contribute to a LaTeX document through
+    `_append2doc_`.
+
+    See Also
+    --------
+    :class:`HTMLRenderer`
+    :class:`MarkdownRenderer`
+
+    """
+
+    extension = None
+
+    def __init__(self, *args, **kwargs):
+        self._parts = []
+
+    def write(self, content: str):
+        """
+        Appends content to the output as is.
+
+        """
+        self._parts.append(content)
+
+    def append(self, item):
+        """
+        Appends an item of the content of a section to the preview.
+
+        """
+        if hasattr(item, '_append2preview_'):
+            item._append2preview_(self)
+        elif isinstance(item, NoEscape):
+            self.text(item, raw=True)
+        elif isinstance(item, str):
+            self.text(item)
+        elif isinstance(item, LatexObject):
+            self.latex(item.dumps())
+        elif item is not None:
+            self.text(str(item))
+
+    def heading(self, title: str, level: int):
+        """
+        Appends the title of a section. Level 1 means a section, 2 means
+        a subsection, etc.
+
+        """
+        raise NotImplementedError
+
+    def text(self, text: str, raw: bool = False):
+        """
+        Appends a paragraph. Raw text may contain LaTeX, like math or
+        simple formatting commands.
+
+        """
+        raise NotImplementedError
+
+    def table(self, columns: Iterable, rows: Iterable, caption: str = None):
+        """
+        Appends a table.
+
+        """
+        raise NotImplementedError
+
+    def image(self, filename: str, caption: str = None):
+        """
+        Appends a link to an image.
+
+        """
+        raise NotImplementedError
+
+    def latex(self, source: str):
+        """
+        Appends LaTeX that can't be previewed, as source code.
+
+        """
+        raise NotImplementedError
+
+    def code(self, source: str, language: str = None):
+        """
+        Appends a listing of source code.
+
+        """
+        raise NotImplementedError
+
+    def math(self, source: str):
+        """
+        Appends displayed math, like an 'align' environment or `\\[ ... \\]`,
+        to be rendered by the viewer.
+
+        """
+        raise NotImplementedError
+
+    def document(self, title: str = None, author: str = None) -> str:
+        """
+        Returns the whole preview with the title and the author on top.
+
+        """
+        raise NotImplementedError
+
+    def dumps(self) -> str:
+        """
+        Returns the content appended so far.
+
+        """
+        return ''.join(self._parts)
+
+
+class HTMLRenderer(PreviewRenderer):
+    """
+    Renders a standalone HTML page. Math is rendered by MathJax in the browser.
+
+    Parameters
+    ----------
+    mathjax : bool, Optional
+        If True, MathJax is loaded from a CDN. Default is True.
+
+    """
+
+    extension = 'html'
+
+    def __init__(self, *args, mathjax: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mathjax = mathjax
+
+    def _inline_(self, text: str, raw: bool) -> str:
+        text = html.escape(text, quote=False)
+        if raw:
+            tags = {'textbf': 'strong', 'textit': 'em', 'emph': 'em', 'texttt': 'code'}
+            text = _inline_pattern_.sub(
+                lambda m: "<{0}>{1}</{0}>".format(tags[m.group(1)], m.group(2)), text)
+        return text
+
+    def heading(self, title: str, level: int):
+        tag = 'h{}'.format(min(level + 1, 6))
+        self.write('<{0} class="{2}">{1}</{0}>\n'.format(
+            tag, html.escape(title), _plain_class_))
+
+    def text(self, text: str, raw: bool = False):
+        if raw:
+            self.write("<p>{}</p>\n".format(self._inline_(text, raw)))
+        else:
+            self.write('<p class="{}">{}</p>\n'.format(
+                _plain_class_, self._inline_(text, raw)))
+
+    def table(self, columns: Iterable, rows: Iterable, caption: str = None):
+        self.write('<table class="{}">\n'.format(_plain_class_))
+        if caption is not None:
+            self.write("<caption>{}</caption>\n".format(html.escape(caption)))
+        if columns is not None and len(columns) > 0:
+            cells = ''.join("<th>{}</th>".format(html.escape(str(c))) for c in columns)
+            self.write("<tr>{}</tr>\n".format(cells))
+        for row in rows:
+            cells = ''.join("<td>{}</td>".format(html.escape(str(c))) for c in row)
+            self.write("<tr>{}</tr>\n".format(cells))
+        self.write("</table>\n")
+
+    def image(self, filename: str, caption: str = None):
+        self.write('<figure><img src="{}">'.format(html.escape(filename)))
+        if caption is not None:
+            self.write('<figcaption class="{}">{}</figcaption>'.format(
+                _plain_class_, html.escape(caption)))
+        self.write("</figure>\n")
+
+    def latex(self, source: str):
+        self.write('<pre class="latex"><code>{}</code></pre>\n'.format(
+            html.escape(source, quote=False)))
+
+    def code(self, source: str, language: str = None):
+        self.write('<pre class="code"><code class="language-{}">{}</code></pre>\n'.format(
+            html.escape(language if language is not None else ''),
+            html.escape(source, quote=False)))
+
+    def math(self, source: str):
+        # MathJax reads the text of the element, the escapes are resolved
+        self.write('<div class="math">\n{}\n</div>\n'.format(
+            html.escape(source.strip('\n'), quote=False)))
+
+    def document(self, title: str = None, author: str = None) -> str:
+        head = ''
+        if title is not None:
+            head += '<h1 class="{}">{}</h1>\n'.format(_plain_class_, html.escape(title))
+        if author is not None:
+            head += '<p class="author {}">{}</p>\n'.format(_plain_class_, 
+                                                           html.escape(author))
+        return _html_template_.format(
+            title=html.escape(title if title is not None else ''),
+            mathjax=_mathjax_ if self.mathjax else '',
+            body=head + self.dumps(),
+        )
+
+
+class MarkdownRenderer(PreviewRenderer):
+    """
+    Renders Markdown. Math is left as is, to be rendered by the viewer
+    (like Jupyter, or any viewer with MathJax or KaTeX support).
+
+    """
+
+    extension = 'md'
+
+    def _inline_(self, text: str, raw: bool) -> str:
+        if raw:
+            marks = {'textbf': '**', 'textit': '*', 'emph': '*', 'texttt': '`'}
+            text = _inline_pattern_.sub(
+                lambda m: "{0}{1}{0}".format(marks[m.group(1)], m.group(2)), text)
+        else:
+            # dollar signs of plain text are not math
+            text = text.replace('$', '\\$')
+        return text
+
+    def heading(self, title: str, level: int):
+        self.write("{} {}\n\n".format('#' * min(level + 1, 6), 
+                                        self._inline_(title, False)))
+
+    def text(self, text: str, raw: bool = False):
+        # indented lines would turn into code blocks
+        lines = self._inline_(text, raw).strip().splitlines()
+        self.write("{}\n\n".format('\n'.join(line.strip() for line in lines)))
+
+    def table(self, columns: Iterable, rows: Iterable, caption: str = None):
+        rows = [[self._inline_(str(c), False).replace('|', r'\|') for c in row] 
+                for row in rows]
+        if columns is None or len(columns) == 0:
+            ncols = max(map(len, rows)) if len(rows) > 0 else 0
+            columns = [''] * ncols
+        columns = [self._inline_(str(c), False).replace('|', r'\|') for c in columns]
+        lines = ["| " + " | ".join(columns) + " |",
+                 "|" + "|".join(['---'] * len(columns)) + "|"]
+        lines += ["| " + " | ".join(row) + " |" for row in rows]
+        if caption is not None:
+            lines += ["", "*{}*".format(caption)]
+        self.write('\n'.join(lines) + "\n\n")
+
+    def image(self, filename: str, caption: str = None):
+        self.write("![{}]({})\n\n".format(caption if caption is not None else '',
+                                         filename))
+
+    def latex(self, source: str):
+        self.write("```latex\n{}\n```\n\n".format(source.strip('\n')))
+
+    def code(self, source: str, language: str = None):
+        self.write("```{}\n{}\n```\n\n".format(
+            language if language is not None else '', source.strip('\n')))
+
+    def math(self, source: str):
+        self.write("{}\n\n".format(source.strip('\n')))
+
+    def document(self, title: str = None, author: str = None) -> str:
+        head = ''
+        if title is not None:
+            head += "# {}\n\n".format(title)
+        if author is not None:
+            head += "*{}*\n\n".format(author)
+        return head + self.dumps()
+
+
+_renderers_ = {
+    'html': HTMLRenderer,
+    'markdown': MarkdownRenderer,
+    'md': MarkdownRenderer,
+}
+
+
+def get_renderer(fmt: str = 'html', *args, **kwargs) -> PreviewRenderer:
+    """
+    Returns a renderer for a format. Possible values are 'html', 'markdown'
+    and 'md'. Extra arguments are forwarded to the renderer.
+
+    """
+    if fmt not in _renderers_:
+        raise NotImplementedError("Unknown preview format '{}'.".format(fmt))
+    return _renderers_[fmt](*args, **kwargs)
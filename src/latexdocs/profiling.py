@@ -0,0 +1,286 @@
+# -*- coding: utf-8 -*-
+import os
+import json
+import time
+import threading
+import tracemalloc
+from contextlib import contextmanager
+
+from pylatex.utils import dumps_list
+
+
+class ProfileRecord:
+    """
+    Measurements related to a single node or item of a document tree.
+
+    Parameters
+    ----------
+    path : tuple
+        The address of the node in the document tree. Items are identified
+        by their class name and their position in the content of the node.
+
+    kind : str
+        The kind of the measured operation ('init', 'node', 'item' or
+        'fragment').
+
+    start : float
+        The time of the start of the operation in seconds, relative to the
+        start of the profiling session.
+
+    duration : float
+        Wall time in seconds.
+
+    nbytes : int
+        The number of bytes emitted by the operation.
+
+    allocated : int
+        Net number of bytes allocated during the operation. Only available
+        if allocations are traced, otherwise it is zero.
+
+    """
+
+    __slots__ = ('path', 'kind', 'start', 'duration', 'nbytes', 'allocated')
+
+    def __init__(self, path, kind, start, duration, nbytes=0, allocated=0):
+        self.path = tuple(path)
+        self.kind = kind
+        self.start = start
+        self.duration = duration
+        self.nbytes = nbytes
+        self.allocated = allocated
+
+    @property
+    def name(self) -> str:
+        """
+        Returns a human readable name of the record.
+
+        """
+        return ' / '.join(map(str, self.path)) if len(self.path) > 0 else '<root>'
+
+    def to_dict(self) -> dict:
+        """
+        Returns the record as a dictionary.
+
+        """
+        return {
+            'path': list(self.path),
+            'kind': self.kind,
+            'start': self.start,
+            'duration': self.duration,
+            'nbytes': self.nbytes,
+            'allocated': self.allocated,
+        }
+
+
+class BuildProfiler:
+    """
+    An opt-in profiler for the build phase of a document. It records wall time,
+    the number of emitted bytes and optionally allocations for every node and
+    item of the document tree.
+
+    Parameters
+    ----------
+    allocations : bool, Optional
+        If True, allocations are traced using :mod:`tracemalloc`. This slows down
+        the build considerably. Default is False.
+
+    nbytes : bool, Optional
+        If True, the number of emitted bytes is measured for every record.
+        This requires the emitted content to be dumped, but the time it takes
+        is not added to the measured durations. Default is True.
+
+    Example
+    -------
+    >>> from latexdocs import Document, BuildProfiler
+    >>> doc = Document(title='Title', author='Author', date=True)
+    >>> doc['Section 1', 'Subsection'].append('Some regular text')
+    >>> profiler = BuildProfiler()
+    >>> doc.build(profiler=profiler)
+    >>> print(profiler.report())
+    >>> profiler.to_chrome_trace('build_trace.json')
+
+    """
+
+    def __init__(self, *args, allocations=False, nbytes=True, **kwargs):
+        self.allocations = allocations
+        self.nbytes = nbytes
+        self._records = []
+        self._origin = None
+        self._tracing = False
+
+    @property
+    def records(self) -> list:
+        """
+        Returns the list of recorded measurements.
+
+        """
+        return self._records
+
+    def clear(self):
+        """
+        Removes all previously recorded measurements.
+
+        """
+        self._records = []
+        self._origin = None
+
+    @contextmanager
+    def running(self):
+        """
+        Context manager for a profiling session. Starts and stops the tracing
+        of allocations if necessary.
+
+        """
+        if self._origin is None:
+            self._origin = time.perf_counter()
+        started = False
+        if self.allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started = True
+        self._tracing = self.allocations and tracemalloc.is_tracing()
+        try:
+            yield self
+        finally:
+            if started:
+                tracemalloc.stop()
+            self._tracing = False
+
+    @contextmanager
+    def record(self, path, doc=None, kind='node'):
+        """
+        Measures the block inside the context. If a document is provided, the
+        content appended to it inside the block is measured as well.
+
+        Parameters
+        ----------
+        path : Iterable
+            The address of the node.
+
+        doc : :class:`pylatex.base_classes.Container`, Optional
+            The container the content is emitted into. Default is None.
+
+        kind : str, Optional
+            The kind of the operation. Default is 'node'.
+
+        """
+        if self._origin is None:
+            self._origin = time.perf_counter()
+        data = doc.data if doc is not None else None
+        n0 = len(data) if data is not None else 0
+        m0 = tracemalloc.get_traced_memory()[0] if self._tracing else 0
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            t1 = time.perf_counter()
+            m1 = tracemalloc.get_traced_memory()[0] if self._tracing else 0
+            nbytes = 0
+            if self.nbytes and data is not None and len(data) > n0:
+                content = dumps_list(data[n0:], escape=doc.escape)
+                nbytes = len(content.encode('utf-8'))
+            self._records.append(
+                ProfileRecord(path, kind, t0 - self._origin, t1 - t0,
+                              nbytes, max(m1 - m0, 0))
+            )
+
+    def add(self, path, kind, duration, nbytes=0, allocated=0):
+        """
+        Adds a record measured elsewhere, for instance in another process.
+        The start of the record is the moment of the call minus the duration.
+
+        """
+        now = time.perf_counter()
+        if self._origin is None:
+            self._origin = now - duration
+        start = now - duration - self._origin
+        self._records.append(
+            ProfileRecord(path, kind, start, duration, nbytes, allocated))
+
+    def summary(self, *args, sort='duration', kind=None, **kwargs) -> list:
+        """
+        Returns the records as a list of dictionaries, sorted in
+        descending order.
+
+        Parameters
+        ----------
+        sort : str, Optional
+            The key to sort by. Possible values are 'duration', 'nbytes' and
+            'allocated'. Default is 'duration'.
+
+        kind : str or Iterable, Optional
+            If provided, only records of these kinds are returned. Default is None.
+
+        """
+        assert sort in ('duration', 'nbytes', 'allocated'), \
+            "Invalid sorting key '{}'".format(sort)
+        records = self._records
+        if kind is not None:
+            kind = (kind,) if isinstance(kind, str) else tuple(kind)
+            records = filter(lambda r: r.kind in kind, records)
+        records = sorted(records, key=lambda r: getattr(r, sort), reverse=True)
+        return [r.to_dict() for r in records]
+
+    def report(self, *args, sort='duration', limit=None, **kwargs) -> str:
+        """
+        Returns a human readable report of the measurements, sorted
+        in descending order.
+
+        Parameters
+        ----------
+        sort : str, Optional
+            The key to sort by. See :func:`summary` for the possible values.
+            Default is 'duration'.
+
+        limit : int, Optional
+            The maximum number of rows. Default is None.
+
+        """
+        rows = self.summary(sort=sort, **kwargs)
+        if limit is not None:
+            rows = rows[:limit]
+        header = "{:>12} {:>12} {:>12}  {:<5} {}".format(
+            'time [ms]', 'bytes', 'alloc [B]', 'kind', 'path')
+        lines = [header, '-' * len(header)]
+        for r in rows:
+            name = ' / '.join(map(str, r['path'])) if len(r['path']) > 0 else '<root>'
+            lines.append("{:>12.3f} {:>12d} {:>12d}  {:<5} {}".format(
+                r['duration'] * 1e3, r['nbytes'], r['allocated'], r['kind'], name))
+        return '\n'.join(lines)
+
+    def to_json(self, path=None, **kwargs) -> str:
+        """
+        Exports the records in JSON format. If a path is provided, the
+        result is also written to the filesystem.
+
+        """
+        content = json.dumps({'records': self.summary(**kwargs)}, indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(content)
+        return content
+
+    def to_chrome_trace(self, path=None) -> str:
+        """
+        Exports the records in the Chrome trace event format, which can be
+        opened with `chrome://tracing` or Perfetto. If a path is provided, the
+        result is also written to the filesystem.
+
+        """
+        pid, tid = os.getpid(), threading.get_ident()
+        events = []
+        for r in self._records:
+            events.append({
+                'name': r.name,
+                'cat': r.kind,
+                'ph': 'X',
+                'ts': r.start * 1e6,
+                'dur': r.duration * 1e6,
+                'pid': pid,
+                'tid': tid,
+                'args': {'nbytes': r.nbytes, 'allocated': r.allocated},
+            })
+        content = json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms'})
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(content)
+        return content
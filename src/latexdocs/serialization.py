@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+import io
+import pickle
+import struct
+from typing import Union
+
+import numpy as np
+
+
+_MAGIC_ = b'LTXDOCS\x00'
+_VERSION_ = 1
+_HEADER_ = struct.Struct('<8sIQQ')
+_ALIGNMENT_ = 64
+
+
+def _align_(n: int) -> int:
+    return (n + _ALIGNMENT_ - 1) // _ALIGNMENT_ * _ALIGNMENT_
+
+
+class _Pickler(pickle.Pickler):
+    """
+    A pickler that stores numerical arrays out-of-band.
+    """
+
+    def __init__(self, file, arrays: list, threshold: int = 0):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._arrays = arrays
+        self._ids = {}
+        self._threshold = threshold
+
+    def persistent_id(self, obj):
+        if type(obj) is np.ndarray or isinstance(obj, np.memmap):
+            if obj.dtype.hasobject or obj.dtype.names is not None:
+                return None
+            if obj.nbytes < self._threshold:
+                return None
+            key = id(obj)
+            if key not in self._ids:
+                self._ids[key] = len(self._arrays)
+                self._arrays.append(obj)
+            return ('ndarray', self._ids[key])
+        return None
+
+
+class _Unpickler(pickle.Unpickler):
+
+    def __init__(self, file, buffer, meta: list, offset: int):
+        super().__init__(file)
+        self._buffer = buffer
+        self._meta = meta
+        self._offset = offset
+
+    def persistent_load(self, pid):
+        kind, index = pid
+        if kind != 'ndarray':
+            raise pickle.UnpicklingError("Unknown persistent id '{}'".format(kind))
+        offset, dtype, shape = self._meta[index]
+        return np.ndarray(shape, dtype=np.dtype(dtype), buffer=self._buffer,
+                          offset=self._offset + offset)
+
+
+def dumpb(obj, path: str = None, *args, threshold: int = 0, **kwargs) -> Union[bytes, None]:
+    """
+    Serializes an object in a compact binary format. Arrays are stored
+    out-of-band as raw, aligned buffers after the pickled object, which allows
+    them to be memory-mapped when loaded.
+
+    Parameters
+    ----------
+    obj : object
+        The object to serialize, typically the root of a document.
+
+    path : str, Optional
+        The path of the output file. If not provided, the serialized data is
+        returned as bytes. Default is None.
+
+    threshold : int, Optional
+        Arrays smaller than this in bytes are pickled inline. Default is 0.
+
+    Returns
+    -------
+    bytes or None
+        The serialized data, if `path` is None.
+
+    See Also
+    --------
+    :func:`loadb`
+
+    """
+    arrays = []
+    buffer = io.BytesIO()
+    _Pickler(buffer, arrays, threshold).dump(obj)
+    tree = buffer.getvalue()
+
+    arrays = [np.ascontiguousarray(a) for a in arrays]
+    layout, offset = [], 0
+    for a in arrays:
+        offset = _align_(offset)
+        layout.append((offset, a.dtype.str, a.shape))
+        offset += a.nbytes
+    meta = pickle.dumps(layout, protocol=pickle.HIGHEST_PROTOCOL)
+    head = _HEADER_.pack(_MAGIC_, _VERSION_, len(tree), len(meta))
+
+    def write(f):
+        f.write(head)
+        f.write(tree)
+        f.write(meta)
+        position = len(head) + len(tree) + len(meta)
+        start = _align_(position)
+        f.write(b'\x00' * (start - position))
+        position = 0
+        for (offset, _, _), a in zip(layout, arrays):
+            f.write(b'\x00' * (offset - position))
+            f.write(a.reshape(-1).view(np.uint8))
+            position = offset + a.nbytes
+
+    if path is None:
+        out = io.BytesIO()
+        write(out)
+        return out.getvalue()
+    with open(path, 'wb') as f:
+        write(f)
+
+
+def loadb(source, *args, mmap: bool = True, **kwargs):
+    """
+    Loads an object serialized with :func:`dumpb`. Arrays are not read into
+    memory but are returned as read-only views of the source, hence the time
+    of loading is proportional to the size of the object skeleton and not to
+    the size of the numerical data.
+
+    Parameters
+    ----------
+    source : str or bytes
+        A path to a file or the serialized data.
+
+    mmap : bool, Optional
+        If True and the source is a file, it gets memory-mapped, otherwise
+        it is read into memory. Default is True.
+
+    Warnings
+    --------
+    The skeleton of the object is unpickled, hence loading untrusted data
+    can execute arbitrary code, just like :func:`pickle.loads`. Only load 
+    data you trust.
+
+    See Also
+    --------
+    :func:`dumpb`
+
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        buffer = np.frombuffer(source, dtype=np.uint8)
+    elif mmap:
+        buffer = np.memmap(source, dtype=np.uint8, mode='r')
+    else:
+        with open(source, 'rb') as f:
+            buffer = np.frombuffer(f.read(), dtype=np.uint8)
+
+    size = _HEADER_.size
+    magic, version, ntree, nmeta = _HEADER_.unpack(bytes(buffer[:size]))
+    if magic != _MAGIC_:
+        raise ValueError("The source is not a serialized latexdocs object.")
+    if version > _VERSION_:
+        raise ValueError("Unsupported format version {}.".format(version))
+    tree = bytes(buffer[size: size + ntree])
+    meta = pickle.loads(bytes(buffer[size + ntree: size + ntree + nmeta]))
+    start = _align_(size + ntree + nmeta)
+    return _Unpickler(io.BytesIO(tree), buffer, meta, start).load()
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+import os
+import csv
+import json
+
+from pylatex.utils import NoEscape
+
+from .document import Document, Article, Book
+from .items import Text, PlainText, Image, Equations
+from .table import Table, TableX
+from .listing import CodeListing
+
+
+__spec__extensions__ = ('.json', '.yaml', '.yml')
+
+_document_classes_ = {
+    'document': Document,
+    'article': Article,
+    'book': Book,
+}
+
+
+def _text_(spec: dict, basedir: str):
+    return Text(spec.pop('text'), **spec)
+
+
+def _plaintext_(spec: dict, basedir: str):
+    return PlainText(spec.pop('text'), **spec)
+
+
+def _table_(cls):
+    def make(spec: dict, basedir: str):
+        path = spec.pop('csv', None)
+        if path is not None:
+            with open(os.path.join(basedir, path), 'r', newline='') as f:
+                rows = list(csv.reader(f))
+            if spec.get('columns', None) is None:
+                spec['columns'], rows = rows[0], rows[1:]
+            spec['data'] = rows
+        return cls(spec.pop('table_spec', None), **spec)
+    return make
+
+
+def _image_(spec: dict, basedir: str):
+    filename = os.path.join(basedir, spec.pop('filename'))
+    return Image(filename=filename.replace('\\', '/'), **spec)
+
+
+def _equations_(spec: dict, basedir: str):
+    return Equations(spec.pop('lhs'), spec.pop('rhs', None), **spec)
+
+
+def _code_(spec: dict, basedir: str):
+    if 'filename' in spec:
+        spec['filename'] = os.path.join(basedir, spec['filename'])
+    return CodeListing(spec.pop('source', None), **spec)
+
+
+def _latex_(spec: dict, basedir: str):
+    return NoEscape(spec['source'])
+
+
+_item_types_ = {
+    'text': _text_,
+    'plaintext': _plaintext_,
+    'table': _table_(Table),
+    'tablex': _table_(TableX),
+    'image': _image_,
+    'code': _code_,
+    'equations': _equations_,
+    'latex': _latex_,
+}
+
+
+def item_from_spec(spec, basedir: str = None):
+    """
+    Returns an item from its description. A string is returned as it is,
+    a dictionary is turned into an item according to its 'type', which
+    can be 'text', 'plaintext', 'table', 'tablex', 'image', 'code',
+    'equations' or 'latex'.
+    The rest of the keys are forwarded to the class of the item.
+
+    Parameters
+    ----------
+    spec : str or dict
+        The description of the item.
+
+    basedir : str, Optional
+        The directory that relative paths are relative to. Default is None,
+        which means the current working directory.
+
+    Example
+    -------
+    >>> from latexdocs.spec import item_from_spec
+    >>> table = item_from_spec({'type': 'table', 'columns': ['A', 'B'],
+    >>>                         'data': [[1, 2], [3, 4]], 'caption': 'A table.'})
+
+    """
+    if isinstance(spec, str):
+        return spec
+    spec = dict(spec)
+    kind = spec.pop('type', None)
+    if kind not in _item_types_:
+        raise NotImplementedError("Unknown item type '{}'.".format(kind))
+    basedir = os.getcwd() if basedir is None else basedir
+    return _item_types_[kind](spec, basedir)
+
+
+def _append_section_(node, spec, basedir: str):
+    if isinstance(spec, list):
+        spec = {'content': spec}
+    for item in spec.get('content', []):
+        node.append(item_from_spec(item, basedir))
+    for title, subspec in spec.get('sections', {}).items():
+        _append_section_(node[title], subspec, basedir)
+
+
+def from_spec(spec: dict, basedir: str = None) -> Document:
+    """
+    Returns a document from a declarative description. The description is
+    a dictionary with the optional keys 'class' ('document', 'article' or
+    'book'), 'title', 'author', 'date', 'geometry_options',
+    'extra_packages' and 'reproducible', the content of the root in
+    'content', and the sections in 'sections'. A section maps the title to either a list of
+    items, or a dictionary with 'content' and 'sections'. See
+    :func:`item_from_spec` for the description of the items.
+
+    Parameters
+    ----------
+    spec : dict
+        The description of the document.
+
+    basedir : str, Optional
+        The directory that relative paths are relative to. Default is None,
+        which means the current working directory.
+
+    Example
+    -------
+    >>> from latexdocs.spec import from_spec
+    >>> doc = from_spec({
+    >>>     'title': 'Title',
+    >>>     'author': 'Author',
+    >>>     'sections': {
+    >>>         'Introduction': ['Some regular text.'],
+    >>>         'Results': {
+    >>>             'content': [{'type': 'image', 'filename': 'image.png'}],
+    >>>             'sections': {'Details': [{'type': 'text', 'text': '$x^2$'}]}
+    >>>         }
+    >>>     }
+    >>> })
+
+    """
+    kind = spec.get('class', 'document')
+    if kind not in _document_classes_:
+        raise NotImplementedError("Unknown document class '{}'.".format(kind))
+    kwargs = {k: spec[k] for k in ('title', 'author', 'date', 'geometry_options',
+                                   'extra_packages', 'reproducible') if k in spec}
+    doc = _document_classes_[kind](**kwargs)
+    _append_section_(doc, spec, os.getcwd() if basedir is None else basedir)
+    return doc
+
+
+def load_spec(path: str) -> dict:
+    """
+    Reads the description of a document from a JSON or YAML file.
+    Reading YAML files requires PyYAML.
+
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in __spec__extensions__:
+        raise NotImplementedError("Unknown spec format '{}'.".format(ext))
+    with open(path, 'r', encoding='utf-8') as f:
+        if ext == '.json':
+            return json.load(f)
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("You need PyYAML to read YAML specs.")
+        return yaml.safe_load(f)
+
+
+def read_document(path: str) -> Document:
+    """
+    Returns a document from a JSON or YAML file. Relative paths in the file
+    are relative to the directory of the file. See :func:`from_spec` for
+    the format.
+
+    Example
+    -------
+    >>> from latexdocs.spec import read_document
+    >>> doc = read_document('report.json')
+    >>> doc.generate_pdf('report')
+
+    """
+    basedir = os.path.dirname(os.path.abspath(path))
+    return from_spec(load_spec(path), basedir=basedir)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+import tempfile
+from typing import Iterator, Union
+
+
+class SpillBuffer:
+    """
+    A write-only buffer for rendered TeX fragments with a memory budget. 
+    The content is kept in memory until it exceeds the budget, after which 
+    everything is moved to a temporary file and subsequent writes go straight 
+    to disk. The content can be read back in chunks, hence the memory used
+    is bounded regardless of the size of the content.
+
+    Parameters
+    ----------
+    budget : int, Optional
+        The maximum number of bytes kept in memory. Default is 64 MB.
+
+    dir : str, Optional
+        The directory of the temporary file. Default is None, which means 
+        the default temporary directory of the system.
+
+    Example
+    -------
+    >>> from latexdocs.spill import SpillBuffer
+    >>> with SpillBuffer(budget=1024) as buffer:
+    >>>     buffer.write('Some regular text')
+    >>>     content = b''.join(buffer.chunks())
+
+    """
+
+    def __init__(self, budget: int = 64 * 1024 * 1024, *args, dir: str = None, 
+                 **kwargs):
+        assert budget >= 0, "The budget must be a non-negative integer."
+        self.budget = budget
+        self._file = tempfile.SpooledTemporaryFile(max_size=budget, mode='w+b', 
+                                                   dir=dir)
+        if budget == 0:
+            # a zero size means no limit for the spooled file
+            self._file.rollover()
+        self._nbytes = 0
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns the number of bytes written so far.
+
+        """
+        return self._nbytes
+
+    @property
+    def spilled(self) -> bool:
+        """
+        Returns `True` if the content has been moved to the disk.
+
+        """
+        return self.budget == 0 or self._nbytes > self.budget
+
+    def write(self, content: Union[str, bytes]) -> int:
+        """
+        Appends content to the buffer and returns the number of bytes 
+        written. Strings are encoded using UTF-8.
+
+        """
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        self._file.write(data)
+        self._nbytes += len(data)
+        return len(data)
+
+    def chunks(self, size: int = 1024 * 1024) -> Iterator[bytes]:
+        """
+        Yields the content of the buffer in chunks of at most `size` bytes.
+
+        """
+        self._file.seek(0)
+        try:
+            while True:
+                chunk = self._file.read(size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            self._file.seek(0, 2)
+
+    def close(self):
+        """
+        Releases the memory and removes the temporary file, if there is one.
+
+        """
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 from typing import Iterable
+from copy import copy
 import pylatex as pltx
+from pylatex.errors import TableRowSizeError
 import numpy as np
 
 from .items import BaseTexDocItem
-from .utils import float_to_str_sig
+from .utils import float_to_str_sig, _escape_strings_
+from .cache import state_hash
 
 
 class Table(BaseTexDocItem):
@@ -115,23 +118,53 @@ class Table(BaseTexDocItem):
         """
         self._table.add_empty_row()
 
+    def _cache_key_(self):
+        # the rows added by hand are part of the underlying table
+        return state_hash(self.__class__.__name__, self._table.dumps(), self._data,
+                          self._columns, self._caption, self._hlines, 
+                          self._centering, self._pos, self._label)
+
+    def required_packages(self) -> set:
+        packages = super().required_packages()
+        if 'H' in self._pos:
+            packages.add('float')
+        return packages
+
     def _append2doc_(self, doc, *args, **kwargs):        
         before = r"\begin{}[{}]".format(r'{table}', self._pos)        
         if self._centering:
             before += r"\centering"
         doc.append(pltx.NoEscape(before))
         
+        table = self._table
         if self._data is not None:
-            self._table.add_hline()
-            self._table.add_row(self._columns)
-            self._table.add_hline()
-            nR, _ = self._data.shape
-            for iR in range(nR):
-                self._table.add_row(self._data[iR])
-                if self._hlines:
-                    self._table.add_hline()
-            self._table.add_hline()
-        doc.append(pltx.NoEscape(self._table.dumps()))
+            # the rows are added to a copy, to allow for repeated builds
+            table = copy(self._table)
+            table.data = table.real_data = list(self._table.data)
+            table.add_hline()
+            table.add_row(self._columns)
+            table.add_hline()
+            nR, nC = self._data.shape
+            if self._data.dtype.hasobject:
+                # the cells may be LaTeX objects
+                for iR in range(nR):
+                    table.add_row(self._data[iR])
+                    if self._hlines:
+                        table.add_hline()
+            else:
+                if nC != table.width:
+                    raise TableRowSizeError(
+                        "Number of cells added to table ({}) did not match "
+                        "table width ({})".format(nC, table.width))
+                # the cells are escaped at once, not one by one
+                cells = _escape_strings_(self._data.astype(str).ravel().tolist())
+                for iR in range(nR):
+                    row = '&'.join(cells[iR * nC: (iR + 1) * nC]) + r"\\"
+                    table.append(pltx.NoEscape(row))
+                    if self._hlines:
+                        table.add_hline()
+            table.add_hline()
+        doc.append(pltx.NoEscape(table.dumps()))
             
         after = ""
         if self._caption is not None:
@@ -145,6 +178,13 @@ class Table(BaseTexDocItem):
         
         return doc
 
+    def _append2preview_(self, renderer, *args, **kwargs):
+        if self._data is None:
+            # rows added by hand are only available as LaTeX
+            return super()._append2preview_(renderer, *args, **kwargs)
+        columns = list(self._columns) if self._columns is not None else None
+        renderer.table(columns, self._data.tolist(), caption=self._caption)
+
 
 class TableX(Table):
     """
@@ -163,3 +203,4 @@ class TableX(Table):
     """
     
     _tlbcls_ = pltx.Tabularx
+    _packages_ = ('tabularx',)
@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+import binascii
+from typing import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+
+from pylatex import Package
+from pylatex.base_classes import LatexObject, Container
+from pylatex.base_classes.containers import Fragment
+from pylatex.utils import NoEscape, escape_latex
+
+from .items import BaseTexDocItem
+from .preamble import packages_of, scan_packages
+from .compiler import compile_tex, clean_aux
+from .output import write_file
+
+
+# Slots are marked with letters and digits only, so that the markers survive
+# escaping. The last character tells if the value is to be escaped or not.
+_slot_pattern_ = re.compile(r"LTXDSLOT([0-9a-f]+)([ER])")
+_package_pattern_ = re.compile(r"\\usepackage(?:\[[^\]]*\])?\{([^}]*)\}")
+_begin_document_ = '\\begin{document}'
+
+
+def slot(name: str, *args, escape: bool = True, **kwargs) -> str:
+    """
+    Returns a marker for a variable part of a template, to be used in
+    strings, like the title of the document, a paragraph or the cells of
+    a table.
+
+    Parameters
+    ----------
+    name : str
+        The name of the slot, the key of the value in the records.
+
+    escape : bool, Optional
+        If True, string values are escaped. Default is True.
+
+    Example
+    -------
+    >>> from latexdocs import Document
+    >>> from latexdocs.template import slot
+    >>> doc = Document(title='Statement')
+    >>> doc['Summary'].append('Dear ' + slot('name') + ',')
+
+    """
+    code = binascii.hexlify(name.encode('utf-8')).decode('ascii')
+    return 'LTXDSLOT' + code + ('E' if escape else 'R')
+
+
+def _package_names_(tex: str) -> set:
+    # the names of the packages loaded by some LaTeX
+    return {name.strip() for m in _package_pattern_.finditer(tex) 
+            for name in m.group(1).split(',')}
+
+
+def _format_(value, escape: bool) -> tuple:
+    # the LaTeX of a value, and the `usepackage` commands it needs
+    if hasattr(value, '_append2doc_'):
+        fragment = Fragment()
+        value._append2doc_(fragment, nosection=True)
+        tex = fragment.dumps()
+        fragment._propagate_packages()
+        packages = [p.dumps() for p in fragment.packages]
+    elif isinstance(value, LatexObject):
+        tex = value.dumps()
+        if isinstance(value, Container):
+            value._propagate_packages()
+        packages = [p.dumps() for p in value.packages]
+    elif isinstance(value, NoEscape) or not escape:
+        tex = str(value)
+        packages = []
+    else:
+        return escape_latex(str(value)), []
+    names = packages_of(value) if not isinstance(value, str) else scan_packages(tex)
+    packages += [Package(name).dumps() for name in sorted(names)]
+    return tex, packages
+
+
+class Placeholder(BaseTexDocItem):
+    """
+    A variable part of a template, that is filled in by the value in the
+    records with the same name. The value can be a string, a number or any
+    item, like a :class:`latexdocs.Table`.
+
+    Parameters
+    ----------
+    name : str
+        The name of the slot, the key of the value in the records.
+
+    escape : bool, Optional
+        If True, string values are escaped. Default is True.
+
+    packages : Iterable, Optional
+        The names of the LaTeX packages the values need, since they are not
+        known when the template is built. Default is None.
+
+    Example
+    -------
+    >>> from latexdocs import Document, Placeholder
+    >>> doc = Document(title='Statement')
+    >>> doc['Transactions'].append(Placeholder('transactions'))
+
+    """
+
+    def __init__(self, name: str, *args, escape: bool = True,
+                 packages: Iterable = None, **kwargs):
+        super().__init__(**kwargs)
+        self.slot = name
+        self.escape = escape
+        self._required_ = set(packages) if packages is not None else set()
+
+    @property
+    def marker(self) -> str:
+        """
+        Returns the marker of the slot.
+
+        """
+        return slot(self.slot, escape=self.escape)
+
+    def required_packages(self) -> set:
+        return super().required_packages() | self._required_
+
+    def _append2doc_(self, doc, *args, **kwargs):
+        doc.append(NoEscape(self.marker))
+        return doc
+
+    def _append2preview_(self, renderer, *args, **kwargs):
+        renderer.text("{{{}}}".format(self.slot))
+
+
+class Template:
+    """
+    A document that is built once and rendered against many records. The
+    static parts are rendered to TeX when the template is created, and only
+    the slots are formatted for every record. The packages the values need
+    are added to the preamble, if the template doesn't load them already.
+
+    Parameters
+    ----------
+    doc : :class:`latexdocs.document.BaseTexDoc`
+        The root of a document with placeholders.
+
+    kwargs : tuple, Optional
+        Extra kyeword arguments are forwarded to the `build` method of
+        the document.
+
+    Example
+    -------
+    >>> from latexdocs import Document, Placeholder, Table, Template
+    >>> from latexdocs.template import slot
+    >>> doc = Document(title='Statement')
+    >>> doc['Summary'].append('Dear ' + slot('name') + ',')
+    >>> doc['Transactions'].append(Placeholder('transactions'))
+    >>> template = Template(doc)
+    >>> records = [
+    >>>     {'name': 'Alice', 'transactions': Table(data=[[1, 2]], columns=['A', 'B'])},
+    >>>     {'name': 'Bob', 'transactions': Table(data=[[3, 4]], columns=['A', 'B'])},
+    >>> ]
+    >>> results = template.generate_pdfs(records, ['alice', 'bob'])
+
+    """
+
+    def __init__(self, doc, *args, **kwargs):
+        tex = doc.build(**kwargs).dumps()
+        parts = _slot_pattern_.split(tex)
+        # static chunks alternate with the names and the flags of the slots
+        self._chunks = parts[0::3]
+        self._slots = [
+            (binascii.unhexlify(code).decode('utf-8'), flag == 'E')
+            for code, flag in zip(parts[1::3], parts[2::3])
+        ]
+        # the packages of the values go right before the body
+        self._head = next(i for i, c in enumerate(self._chunks) 
+                          if _begin_document_ in c)
+        self._packages = _package_names_(tex.split(_begin_document_, 1)[0])
+
+    @property
+    def names(self) -> set:
+        """
+        Returns the names of the slots.
+
+        """
+        return {name for name, _ in self._slots}
+
+    def render(self, record: dict) -> str:
+        """
+        Returns the content of the tex file for a record.
+
+        Parameters
+        ----------
+        record : dict
+            A dictionary with a value for all the slots.
+
+        """
+        chunks = self._chunks
+        cache = {}
+        packages = {}
+        out = [chunks[0]]
+        for i, (name, escape) in enumerate(self._slots):
+            key = (name, escape)
+            if key not in cache:
+                cache[key], required = _format_(record[name], escape)
+                for p in required:
+                    if not _package_names_(p) <= self._packages:
+                        packages[p] = None
+            out.append(cache[key])
+            out.append(chunks[i + 1])
+        if len(packages) > 0:
+            # the static chunks are at the even positions
+            head, body = out[2 * self._head].split(_begin_document_, 1)
+            out[2 * self._head] = head + '%\n'.join(packages) + '%\n' + \
+                _begin_document_ + body
+        return ''.join(out)
+
+    def render_many(self, records: Iterable[dict]) -> Iterator[str]:
+        """
+        Yields the contents of the tex files for many records.
+
+        """
+        for record in records:
+            yield self.render(record)
+
+    def generate_pdfs(self, records: Iterable[dict], filepaths: Iterable[str],
+                      *args, pool=None, workers: int = None, clean: bool = True,
+                      **kwargs) -> list:
+        """
+        Generates a pdf for every record and returns the results of the
+        compilations in the same order.
+
+        Parameters
+        ----------
+        records : Iterable[dict]
+            The records.
+
+        filepaths : Iterable[str]
+            The paths of the documents, without extensions.
+
+        pool : :class:`latexdocs.pool.TexWorkerPool`, Optional
+            If provided, the compilations are dispatched to a pool of warm
+            TeX workers. Default is None.
+
+        workers : int, Optional
+            The number of concurrent compilations, if no pool is provided.
+            Default is None, which means one compilation at a time.
+
+        clean : bool, Optional
+            Whether the auxiliary files should be removed. Default is True.
+
+        kwargs : tuple, Optional
+            Extra keyword arguments are forwarded to
+            :func:`latexdocs.compiler.compile_tex`.
+
+        Returns
+        -------
+        list
+            A list of :class:`latexdocs.compiler.CompileResult` instances.
+
+        """
+        jobs = zip(self.render_many(records), filepaths)
+        if pool is not None:
+            futures = [pool.submit(tex, os.path.abspath(path),
+                                   inputpath=os.path.dirname(os.path.abspath(path)))
+                       for tex, path in jobs]
+            return [f.result() for f in futures]
+
+        def run(job):
+            tex, path = job
+            write_file(path + '.tex', tex, only_if_changed=False)
+            result = compile_tex(path, **kwargs)
+            if clean:
+                clean_aux(path)
+            return result
+
+        if workers is None or workers <= 1:
+            return [run(job) for job in jobs]
+        with ThreadPoolExecutor(workers) as executor:
+            return list(executor.map(run, jobs))
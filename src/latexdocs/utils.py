@@ -3,16 +3,74 @@ try:
     from collections.abc import Iterable
 except ImportError:
     from collections import Iterable
+import re
+from functools import lru_cache
 import six
 
 from pylatex import (NoEscape, Section, Subsection, Subsubsection)
+from pylatex.utils import _latex_special_chars
+
+
+# the same replacements as in `pylatex.utils.escape_latex`, as a single table
+_escape_table_ = str.maketrans(_latex_special_chars)
+
+# The replacements of the bulk escaping, done one after the other. Braces and
+# backslashes are replaced by placeholders first, since the other replacements
+# introduce them. A character is replaced before the ones that it is
+# replaced with.
+_escape_placeholder_ = '\x00'
+_escape_steps_ = tuple(
+    [(c, _escape_placeholder_ + str(i)) for i, c in enumerate('\\{}')] +
+    [(c, _latex_special_chars[c]) for c in '&$#_^-[]~%\n\xa0'] +
+    [(_escape_placeholder_ + str(i), _latex_special_chars[c]) 
+     for i, c in enumerate('\\{}')]
+)
+
+# joins the strings to escape in bulk, it must not be a special character
+_escape_separator_ = '\x1f'
+
+
+def _escape_strings_(strings: list) -> list:
+    # escapes a list of strings, returns a list of strings
+    if len(strings) == 0:
+        return []
+    joined = _escape_separator_.join(strings)
+    if joined.count(_escape_separator_) != len(strings) - 1:
+        # some of the strings contain the separator
+        return [s.translate(_escape_table_) for s in strings]
+    if _escape_placeholder_ in joined:
+        joined = joined.translate(_escape_table_)
+    else:
+        for c, r in _escape_steps_:
+            if c in joined:
+                joined = joined.replace(c, r)
+    return joined.split(_escape_separator_)
+
+
+_frac_pattern_ = re.compile(r"\\frac(?![a-zA-Z])")
+
+
+@lru_cache(maxsize=4096)
+def to_dfrac(expr: str) -> str:
+    r"""
+    Returns an expression with its fractions in display style. The results
+    are memoized, since generated equations tend to repeat.
+
+    Example
+    -------
+    >>> from latexdocs.utils import to_dfrac
+    >>> to_dfrac(r"\frac{a}{b}")
+    '\\dfrac{a}{b}'
+
+    """
+    return _frac_pattern_.sub(r"\\dfrac", expr)
 
 
 def expr_to_ltx(lhs, rhs, *args, env='{equation}', sign='=',
                 dfrac=False, pre=None, post=None, **kwargs):
     if dfrac:
-        lhs = lhs.replace('frac', 'dfrac')
-        rhs = rhs.replace('frac', 'dfrac')
+        lhs = to_dfrac(lhs)
+        rhs = to_dfrac(rhs)
     if isinstance(pre, str):
         lhs = ' '.join([pre, lhs])
     if isinstance(post, str):
@@ -34,8 +92,62 @@ def expr_to_ltx_breqn(lhs, rhs, *args, env='{dmath}', **kwargs):
     return expr_to_ltx(lhs, rhs, *args, env=env, **kwargs)
 
 
+def split_expr(expr: str, nsplit: int = 2) -> list:
+    r"""
+    Splits an expression into at most `nsplit` parts of similar length,
+    before the '+' and '-' signs that are not inside braces, brackets or
+    parentheses.
+
+    Example
+    -------
+    >>> from latexdocs.utils import split_expr
+    >>> split_expr(r"a + \frac{b - c}{2} - d", 2)
+    ['a + \\frac{b - c}{2}', '- d']
+
+    """
+    depth = 0
+    candidates = []
+    previous = ''
+    for i, c in enumerate(expr):
+        if c in '{([':
+            depth += 1
+        elif c in '})]':
+            depth -= 1
+        elif c in '+-' and depth == 0 and previous not in ('', '^', '_', '=', 
+                                                          '+', '-', '&'):
+            candidates.append(i)
+        if not c.isspace():
+            previous = c
+    cuts = []
+    for k in range(1, nsplit):
+        target = k * len(expr) / nsplit
+        best = min((i for i in candidates if i not in cuts), 
+                   key=lambda i: abs(i - target), default=None)
+        if best is not None:
+            cuts.append(best)
+    cuts = [0] + sorted(cuts) + [len(expr)]
+    parts = [expr[i:j].strip() for i, j in zip(cuts[:-1], cuts[1:])]
+    return [p for p in parts if len(p) > 0]
+
+
 def eq_to_ltx_multiline(lhs, rhs, *args, nsplit=2, **kwargs):
+    r"""
+    Returns an equation in a 'multline' environment, with the right hand 
+    side broken into `nsplit` lines before '+' and '-' signs. Extra 
+    keyword arguments are forwarded to :func:`expr_to_ltx`.
+
+    Example
+    -------
+    >>> from latexdocs.utils import eq_to_ltx_multiline
+    >>> eq_to_ltx_multiline('y', r'a + b - \frac{c}{2}', nsplit=3)
+
+    """
     kwargs['env'] = '{multline}'
+    if kwargs.get('dfrac', False):
+        rhs = to_dfrac(rhs)
+        kwargs['dfrac'] = False
+    rhs = ' \\\\\n            '.join(split_expr(rhs, nsplit))
+    return expr_to_ltx(lhs, rhs, *args, **kwargs)
 
 
 def section(title: str, *args, level=1, **kwargs):
@@ -68,6 +180,48 @@ def issequence(arg) -> bool:
     )
 
 
+def escape_latex_many(items: Iterable) -> list:
+    """
+    Escapes the characters that are special in LaTeX in many strings at once,
+    the same way :func:`pylatex.utils.escape_latex` does it with a single 
+    string. The strings are joined and escaped by a few passes of 
+    `str.replace`, which is much faster than escaping them one by one. Items that are not 
+    strings are converted using `str`, :class:`pylatex.NoEscape` instances 
+    are left as they are.
+
+    Parameters
+    ----------
+    items : Iterable
+        The strings to escape. It can also be a NumPy array of any shape,
+        whose items are escaped in row-major order.
+
+    Returns
+    -------
+    list of :class:`pylatex.NoEscape`
+        The escaped strings, in a flat list.
+
+    Example
+    --------
+    >>> from latexdocs.utils import escape_latex_many
+    >>> print(*escape_latex_many(['Total cost: $30', '50% & more']))
+    Total cost: \\$30 50\\% \\& more
+
+    """
+    if hasattr(items, 'dtype') and not items.dtype.hasobject:
+        strings = items.astype(str).ravel().tolist()
+        keep = ()
+    else:
+        items = list(items)
+        keep = ()
+        if NoEscape in set(map(type, items)):
+            keep = [i for i, s in enumerate(items) if isinstance(s, NoEscape)]
+        strings = list(map(str, items))
+    escaped = _escape_strings_(strings)
+    for i in keep:
+        escaped[i] = items[i]
+    return list(map(NoEscape, escaped))
+
+
 def floatformatter(*args, sig: int = 6, **kwargs) -> str:
     """
     Returns a formatter, which basically is a string template
@@ -97,6 +251,21 @@ def floatformatter(*args, sig: int = 6, **kwargs) -> str:
     return "{" + "0:.{}g".format(sig) + "}"
 
 
+# the number of values formatted at once by `float_to_str_sig`
+_format_chunk_ = 65536
+
+
+def _format_floats_(values: list, sig: int) -> list:
+    # One '%' operation per chunk, that is much faster than formatting
+    # the values one by one, or `numpy.char.mod`.
+    template = '%.{}g'.format(sig) + _escape_separator_
+    result = []
+    for i in range(0, len(values), _format_chunk_):
+        chunk = values[i: i + _format_chunk_]
+        result.extend((template * len(chunk) % tuple(chunk)).split(_escape_separator_)[:-1])
+    return result
+
+
 def float_to_str_sig(value, *args, sig: int = 6, atol: float = 1e-7,
                      **kwargs) -> str:
     """
@@ -106,7 +275,8 @@ def float_to_str_sig(value, *args, sig: int = 6, atol: float = 1e-7,
     Parameters
     ----------
     value : float or a list of float
-        A single value, or an iterable.
+        A single value, or an iterable. Arrays of any dimension are formatted
+        at once, and returned as nested lists of the same shape.
 
     sig : int
         Number of significant digits.
@@ -140,10 +310,16 @@ def float_to_str_sig(value, *args, sig: int = 6, atol: float = 1e-7,
             import numpy as np
         except ImportError:
             raise ImportError("You need numpy for this.")
-        value = np.array(value)
+        value = np.asarray(value)
         if atol is not None:
-            inds = np.where(np.abs(value) < atol)[0]
-            value[inds] = 0.0
-        formatter = floatformatter(sig=sig)
-        def f(v): return formatter.format(v)
-        return list(map(f, value))
+            small = np.abs(value) < atol
+            if small.any():
+                value = np.where(small, 0.0, value)
+        if value.dtype.kind in 'biuf':
+            result = _format_floats_(value.ravel().tolist(), sig)
+        else:
+            formatter = floatformatter(sig=sig)
+            result = list(map(formatter.format, value.ravel().tolist()))
+        if value.ndim > 1:
+            result = np.array(result, dtype=object).reshape(value.shape).tolist()
+        return result
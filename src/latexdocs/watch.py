@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import time
+import runpy
+import traceback
+from collections import OrderedDict
+from typing import Iterable, Tuple
+
+import pylatex as pltx
+from pylatex.base_classes.containers import Fragment
+
+from .document import BaseTexDoc
+from .items import Image
+from .cache import FragmentCache, file_hash
+from .compiler import compile_tex
+from .output import OutputReport, digest, write_file
+
+
+def find_document(namespace: dict) -> BaseTexDoc:
+    """
+    Returns the document defined by a script, the variable `doc` if there
+    is one, or the last document defined otherwise.
+
+    """
+    doc = namespace.get('doc', None)
+    if isinstance(doc, BaseTexDoc) and doc.is_root():
+        return doc
+    for value in reversed(list(namespace.values())):
+        if isinstance(value, BaseTexDoc) and value.is_root():
+            return value
+    raise ValueError("The script doesn't define a document.")
+
+
+def _images_(node: BaseTexDoc, deep: bool = True) -> list:
+    # the paths of the images in a section
+    nodes = [node] + list(node.containers(dtype=BaseTexDoc)) if deep else [node]
+    return [c._filename for n in nodes for c in n.content if isinstance(c, Image)]
+
+
+def unit_name(filepath: str, key) -> str:
+    """
+    Returns the name of the file of a top-level section, without extension.
+    It only depends on the title of the section, hence it doesn't change if
+    sections are added or removed.
+
+    """
+    return '{}-{}'.format(os.path.basename(filepath), digest(str(key))[:8])
+
+
+def render_units(doc: BaseTexDoc, filepath: str, *args, includeonly: Iterable = None,
+                 cache: FragmentCache = None, **kwargs) -> Tuple[pltx.Document, dict]:
+    """
+    Renders a document as a main file and one unit per top-level section,
+    that the main file includes with '\\include'. Every unit starts on a
+    new page.
+
+    Parameters
+    ----------
+    doc : :class:`latexdocs.document.BaseTexDoc`
+        The root of the document.
+
+    filepath : str
+        The path of the main file, without extension. The units are
+        written next to it.
+
+    includeonly : Iterable, Optional
+        The names of the units to typeset, the rest is taken from the
+        auxiliary files of a previous compilation. Default is None, which
+        means all the units.
+
+    cache : :class:`latexdocs.cache.FragmentCache`, Optional
+        A cache for the rendered items. Default is None.
+
+    Returns
+    -------
+    :class:`pylatex.document.Document`
+        The main file.
+
+    dict
+        The content of the units by their names.
+
+    """
+    assert doc.is_root()
+    main = doc.init_doc()
+    doc._append2doc_(main, level=0, nosection=True, cache=cache)
+    units = OrderedDict()
+    for key, node in doc.items():
+        if not isinstance(node, BaseTexDoc):
+            continue
+        fragment = node.build(_doc=Fragment(), _level=1, cache=cache)
+        fragment._propagate_packages()
+        for p in fragment.packages:
+            main.packages.add(p)
+        name = unit_name(filepath, key)
+        units[name] = fragment.dumps()
+        main.append(pltx.NoEscape(r"\include{" + name + "}"))
+    if includeonly is not None:
+        main.preamble.append(
+            pltx.NoEscape(r"\includeonly{" + ','.join(includeonly) + "}"))
+    return main, units
+
+
+class Watcher:
+    """
+    Rebuilds a document whenever its script, or a file it depends on changes.
+    The script is executed in the running interpreter, hence the imported
+    libraries are loaded only once, and the rendered items that didn't
+    change are taken from a :class:`latexdocs.cache.FragmentCache`.
+
+    The document is written as a main file and one unit per top-level
+    section (see :func:`render_units`). Only the units whose content has
+    changed are written and, if `partial` is True, only these are typeset,
+    using '\\includeonly'. Page numbers and references to the other units
+    are taken from the previous compilation, but the pdf only contains the
+    pages of the changed units.
+
+    Parameters
+    ----------
+    script : str
+        The path of a Python script defining a document, either as the
+        variable `doc`, or as the last document it creates.
+
+    filepath : str, Optional
+        The path of the main file, without extension. Default is None, which
+        means the path of the script without extension.
+
+    interval : float, Optional
+        The time between checking the files for changes, in seconds.
+        Default is 0.5.
+
+    paths : Iterable, Optional
+        Additional files to watch. The script and the images of the
+        document are always watched. Default is None.
+
+    partial : bool, Optional
+        If True, only the changed units are typeset. Default is True.
+
+    compile : bool, Optional
+        If False, only the tex files are written. Default is True.
+
+    kwargs : tuple, Optional
+        Extra keyword arguments are forwarded to
+        :func:`latexdocs.compiler.compile_tex`.
+
+    Example
+    -------
+    >>> from latexdocs.watch import Watcher
+    >>> Watcher('report.py').watch()
+
+    """
+
+    def __init__(self, script: str, filepath: str = None, *args,
+                 interval: float = 0.5, paths: Iterable = None,
+                 partial: bool = True, compile: bool = True, **kwargs):
+        self.script = os.path.abspath(script)
+        if filepath is None:
+            filepath = os.path.splitext(self.script)[0]
+        self.filepath = os.path.abspath(filepath)
+        self.interval = interval
+        self.paths = [os.path.abspath(p) for p in paths] if paths is not None else []
+        self.partial = partial
+        self.compile = compile
+        self.compile_kwargs = kwargs
+        self.cache = FragmentCache()
+        self._images = []
+        self._hashes = None
+        self._compiled = False
+
+    def sources(self) -> list:
+        """
+        Returns the files that are watched.
+
+        """
+        return [self.script] + self.paths + self._images
+
+    def _mtimes_(self) -> dict:
+        mtimes = {}
+        for path in self.sources():
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def _run_script_(self) -> BaseTexDoc:
+        dirname = os.path.dirname(self.script)
+        # modules next to the script are reloaded, the rest is kept
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, '__file__', None)
+            if path is not None and os.path.dirname(os.path.abspath(path)) == dirname:
+                del sys.modules[name]
+        cwd = os.getcwd()
+        sys.path.insert(0, dirname)
+        try:
+            os.chdir(dirname)
+            namespace = runpy.run_path(self.script, run_name='__latexdocs__')
+        finally:
+            os.chdir(cwd)
+            sys.path.remove(dirname)
+        doc = find_document(namespace)
+        self._images = [os.path.join(dirname, p) for p in _images_(doc)]
+        return doc
+
+    def update(self) -> dict:
+        """
+        Executes the script, writes the changed files and compiles the
+        document if something has changed. Returns a summary with the names
+        of the changed units, the total number of units, the result of the
+        compilation and the elapsed time.
+
+        """
+        t0 = time.perf_counter()
+        doc = self._run_script_()
+        cwd = os.getcwd()
+        try:
+            os.chdir(os.path.dirname(self.script))
+            main, units = render_units(doc, self.filepath, cache=self.cache)
+            # the images are included by name, their content is hashed too
+            hashes = {None: (digest(main.dumps()),) + 
+                      tuple(map(file_hash, _images_(doc, deep=False)))}
+            for key, node in doc.items():
+                if isinstance(node, BaseTexDoc):
+                    name = unit_name(self.filepath, key)
+                    hashes[name] = (digest(units[name]),) + \
+                        tuple(map(file_hash, _images_(node)))
+        finally:
+            os.chdir(cwd)
+        previous = self._hashes if self._hashes is not None else {}
+        changed = [name for name in units if hashes[name] != previous.get(name, None)]
+        # the structure or the preamble has changed
+        structural = hashes.keys() != previous.keys() or \
+            hashes[None] != previous.get(None, None)
+        full = structural or not self.partial or not self._compiled
+        report = OutputReport()
+        dirname = os.path.dirname(self.filepath)
+        for name in changed:
+            write_file(os.path.join(dirname, name + '.tex'), units[name],
+                       report=report)
+        result = None
+        if structural or len(changed) > 0 or (self.compile and not self._compiled):
+            if not full:
+                main.preamble.append(
+                    pltx.NoEscape(r"\includeonly{" + ','.join(changed) + "}"))
+            write_file(self.filepath + '.tex', main.dumps(), report=report)
+            if self.compile:
+                result = compile_tex(self.filepath, **self.compile_kwargs)
+                self._compiled = True
+        self._hashes = hashes
+        return {'changed': changed, 'units': len(units), 'full': full,
+                'result': result, 'outputs': report,
+                'duration': time.perf_counter() - t0}
+
+    def watch(self, iterations: int = None, *args, report=print, **kwargs):
+        """
+        Rebuilds the document on every change, until interrupted. Errors in
+        the script are reported, and the watching goes on.
+
+        Parameters
+        ----------
+        iterations : int, Optional
+            The number of checks, for testing. Default is None, which means
+            forever.
+
+        report : Callable, Optional
+            A function to report the updates with. Default is `print`.
+
+        """
+        mtimes = None
+        i = 0
+        try:
+            while iterations is None or i < iterations:
+                i += 1
+                current = self._mtimes_()
+                if current != mtimes:
+                    try:
+                        summary = self.update()
+                    except Exception:
+                        report(traceback.format_exc())
+                    else:
+                        report(_summary_(summary))
+                    mtimes = current
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
+
+
+def _summary_(summary: dict) -> str:
+    result = summary['result']
+    passes = '' if result is None else ', {} passes'.format(result.runs)
+    scope = 'all' if summary['full'] else '{} of {}'.format(
+        len(summary['changed']), summary['units'])
+    return "updated {} units in {:.2f} s{}".format(
+        scope, summary['duration'], passes)
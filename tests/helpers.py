@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+import numpy as np
+from latexdocs import Document, Table, Text, TikZFigure
+
+
+def make_document(nsec: int = 4, **kwargs) -> Document:
+    """
+    Returns a document with some text at the root and `nsec` sections, each
+    having some text, a subsection with bold text and a table, and 
+    a subsubsection with a TikZ figure. Extra keyword arguments are 
+    forwarded to the document.
+    """
+    doc = Document(title='Document Title', author='BB', date=True, **kwargs)
+    doc.append('Some text at the root.')
+    data = np.arange(40, dtype=float).reshape(10, 4)
+    for i in range(nsec):
+        section = 'Section {}'.format(i)
+        doc[section].append('Some regular text & symbols')
+        doc[section, 'Subsection'].append(Text('Bold text', bold=True))
+        doc[section, 'Subsection'].append(
+            Table(data=data, columns=['A', 'B', 'C', 'D']))
+        doc[section, 'Subsection', 'Figure'].append(TikZFigure())
+    return doc
+
+
+_fake_latex_ = os.path.join(os.path.dirname(os.path.abspath(__file__)), 
+                            os.pardir, 'benchmarks', 'fake_latex.py')
+
+
+@contextmanager
+def fake_compilers(*names):
+    """
+    Puts fake compilers on the PATH for the duration of the context, 
+    'pdflatex', 'lualatex' and 'xelatex' by default. They run 
+    `benchmarks/fake_latex.py`. Only works on POSIX systems.
+    """
+    names = names if len(names) > 0 else ('pdflatex', 'lualatex', 'xelatex')
+    path = os.environ.get('PATH', '')
+    with tempfile.TemporaryDirectory() as bindir:
+        for name in names:
+            script = os.path.join(bindir, name)
+            with open(script, 'w') as f:
+                f.write('#!/bin/sh\nexec "{}" "{}" "$@"\n'.format(
+                    sys.executable, os.path.abspath(_fake_latex_)))
+            os.chmod(script, 0o755)
+        os.environ['PATH'] = bindir + os.pathsep + path
+        try:
+            yield bindir
+        finally:
+            os.environ['PATH'] = path
@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+import unittest
+import io
+import os
+import sys
+import threading
+import re
+import tempfile
+import numpy as np
+import pylatex as pltx
+from pylatex import NoEscape
+from pylatex.utils import escape_latex
+from pylatex.base_classes import LatexObject
+from latexdocs import (Document, Table, TikZFigure, FragmentCache, PlainText, 
+                       Equations, ArrayMath, BuildProfiler, Image)
+from latexdocs.utils import (escape_latex_many, split_expr, eq_to_ltx_multiline, 
+                             float_to_str_sig)
+from latexdocs.spill import SpillBuffer
+from latexdocs.cache import state_hash
+from latexdocs.output import write_file, write_chunks
+from latexdocs.preamble import scan_packages, append_reproducible
+from latexdocs.compiler import reproducible_env
+
+from helpers import make_document, fake_compilers
+
+
+class TestBuild(unittest.TestCase):
+
+    def test_parallel(self):
+        doc = make_document()
+        self.assertEqual(doc.build(processes=2).dumps(), doc.build().dumps())
+
+    def test_write_if_changed(self):
+        doc = make_document()
+        doc.add_sidecar('data.csv', '1,2,3')
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, 'document')
+            report = doc.generate_tex(filepath, write_if_changed=True)
+            self.assertEqual(len(report.updated), 2)
+            report = doc.generate_tex(filepath, write_if_changed=True)
+            self.assertFalse(report.changed)
+            doc['Section 0'].append('More text')
+            report = doc.generate_tex(filepath, write_if_changed=True)
+            self.assertEqual(report.updated, [filepath + '.tex'])
+            self.assertEqual(report.unchanged, [os.path.join(tmpdir, 'data.csv')])
+
+    @unittest.skipIf(os.name != 'posix', "The fake compilers need a POSIX shell.")
+    def test_write_if_changed_pdf(self):
+        doc = make_document()
+        with fake_compilers(), tempfile.TemporaryDirectory() as tmpdir:
+            imagepath = os.path.join(tmpdir, 'image.png')
+            with open(imagepath, 'wb') as f:
+                f.write(b'png')
+            doc['Section 1'].append(Image(filename='image.png'))
+            self.assertEqual(doc.input_files(), ['image.png'])
+            filepath = os.path.join(tmpdir, 'document')
+            result = doc.generate_pdf(filepath, write_if_changed=True)
+            self.assertGreater(result.runs, 0)
+            result = doc.generate_pdf(filepath, write_if_changed=True)
+            self.assertEqual(result.runs, 0)
+            # a changed image makes the pdf stale
+            mtime = os.path.getmtime(filepath + '.pdf') + 10
+            os.utime(imagepath, (mtime, mtime))
+            result = doc.generate_pdf(filepath, write_if_changed=True)
+            self.assertGreater(result.runs, 0)
+
+    @unittest.skipIf(os.name != 'posix', "File modes are POSIX specific.")
+    def test_file_mode(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'file.txt')
+            umask = os.umask(0o022)
+            os.umask(umask)
+            write_file(path, 'a')
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o666 & ~umask)
+            os.chmod(path, 0o600)
+            write_file(path, 'b')
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+            write_chunks(path, ['c', 'd'])
+            self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+
+    def test_subtree(self):
+        doc = make_document()
+        tex = doc.build_subtree(('Section 2', 'Subsection')).dumps()
+        self.assertIn(r"\setcounter{section}{3}", tex)
+        self.assertIn(r"\setcounter{subsection}{0}", tex)
+        self.assertIn(r"\subsection{Subsection}", tex)
+        self.assertIn(r"\subsubsection{Figure}", tex)
+        self.assertNotIn("Section 1", tex)
+        self.assertNotIn("Some text at the root.", tex)
+        self.assertRaises(KeyError, doc.build_subtree, ('Section 9',))
+        self.assertNotIn('Section 9', doc)
+
+    def test_packages(self):
+        doc = Document(title='Document Title')
+        doc['Section'].append('Some regular text')
+        tex = doc.build().dumps()
+        self.assertIn(r"\usepackage{amsmath}", tex)
+        self.assertNotIn(r"\usepackage{breqn}", tex)
+        self.assertNotIn(r"\usepackage{pgfplots}", tex)
+        doc['Section'].append(NoEscape(r"\begin{dmath} x = 1 \end{dmath}"))
+        doc['Section'].append(TikZFigure())
+        self.assertEqual(doc.required_packages(), {'breqn', 'pgfplots'})
+        doc = Document(title='Document Title', extra_packages=['pdfpages'])
+        self.assertIn(r"\usepackage{pdfpages}", doc.build().dumps())
+        markers = {
+            r"\begin{tikzpicture} \draw (0,0) -- (1,1); \end{tikzpicture}": {'tikz'},
+            r"\tikz \node {x};": {'tikz'},
+            r"\pgfplotsset{compat=1.18}": {'pgfplots'},
+            r"\begin{axis} \addplot {x}; \end{axis}": {'pgfplots'},
+            r"\pgfmathsetmacro{\x}{1}": {'pgf'},
+            r"\includepdf[pages=-]{a.pdf}": {'pdfpages'},
+            r"\restylefloat{table}": {'float'},
+            r"\begin{tabularx}{\textwidth}{X} a \end{tabularx}": {'tabularx'},
+            r"\begin{dseries} x \end{dseries}": {'breqn'},
+            r"\listoffigures": set(),
+        }
+        for content, packages in markers.items():
+            self.assertEqual(scan_packages(content), packages)
+        doc = Document(title='Document Title')
+        doc['Section'].append(NoEscape(r"\begin{tikzpicture}\end{tikzpicture}"))
+        self.assertIn(r"\usepackage{tikz}", doc.build().dumps())
+
+    def test_memory_budget(self):
+        doc = make_document()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, 'document')
+            doc.generate_tex(filepath, memory_budget=256)
+            with open(filepath + '.tex', 'r') as f:
+                self.assertEqual(f.read(), doc.build().dumps())
+
+    @unittest.skipIf(os.name != 'posix', "The fake compilers need a POSIX shell.")
+    def test_memory_budget_pdf(self):
+        doc = make_document()
+        with fake_compilers(), tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, 'document')
+            profiler, cache = BuildProfiler(), FragmentCache()
+            result = doc.generate_pdf(filepath, memory_budget=256, 
+                                      profiler=profiler, cache=cache)
+            self.assertTrue(os.path.isfile(result.pdf_path))
+            self.assertGreater(len(profiler.records), 0)
+            self.assertGreater(cache.hits + cache.misses, 0)
+            with open(filepath + '.tex', 'r') as f:
+                self.assertEqual(f.read(), doc.build().dumps())
+
+    @unittest.skipIf(os.name != 'posix', "The fake compilers need a POSIX shell.")
+    def test_passes(self):
+        plain = Document(title='Title')
+        plain.append('Some text without references.')
+        with fake_compilers(), tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, 'document')
+            # the auxiliary files are removed after every compilation
+            for _ in range(2):
+                result = plain.generate_pdf(filepath)
+                self.assertEqual([p.draft for p in result.passes], [False])
+                self.assertFalse(os.path.exists(filepath + '.aux'))
+            for _ in range(2):
+                result = make_document().generate_pdf(filepath)
+                self.assertEqual([p.draft for p in result.passes], [False, False])
+
+    @unittest.skipIf(os.name != 'posix', "The fake compilers need a POSIX shell.")
+    def test_scratch(self):
+        doc = make_document()
+        with fake_compilers(), tempfile.TemporaryDirectory() as tmpdir, \
+                tempfile.TemporaryDirectory() as root:
+            filepath = os.path.join(tmpdir, 'document')
+            result = doc.generate_pdf(filepath, scratch=root, clean=True)
+            self.assertEqual(result.filepath, filepath)
+            with open(filepath + '.pdf', 'rb') as f:
+                self.assertTrue(f.read().startswith(b'%PDF'))
+            self.assertTrue(os.path.isfile(filepath + '.tex'))
+            self.assertEqual(sorted(os.listdir(tmpdir)), 
+                             ['document.pdf', 'document.tex'])
+            # the scratch directory is removed afterwards
+            self.assertEqual(os.listdir(root), [])
+            # the auxiliary files are kept next to the document if asked for
+            doc.generate_pdf(filepath, scratch=root, clean=False)
+            self.assertTrue(os.path.isfile(filepath + '.aux'))
+            self.assertEqual(os.listdir(root), [])
+
+    @unittest.skipIf(os.name != 'posix', "The fake compilers need a POSIX shell.")
+    def test_return_bytes(self):
+        doc = make_document()
+        with fake_compilers(), tempfile.TemporaryDirectory() as tmpdir, \
+                tempfile.TemporaryDirectory() as root:
+            filepath = os.path.join(tmpdir, 'document')
+            result = doc.generate_pdf(filepath, scratch=root, return_bytes=True)
+            self.assertTrue(result.pdf_bytes.startswith(b'%PDF'))
+            # nothing is written to the destination
+            self.assertEqual(os.listdir(tmpdir), [])
+            self.assertEqual(os.listdir(root), [])
+
+    @unittest.skipIf(os.name != 'posix', "The fake compilers need a POSIX shell.")
+    def test_pdf_bytes(self):
+        doc = make_document()
+        with fake_compilers(), tempfile.TemporaryDirectory() as tmpdir:
+            cwd = os.getcwd()
+            os.chdir(tmpdir)
+            try:
+                pdf = doc.to_pdf_bytes(scratch=tmpdir)
+                buffer = io.BytesIO()
+                result = doc.write_pdf(buffer, scratch=tmpdir, 
+                                       subtree='Section 1', max_passes=2)
+            finally:
+                os.chdir(cwd)
+            # nothing is left behind
+            self.assertEqual(os.listdir(tmpdir), [])
+        self.assertTrue(pdf.startswith(b'%PDF'))
+        self.assertTrue(buffer.getvalue().startswith(b'%PDF'))
+        self.assertLessEqual(result.runs, 2)
+        self.assertRaises(TypeError, doc.write_pdf, io.BytesIO(), 
+                          write_if_changed=True)
+        self.assertRaises(TypeError, doc.to_pdf_bytes, memory_budget=256)
+
+    def test_spill_buffer(self):
+        with SpillBuffer(budget=8) as buffer:
+            buffer.write('1234')
+            self.assertFalse(buffer.spilled)
+            buffer.write('56789')
+            self.assertTrue(buffer.spilled)
+            self.assertEqual(b''.join(buffer.chunks(size=2)), b'123456789')
+
+    def test_cache(self):
+        cache = FragmentCache()
+        doc = make_document()
+        tex = doc.build().dumps()
+        self.assertEqual(doc.build(cache=cache).dumps(), tex)
+        self.assertEqual(cache.hits, 6)
+        self.assertEqual(make_document().build(cache=cache).dumps(), tex)
+        self.assertEqual(cache.hits, 14)
+        buffer = io.StringIO()
+        head = doc.build_stream(buffer, cache=cache)
+        self.assertIn(r"\usepackage{pgfplots}", head.dumps())
+        cache = FragmentCache(maxbytes=1)
+        self.assertEqual(doc.build(cache=cache).dumps(), tex)
+        self.assertEqual(len(cache), 0)
+
+    def test_state_hash(self):
+        # LaTeX objects are hashed by their content, not their identity
+        self.assertEqual(state_hash(NoEscape('a'), pltx.Command('textbf', 'x')), 
+                         state_hash(NoEscape('a'), pltx.Command('textbf', 'x')))
+        self.assertNotEqual(state_hash(1), state_hash('1'))
+        self.assertNotEqual(state_hash([1, 2]), state_hash([12]))
+        self.assertEqual(state_hash(np.arange(3)), state_hash(np.arange(3)))
+        self.assertRaises(TypeError, state_hash, object())
+
+    def test_reproducible(self):
+        def build():
+            doc = Document(title='Title', author='Author', date=True, 
+                           reproducible=0)
+            doc['Section'].append('Some text.')
+            return doc.build().dumps()
+        tex = build()
+        self.assertEqual(build(), tex)
+        self.assertIn(r"\date{January 1, 1970}", tex)
+        self.assertIn(r"\pdftrailerid{", tex)
+        # different bodies get different trailer IDs
+        trailerid = re.compile(r"\\pdftrailerid\{([0-9A-F]{32})\}")
+        doc = Document(title='Title', author='Author', date=True, reproducible=0)
+        doc['Section'].append('Some other text.')
+        self.assertNotEqual(trailerid.search(doc.build().dumps()).group(1), 
+                            trailerid.search(tex).group(1))
+        # streaming gives the same ID
+        doc = make_document(reproducible=0)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filepath = os.path.join(tmpdir, 'document')
+            doc.generate_tex(filepath, memory_budget=256)
+            with open(filepath + '.tex', 'r') as f:
+                self.assertEqual(f.read(), doc.build().dumps())
+        # the body is rendered once
+        class Counter(LatexObject):
+            calls = 0
+
+            def dumps(self):
+                Counter.calls += 1
+                return 'counted'
+
+        doc = Document(title='Title', reproducible=0)
+        doc['Section'].append(Counter())
+        doc.build().dumps()
+        self.assertEqual(Counter.calls, 1)
+        pdoc = pltx.Document()
+        append_reproducible(pdoc, 0, trailerid='0123456789abcdef0123456789abcdef')
+        self.assertIn(r"\pdftrailerid{0123456789ABCDEF0123456789ABCDEF}", pdoc.dumps())
+        self.assertNotIn(r"\pdftrailerid{", Document(date=True).build().dumps())
+        env = reproducible_env(86400, env={})
+        self.assertEqual(env, {'SOURCE_DATE_EPOCH': '86400', 'FORCE_SOURCE_DATE': '1'})
+
+    def test_equations(self):
+        lhs = ['x_{}'.format(i) for i in range(5)]
+        rhs = [r'\frac{{{}}}{{2}}'.format(i) for i in range(5)]
+        doc = Document()
+        doc['Solution'].append(Equations(lhs, rhs, dfrac=True, per_group=2))
+        tex = doc.build().dumps()
+        self.assertEqual(tex.count(r"\begin{align}"), 3)
+        self.assertIn("x_0 &= \\dfrac{0}{2} \\\\\nx_1 &= \\dfrac{1}{2}\n\\end{align}", tex)
+        doc = Document()
+        doc.append(Equations(zip(lhs, rhs), env='dmath', numbered=False))
+        self.assertRaises(ValueError, Equations, lhs, rhs, env='gather')
+        tex = doc.build().dumps()
+        self.assertIn(r"\usepackage{breqn}", tex)
+        self.assertEqual(tex.count(r"\begin{dmath*}"), 5)
+        self.assertEqual(tex.count(r"\begin{dgroup*}"), 1)
+        self.assertEqual(split_expr(r"a + \frac{b - c}{2} - d"), 
+                         [r"a + \frac{b - c}{2}", "- d"])
+        self.assertIn("y = a \\\\\n", eq_to_ltx_multiline('y', 'a + b', nsplit=2))
+
+    def test_array_math(self):
+        tex = ArrayMath(np.arange(6.).reshape(2, 3) * 1e7, lhs='A').dumps()
+        self.assertIn("0 & 1 \\cdot 10^{7} & 2 \\cdot 10^{7} \\\\\n", tex)
+        K = np.random.default_rng(0).random((1000, 1000))
+        doc = Document()
+        doc['Stiffness'].append(ArrayMath(K, maxrows=4, maxcols=4, sig=3))
+        tex = doc.build().dumps()
+        self.assertEqual(tex.count(r"\cdots"), 4)
+        self.assertEqual(tex.count(r"\vdots"), 4)
+        self.assertEqual(tex.count(r"\ddots"), 1)
+        self.assertIn(float_to_str_sig(K[-1, -1], sig=3) + "\n\\end{bmatrix}", tex)
+        self.assertEqual(ArrayMath(np.ones(12)).dumps().count(r"\vdots"), 1)
+        self.assertEqual(float_to_str_sig([[1e-9, 1.0], [2.0, 1e-8]], sig=3), 
+                         [['0', '1'], ['2', '0']])
+        self.assertRaises(ValueError, ArrayMath, np.zeros((0, 3)))
+        self.assertRaises(ValueError, ArrayMath, [])
+        self.assertRaises(ValueError, ArrayMath, np.zeros((2, 2, 2)))
+        self.assertRaises(ValueError, ArrayMath, np.ones(2), env='array')
+
+    def test_escape(self):
+        items = ['a & b', r'\{x}_1^2', '50% ~ [-1]', '\x1f', '\n', 3.5, 
+                 NoEscape(r'\textbf{x}')]
+        self.assertEqual(escape_latex_many(items), list(map(escape_latex, items)))
+        data = np.array([['R&D', '$1', '-2'], ['{a}', 'b_c', 'd']])
+        doc = Document()
+        doc.append(Table(data=data, columns=['A', 'B', 'C']))
+        tex = doc.build().dumps()
+        self.assertIn(r"R\&D&\$1&{-}2\\", tex)
+        doc = Document()
+        doc['Log'].append(PlainText(['50% done', 'a_b']))
+        self.assertIn("50\\% done\\newline%\na\\_b", doc.build().dumps())
+
+    def test_threads(self):
+        doc = Document(title='Document Title')
+        doc['Section'].append('a', 'b')
+        self.assertEqual(doc['Section'].content, ['a', 'b'])
+
+        def work(t):
+            for i in range(100):
+                doc['Results', 'Part {}'.format(i % 10), str(t)].append(i)
+                doc['Section'].append(i)
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=work, args=(t,)) for t in range(8)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(len(doc['Results']), 10)
+        for part in doc['Results'].values():
+            self.assertEqual(sum(len(v.content) for v in part.values()), 80)
+        self.assertEqual(len(doc['Section'].content), 802)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
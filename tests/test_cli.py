@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import unittest
+import os
+import json
+import tempfile
+from latexdocs import Table, Text
+from latexdocs.spec import from_spec, item_from_spec
+from latexdocs.cli import main
+
+
+_spec_ = {
+    'title': 'Report',
+    'author': 'BB',
+    'content': ['Some text at the root.'],
+    'sections': {
+        'Introduction': [{'type': 'text', 'text': 'Some $math$.', 'bold': True}],
+        'Results': {
+            'content': [{'type': 'table', 'columns': ['A', 'B'], 
+                         'data': [[1, 2], [3, 4]]}],
+            'sections': {'Details': [{'type': 'latex', 'source': r'\newpage'}]}
+        }
+    }
+}
+
+
+class TestCLI(unittest.TestCase):
+
+    def test_spec(self):
+        doc = from_spec(_spec_)
+        self.assertIsInstance(doc['Introduction'].content[0], Text)
+        self.assertIsInstance(doc['Results'].content[0], Table)
+        tex = doc.build().dumps()
+        self.assertIn(r"\subsection{Details}", tex)
+        self.assertIn(r"\textbf{Some $math$.}", tex)
+        self.assertRaises(NotImplementedError, item_from_spec, {'type': 'unknown'})
+
+    def test_build(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for name in ['a', 'b']:
+                with open(os.path.join(tmpdir, name + '.json'), 'w') as f:
+                    json.dump(dict(_spec_, title=name), f)
+            outdir = os.path.join(tmpdir, 'out')
+            argv = ['build', tmpdir, '--tex-only', '-o', outdir, '-q']
+            self.assertEqual(main(argv), 0)
+            path = os.path.join(outdir, 'a.tex')
+            mtime = os.path.getmtime(path)
+            self.assertEqual(main(argv), 0)
+            self.assertEqual(os.path.getmtime(path), mtime)
+            with open(os.path.join(tmpdir, 'c.json'), 'w') as f:
+                json.dump({'content': [{'type': 'unknown'}]}, f)
+            self.assertEqual(main(argv), 1)
+
+    def test_main_module(self):
+        # importing the module, like tools that scan packages do, is harmless
+        import importlib
+        module = importlib.import_module('latexdocs.__main__')
+        self.assertIs(module.main, main)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+import unittest
+import os
+import tempfile
+from latexdocs.compiler import parse_log, scratch_dir, compile_tex
+from latexdocs.pool import split_tex, TexWorkerPool
+from latexdocs.output import digest
+
+from helpers import fake_compilers
+
+
+_log_ = r"""
+LaTeX Warning: Label(s) may have changed. Rerun to get cross-references right.
+
+ )
+Here is how much of TeX's memory you used:
+ 3651 strings out of 478287
+ 55268 string characters out of 5849289
+ 1856 words of memory out of 5000000
+ 3i,7n,4p,231b,313s stack positions out of 10000i,1000n,20000p,200000b,200000s
+</usr/share/texlive/texmf-dist/fonts/type1/public/lm/lmr10.pfb>
+Output written on /tmp/a_very_long_name_which_is_wrapped_by_tex_in_the_log_file
+.pdf (3 pages, 51234 bytes).
+"""
+
+
+class TestCompiler(unittest.TestCase):
+
+    def test_parse_log(self):
+        info = parse_log(_log_)
+        self.assertEqual(info['pages'], 3)
+        self.assertEqual(info['nbytes'], 51234)
+        self.assertEqual(info['warnings'], 1)
+        self.assertEqual(info['memory']['strings'], (3651, 478287))
+        self.assertEqual(info['memory']['words of memory'], (1856, 5000000))
+
+    def test_split_tex(self):
+        tex = "\\documentclass{article}\n\\begin{document}\nA\n\\end{document}"
+        preamble, body = split_tex(tex)
+        self.assertEqual(preamble, "\\documentclass{article}\n")
+        self.assertTrue(body.startswith("\\begin{document}"))
+        self.assertRaises(ValueError, split_tex, "\\documentclass{article}")
+
+    def test_scratch_dir(self):
+        with scratch_dir() as path:
+            self.assertTrue(os.path.isdir(path))
+            with open(os.path.join(path, 'a.aux'), 'w') as f:
+                f.write('\\relax')
+        self.assertFalse(os.path.exists(path))
+
+
+def _write_tex(dirname, name='document', labels=1, toc=False):
+    filepath = os.path.join(dirname, name)
+    with open(filepath + '.tex', 'w') as f:
+        f.write("\\documentclass{article}\n\\begin{document}\n" + 
+                "\\tableofcontents\n" * toc + "\\label{x}\n" * labels + 
+                "\\end{document}\n")
+    return filepath
+
+
+@unittest.skipIf(os.name != 'posix', "The fake compilers need a POSIX shell.")
+class TestCompileTex(unittest.TestCase):
+
+    def test_fixed_point(self):
+        with fake_compilers(), tempfile.TemporaryDirectory() as tmpdir:
+            # the references are resolved by the second pass
+            result = compile_tex(_write_tex(tmpdir))
+            self.assertEqual([p.draft for p in result.passes], [False, False])
+            self.assertEqual([p.rerun for p in result.passes], [True, False])
+            self.assertTrue(os.path.isfile(result.pdf_path))
+            self.assertEqual(result.pages, 1)
+            # without references, creating the aux file is not a change
+            result = compile_tex(_write_tex(tmpdir, 'plain', labels=0))
+            self.assertEqual([p.draft for p in result.passes], [False])
+            # a table of contents settles on the third pass, that runs in 
+            # draft mode, and the final pass writes the pdf
+            result = compile_tex(_write_tex(tmpdir, 'toc', toc=True))
+            self.assertEqual([p.draft for p in result.passes], 
+                             [False, False, True, False])
+            self.assertEqual([p.rerun for p in result.passes], 
+                             [True, True, False, False])
+            self.assertIn('-draftmode', result.passes[2].command)
+            self.assertNotIn('-draftmode', result.passes[-1].command)
+            self.assertRaises(ValueError, compile_tex, _write_tex(tmpdir), 
+                              max_passes=0)
+
+    def test_draft_flags(self):
+        with fake_compilers(), tempfile.TemporaryDirectory() as tmpdir:
+            for compiler, flag in [('lualatex', '--draftmode'), ('xelatex', '-no-pdf')]:
+                result = compile_tex(_write_tex(tmpdir, compiler, toc=True), 
+                                     compiler=compiler)
+                self.assertEqual([flag in p.command for p in result.passes], 
+                                 [False, False, True, False])
+                self.assertTrue(os.path.isfile(result.pdf_path))
+            result = compile_tex(_write_tex(tmpdir, 'full', toc=True), draftmode=False)
+            self.assertEqual([p.draft for p in result.passes], [False, False, False])
+
+    def test_warm_start(self):
+        with fake_compilers(), tempfile.TemporaryDirectory() as tmpdir:
+            filepath = _write_tex(tmpdir)
+            compile_tex(filepath)
+            os.remove(filepath + '.pdf')
+            # with the aux files of the previous run, the first pass is final
+            result = compile_tex(filepath)
+            self.assertEqual(len(result.passes), 1)
+            self.assertFalse(result.passes[0].draft)
+            self.assertTrue(os.path.isfile(result.pdf_path))
+
+    def test_max_passes(self):
+        with fake_compilers(), tempfile.TemporaryDirectory() as tmpdir:
+            result = compile_tex(_write_tex(tmpdir, toc=True), max_passes=3)
+            self.assertEqual([p.draft for p in result.passes], [False, False, False])
+            self.assertTrue(os.path.isfile(result.pdf_path))
+            result = compile_tex(_write_tex(tmpdir, 'once'), max_passes=1)
+            self.assertEqual([p.draft for p in result.passes], [False])
+
+    def test_output_directory(self):
+        with fake_compilers(), tempfile.TemporaryDirectory() as tmpdir:
+            outdir = os.path.join(tmpdir, 'build')
+            os.makedirs(outdir)
+            filepath = _write_tex(tmpdir)
+            result = compile_tex(filepath, outdir=outdir)
+            self.assertEqual(result.pdf_path, os.path.join(outdir, 'document.pdf'))
+            self.assertTrue(os.path.isfile(result.pdf_path))
+            self.assertFalse(os.path.exists(filepath + '.pdf'))
+            self.assertFalse(os.path.exists(filepath + '.aux'))
+
+
+_preamble_ = "\\documentclass{article}\n"
+
+
+def _tex(body, preamble=_preamble_):
+    return preamble + "\\begin{document}\n" + body + "\n\\end{document}\n"
+
+
+@unittest.skipIf(os.name != 'posix', "The fake compilers need a POSIX shell.")
+class TestTexWorkerPool(unittest.TestCase):
+
+    def test_dispatch(self):
+        with fake_compilers(), tempfile.TemporaryDirectory() as tmpdir:
+            with TexWorkerPool(_preamble_, workers=2) as pool:
+                paths = [os.path.join(tmpdir, 'doc{}'.format(i)) for i in range(6)]
+                futures = [pool.submit(_tex('Document {}'.format(i)), path)
+                           for i, path in enumerate(paths)]
+                results = [f.result() for f in futures]
+                self.assertEqual([r.pdf_path for r in results], 
+                                 [p + '.pdf' for p in paths])
+                self.assertTrue(all(os.path.isfile(p + '.pdf') for p in paths))
+                self.assertEqual(sum(s['jobs'] for s in pool.health_check()), 6)
+
+    def test_health_check(self):
+        with fake_compilers(), tempfile.TemporaryDirectory() as tmpdir:
+            with TexWorkerPool(_preamble_, workers=1) as pool:
+                worker = pool._workers[0]
+                worker.process.kill()
+                worker.process.wait()
+                status = pool.health_check()
+                self.assertFalse(status[0]['alive'])
+                self.assertEqual(status[0]['restarts'], 1)
+                self.assertTrue(worker.alive)
+                self.assertTrue(pool.health_check()[0]['alive'])
+                result = pool.compile(_tex('Document'), os.path.join(tmpdir, 'doc'))
+                self.assertTrue(os.path.isfile(result.pdf_path))
+
+    def test_recycle(self):
+        with fake_compilers(), tempfile.TemporaryDirectory() as tmpdir:
+            with TexWorkerPool(_preamble_, workers=1, recycle_after=2) as pool:
+                worker = pool._workers[0]
+                scratch = worker.dir
+                pool.compile(_tex('First'), os.path.join(tmpdir, 'first'))
+                self.assertEqual(worker.dir, scratch)
+                pool.compile(_tex('Second'), os.path.join(tmpdir, 'second'))
+                self.assertNotEqual(worker.dir, scratch)
+                self.assertFalse(os.path.exists(scratch))
+                self.assertTrue(worker.alive)
+                result = pool.compile(_tex('Third'), os.path.join(tmpdir, 'third'))
+                self.assertTrue(os.path.isfile(result.pdf_path))
+
+    def test_cold_preamble(self):
+        other = "\\documentclass{report}\n"
+        with fake_compilers(), tempfile.TemporaryDirectory() as tmpdir:
+            with TexWorkerPool(_preamble_, workers=1) as pool:
+                warm = pool.compile(_tex('Warm'), os.path.join(tmpdir, 'warm'))
+                cold = pool.compile(_tex('Cold', other), os.path.join(tmpdir, 'cold'))
+                driver = 'driver-{}.tex'.format(digest(other)[:16])
+                self.assertIn(driver, cold.passes[0].command)
+                self.assertNotIn(driver, warm.passes[0].command)
+                self.assertTrue(os.path.isfile(cold.pdf_path))
+                # the warm process still has the common preamble
+                self.assertIn('driver-{}.tex'.format(digest(_preamble_)[:16]), 
+                              pool._workers[0].process.args)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
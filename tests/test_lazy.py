@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import unittest
+import pickle
+import numpy as np
+from latexdocs import Document, Table, TikZFigure, Lazy
+
+
+calls = []
+
+
+def _table(n):
+    calls.append(n)
+    data = np.arange(4 * n).reshape(n, 4)
+    return Table(data=data, columns=['A', 'B', 'C', 'D'])
+
+
+class TestLazy(unittest.TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_lazy(self):
+        doc = Document()
+        doc['Section 1'].append(Lazy(_table, 2))
+        doc['Section 2'].append(Lazy(lambda: 'Some regular text'))
+        self.assertEqual(len(calls), 0)
+        content = doc.build().dumps()
+        self.assertIn('Some regular text', content)
+        self.assertEqual(calls, [2])
+        self.assertEqual(doc.build().dumps(), content)
+        self.assertEqual(calls, [2])
+
+    def test_packages(self):
+        doc = Document()
+        doc['A'].append('Some regular text')
+        doc['B'].append(Lazy(lambda: TikZFigure()))
+        doc['B'].append(Lazy(_table, 2))
+        self.assertNotIn('pgfplots', doc.required_packages())
+        self.assertNotIn('pgfplots', doc.build_subtree('A').dumps())
+        self.assertFalse(any(l.evaluated for l in doc.lazy_items()))
+        self.assertEqual(calls, [])
+        content = doc.build().dumps()
+        self.assertEqual(calls, [2])
+        self.assertEqual(content.count(r"\usepackage{pgfplots}"), 1)
+        self.assertLess(content.index(r"\usepackage{pgfplots}"), 
+                        content.index(r"\begin{document}"))
+        self.assertEqual(doc.build().dumps(), content)
+
+    def test_concurrent(self):
+        doc = Document()
+        for i in range(1, 9):
+            doc['Section {}'.format(i)].append(Lazy(_table, i))
+        doc.build(lazy_workers=4)
+        self.assertEqual(sorted(calls), list(range(1, 9)))
+        self.assertTrue(all(l.evaluated for l in doc.lazy_items()))
+
+    def test_pickle(self):
+        lazy = pickle.loads(pickle.dumps(Lazy(_table, 3)))
+        self.assertEqual(lazy.evaluate()._data.shape, (3, 4))
+
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+import unittest
+import os
+import tempfile
+from latexdocs import Document, CodeListing
+from latexdocs.listing import highlight_many, _listing_cache_
+
+try:
+    import pygments
+    _has_pygments_ = True
+except ImportError:
+    _has_pygments_ = False
+
+
+@unittest.skipIf(not _has_pygments_, "Pygments is not installed.")
+class TestListing(unittest.TestCase):
+
+    def test_listing(self):
+        doc = Document(title='Title')
+        doc['Code'].append(CodeListing("x = {'a': 1}  # 50% & $", frame='single',
+                                       label='a & b'))
+        doc['Code'].append(CodeListing("y = 2", style='monokai'))
+        doc['Code'].append(CodeListing("z = 3"))
+        tex = doc.build().dumps()
+        self.assertIn(r"\usepackage{fancyvrb}", tex)
+        self.assertIn(r"frame=single,label={a \& b}]", tex)
+        self.assertIn(r"\PYdefault{n}{x}", tex)
+        self.assertIn(r"\PYmonokai{n}{y}", tex)
+        # the macros of a style are defined once
+        self.assertEqual(tex.count(r"\def\PYdefault#1#2"), 1)
+        self.assertEqual(tex.count(r"\def\PYmonokai#1#2"), 1)
+        self.assertIn("```python\nz = 3\n```", doc.preview(fmt='markdown'))
+
+    def test_highlight_many(self):
+        with tempfile.TemporaryDirectory() as d:
+            paths = []
+            for i in range(3):
+                paths.append(os.path.join(d, 'module_{}.py'.format(i)))
+                with open(paths[-1], 'w') as f:
+                    f.write("value_{} = {}\n".format(i, i))
+            listings = [CodeListing(filename=p) for p in paths]
+            self.assertEqual(listings[0].language, 'python')
+            texts = highlight_many(listings, workers=2)
+            self.assertIn(r"\PYdefault{n}{value\PYdefaultZus{}2}", texts[2])
+            hits = _listing_cache_.hits
+            self.assertEqual([c.highlighted() for c in listings], texts)
+            self.assertEqual(_listing_cache_.hits, hits + 3)
+            # a changed file is highlighted again
+            with open(paths[0], 'w') as f:
+                f.write("changed = 1\n")
+            os.utime(paths[0], ns=(0, 0))
+            self.assertIn(r"\PYdefault{n}{changed}", listings[0].highlighted())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import numpy as np
+
+from helpers import make_document
+from latexdocs import Document, Equations, ArrayMath, Text
+
+
+class TestPreview(unittest.TestCase):
+
+    def test_html(self):
+        html = make_document().preview('html')
+        self.assertIn('<h1 class="tex2jax_ignore">Document Title</h1>', html)
+        self.assertIn('<h2 class="tex2jax_ignore">Section 1</h2>', html)
+        self.assertIn('<h3 class="tex2jax_ignore">Subsection</h3>', html)
+        self.assertIn("<strong>Bold text</strong>", html)
+        self.assertIn("<tr><td>4.0</td><td>5.0</td><td>6.0</td><td>7.0</td></tr>", html)
+        self.assertIn("Some regular text &amp; symbols", html)
+        self.assertIn("tikzpicture", html)
+        self.assertIn("mathjax", html)
+
+    def test_markdown(self):
+        md = make_document().preview('markdown')
+        self.assertIn("## Section 1", md)
+        self.assertIn("### Subsection", md)
+        self.assertIn("**Bold text**", md)
+        self.assertIn("| A | B | C | D |", md)
+        self.assertIn("| 4.0 | 5.0 | 6.0 | 7.0 |", md)
+        self.assertIn("```latex", md)
+        self.assertRaises(NotImplementedError, make_document().preview, 'rtf')
+
+    def test_dollars(self):
+        # plain text is escaped in LaTeX, hence it is not math in the previews
+        doc = Document(title='Prices')
+        doc['Prices'].append('It costs $5 and $6.')
+        doc['Prices'].append(Text(r'The price is $p_1$.'))
+        html = doc.preview('html')
+        self.assertIn('<p class="tex2jax_ignore">It costs $5 and $6.</p>', html)
+        self.assertIn('<p>The price is $p_1$.</p>', html)
+        md = doc.preview('markdown')
+        self.assertIn(r"It costs \$5 and \$6.", md)
+        self.assertIn(r"The price is $p_1$.", md)
+
+    def test_equations(self):
+        doc = Document(title='Title')
+        doc['Solution'].append(Equations([('x_1', r'\frac{1}{2}'), ('x_2', '1')]))
+        doc['Breqn'].append(Equations([('y', 'a + b')], env='dmath'))
+        html = doc.preview('html')
+        self.assertIn('<div class="math">\n\\begin{align}', html)
+        self.assertIn(r"x_1 &amp;= \frac{1}{2}", html)
+        self.assertNotIn("dgroup", html)
+        self.assertNotIn('<pre class="latex">', html)
+        md = doc.preview('markdown')
+        self.assertIn("\\begin{align}\nx_1 &= \\frac{1}{2}", md)
+        self.assertNotIn("```latex", md)
+
+    def test_array_math(self):
+        doc = Document(title='Title')
+        doc['Matrix'].append(ArrayMath(np.ones((2, 12)), lhs='A', maxcols=12))
+        html = doc.preview('html')
+        self.assertIn('<div class="math">\n\\[\nA = \\begin{bmatrix}', html)
+        self.assertNotIn("MaxMatrixCols", html)
+        self.assertNotIn('<pre class="latex">', html)
+        md = doc.preview('markdown')
+        self.assertIn("\\[\nA = \\begin{bmatrix}", md)
+        self.assertNotIn("```latex", md)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
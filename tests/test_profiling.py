@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import unittest
+import json
+import numpy as np
+from latexdocs import Document, Table, Text, BuildProfiler
+
+
+class TestProfiling(unittest.TestCase):
+
+    def test_profiler(self):
+        doc = Document(title='Document Title', author='BB', date=True)
+        doc['Section 1'].append('Some regular text')
+        doc['Section 1', 'Subsection'].append(Text('Some bold text', bold=True))
+        data = np.array([[1, 2, 3, 4], [5, 6, 7, 8]])
+        doc['Section 2'].append(Table(data=data, columns=['A', 'B', 'C', 'D']))
+
+        profiler = BuildProfiler(allocations=True)
+        doc.build(profiler=profiler)
+
+        paths = [tuple(r['path']) for r in profiler.summary(kind='node')]
+        self.assertIn(('Section 1', 'Subsection'), paths)
+        self.assertIn(('Section 2',), paths)
+        items = profiler.summary(kind='item', sort='nbytes')
+        self.assertEqual(items[0]['path'], ['Section 2', 'Table[0]'])
+        self.assertTrue(all(r['nbytes'] > 0 for r in items))
+
+        self.assertIn('Section 1 / Subsection', profiler.report())
+        self.assertEqual(len(json.loads(profiler.to_json())['records']),
+                         len(profiler.records))
+        trace = json.loads(profiler.to_chrome_trace())
+        self.assertEqual(len(trace['traceEvents']), len(profiler.records))
+
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+import unittest
+import os
+import pickle
+import tempfile
+import numpy as np
+from latexdocs import Document
+
+from helpers import make_document
+
+
+class TestSerialization(unittest.TestCase):
+
+    def test_pickle(self):
+        doc = make_document()
+        loaded = pickle.loads(pickle.dumps(doc))
+        self.assertEqual(loaded.build().dumps(), doc.build().dumps())
+        node = loaded['Section 1', 'Subsection', 'Figure']
+        self.assertIs(node.root(), loaded)
+        self.assertEqual(node.depth, 3)
+
+    def test_dumpb_loadb(self):
+        doc = make_document()
+        reference = doc.build().dumps()
+
+        loaded = Document.loadb(doc.dumpb())
+        self.assertEqual(loaded.build().dumps(), reference)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'document.ltxd')
+            doc.dumpb(path)
+            loaded = Document.loadb(path)
+            data = loaded['Section 2', 'Subsection'].content[1]._data
+            self.assertIsInstance(data.base, np.memmap)
+            self.assertFalse(data.flags.writeable)
+            self.assertEqual(loaded.build().dumps(), reference)
+            del loaded, data
+
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+import unittest
+import numpy as np
+from latexdocs import Document, Table, Template, Placeholder, Image
+from latexdocs.template import slot
+
+
+class TestTemplate(unittest.TestCase):
+
+    def test_render(self):
+        doc = Document(title='Statement for ' + slot('name'))
+        doc['Summary'].append('Dear ' + slot('name') + ',')
+        doc['Transactions'].append(Placeholder('transactions'))
+        template = Template(doc)
+        self.assertEqual(template.names, {'name', 'transactions'})
+        table = Table(data=np.array([[1, 2]]), columns=['A', 'B'])
+        tex = template.render({'name': 'Alice & Bob', 'transactions': table})
+        self.assertIn(r"\title{Statement for Alice \& Bob}", tex)
+        self.assertIn(r"Dear Alice \& Bob,", tex)
+        self.assertIn(r"\begin{tabular}", tex)
+        self.assertNotIn("LTXDSLOT", tex)
+        # the same as building the document with the values
+        doc = Document(title='Statement for Alice & Bob')
+        doc['Summary'].append('Dear Alice & Bob,')
+        doc['Transactions'].append(table)
+        self.assertEqual(tex, doc.build().dumps())
+        self.assertRaises(KeyError, template.render, {'name': 'Alice'})
+
+    def test_packages(self):
+        doc = Document(title='Statement')
+        doc['Summary'].append(Placeholder('figure'))
+        doc['Notes'].append(Placeholder('notes', escape=False))
+        template = Template(doc)
+        tex = template.render({'figure': Image(filename='image.png'), 
+                               'notes': r"\begin{dmath} x = 1 \end{dmath}"})
+        head = tex.split(r"\begin{document}")[0]
+        self.assertIn(r"\usepackage{graphicx}", head)
+        self.assertIn(r"\usepackage{breqn}", head)
+        self.assertEqual(tex.count(r"\usepackage{graphicx}"), 1)
+        # the packages of the template are not loaded again
+        tex = template.render({'figure': 'text', 'notes': r"\begin{align}x\end{align}"})
+        self.assertEqual(tex.count(r"\usepackage{amsmath}"), 1)
+        self.assertNotIn(r"\usepackage{graphicx}", tex)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
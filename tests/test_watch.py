@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import unittest
+import os
+import tempfile
+from latexdocs.watch import Watcher
+
+
+_script_ = """
+from latexdocs import Document
+doc = Document(title='Watched')
+doc.append('Some text at the root.')
+for i in range(3):
+    doc['Section {}'.format(i)].append('{}'.format(TEXTS[i]))
+"""
+
+
+class TestWatch(unittest.TestCase):
+
+    def test_update(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            script = os.path.join(tmpdir, 'report.py')
+            with open(script, 'w') as f:
+                f.write("TEXTS = ['a', 'b', 'c']" + _script_)
+            watcher = Watcher(script, compile=False)
+            summary = watcher.update()
+            self.assertTrue(summary['full'])
+            self.assertEqual(len(summary['changed']), 3)
+            with open(os.path.join(tmpdir, 'report.tex'), 'r') as f:
+                tex = f.read()
+            for name in summary['changed']:
+                self.assertIn(r"\include{" + name + "}", tex)
+                self.assertTrue(os.path.isfile(os.path.join(tmpdir, name + '.tex')))
+            self.assertEqual(watcher.update()['changed'], [])
+            with open(script, 'w') as f:
+                f.write("TEXTS = ['a', 'x', 'c']" + _script_)
+            summary = watcher.update()
+            self.assertEqual(len(summary['changed']), 1)
+            with open(os.path.join(tmpdir, summary['changed'][0] + '.tex'), 'r') as f:
+                self.assertIn('x', f.read())
+
+
+if __name__ == "__main__":
+
+    unittest.main()